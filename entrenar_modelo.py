@@ -5,17 +5,26 @@
 # ENTRENAMIENTO BERT – OPTIMIZADO PARA CPU / RAM LIMITADA
 # ============================================================
 # - AdamW (torch.optim).
-# - Micro-batching real para evitar picos de memoria.
+# - Micro-batching real para evitar picos de memoria: acumulación de gradientes
+#   (backward por micro-batch), el pico depende de MICRO_BATCH y no de BATCH_SIZE.
 # - padding="longest" y truncation="only_first" (ahorro de RAM).
 # - Respuestas outlier: head+tail si superan RESP_MAX.
+# - Tokenización una sola vez, en caché memory-mapped (evaluacionescl/dataset_tokenizado.py).
+# - Lotes agrupados por longitud para no rellenar de más (evaluacionescl/inferencia/agrupacion.py).
 # - Guardado atómico del modelo.
-# - Bitácora PREPEND (lo nuevo arriba) con [fecha] y secciones.
-# - FIX: no usar .detach() antes de backward (para no romper el grafo).
+# - Bitácora JSON lines compartida con el orquestador (evaluacionescl/bitacora.py).
+# - Modo incremental: parte de trained_model/ con las filas nuevas + repaso.
 # ============================================================
 
 import os
 import gc
+import sys
+import json
 import shutil
+import time
+import zlib
+from functools import partial
+import numpy as np
 import pandas as pd
 import torch
 from torch.utils.data import Dataset, DataLoader
@@ -23,6 +32,9 @@ from torch.optim import AdamW
 from transformers import BertTokenizer, BertForSequenceClassification
 from datetime import datetime
 
+from evaluacionescl import bitacora, dataset_tokenizado
+from evaluacionescl.inferencia.agrupacion import MuestreadorPorLongitud
+
 # Limitar hilos BLAS (CPU chica más estable)
 os.environ.setdefault("OMP_NUM_THREADS", "1")
 os.environ.setdefault("MKL_NUM_THREADS", "1")
@@ -34,7 +46,8 @@ CARPETA_BASE    = "/var/www/sistemagclectura/"
 RUTA_DATASET    = os.path.join(CARPETA_BASE, "dataset_principal.csv")
 CARPETA_MODELO  = os.path.join(CARPETA_BASE, "trained_model/")
 CARPETA_BACKUPS = os.path.join(CARPETA_BASE, "backups_modelos/")
-LOG_FILE        = os.path.join(CARPETA_BASE, "reentrenamiento_log.txt")
+LOG_FILE        = os.path.join(CARPETA_BASE, "reentrenamiento_log.jsonl")
+CARPETA_TOKENS  = os.path.join(CARPETA_BASE, "cache_tokens/")
 
 BATCH_SIZE      = int(os.getenv("BATCH_SIZE", "8"))     # tamaño de lote macro
 MICRO_BATCH     = int(os.getenv("MICRO_BATCH", "4"))    # sub-lote real
@@ -45,45 +58,89 @@ MAX_LEN         = int(os.getenv("MAX_LEN", "512"))
 RESP_MAX        = int(os.getenv("RESP_MAX", "256"))
 MODEL_NAME      = os.getenv("MODEL_NAME", "dccuchile/bert-base-spanish-wwm-cased")
 NUM_LABELS      = int(os.getenv("NUM_LABELS", "5"))
+# Exportar a ONNX + paridad al guardar (opt-in: requiere onnxruntime, que no está en
+# requirements.txt). Activarlo si INFERENCIA_BACKEND=onnx: sin model.onnx se usa PyTorch.
+EXPORTAR_ONNX   = os.getenv("EXPORTAR_ONNX", "0") == "1"
+AGRUPAR_LONGITUD = os.getenv("AGRUPAR_POR_LONGITUD", "1") == "1"  # 0 = lotes al azar como antes
+GC_MICRO_BATCH  = os.getenv("GC_POR_MICRO_BATCH", "0") == "1"  # gc.collect() tras cada micro-batch (opt-in)
+
+# Modo: "completo" (desde MODEL_NAME, todo el dataset) o "incremental" (desde
+# trained_model/, filas nuevas + muestra de repaso). Lo elige orquestar_reentrenamiento.py
+MODO               = os.getenv("MODO_ENTRENAMIENTO", "completo")
+FILAS_NUEVAS       = int(os.getenv("FILAS_NUEVAS", "0"))          # las últimas N del CSV (el orquestador anexa al final)
+REPASO_FACTOR      = float(os.getenv("REPASO_FACTOR", "2"))       # filas anteriores de repaso por cada nueva
+EPOCHS_INCREMENTAL = int(os.getenv("EPOCHS_INCREMENTAL", "2"))
+LR_INCREMENTAL     = float(os.getenv("LR_INCREMENTAL", "2e-5"))
+# Si el incremental pierde más que esto, no se publica: en el control (siempre) y,
+# con VALIDACION_MOD, frente a la validación del último completo
+TOLERANCIA_INCREMENTAL = float(os.getenv("TOLERANCIA_INCREMENTAL", "0.03"))
+# Control del incremental: pares ya aprendidos que no entran en este ajuste; se miden
+# con el modelo publicado antes de ajustar y con el ajustado (no se quitan del entrenamiento)
+CONTROL_FILAS      = int(os.getenv("CONTROL_FILAS", "512"))
+# Opcional: 1 de cada N pares queda fuera del entrenamiento para medir exactitud.
+# Esos pares tampoco entran al modelo que se publica; 0 (por omisión) = sin validación
+VALIDACION_MOD     = int(os.getenv("VALIDACION_MOD", "0"))
+RUTA_METRICAS      = os.path.join(CARPETA_BASE, "metricas_entrenamiento.json")
+# Código de salida cuando el incremental se descarta (no se publica nada)
+SALIDA_NO_PUBLICADO = 3
 
 # -----------------------
-# BITÁCORA PREPEND (estilo claro)
+# BITÁCORA (solo anexar; se lee con manage.py bitacora_reentrenamiento)
 # -----------------------
-def registrar_progreso(mensaje: str, seccion: bool = False):
-    """Escribe UNA línea al INICIO del log (nuevo arriba), con [fecha]."""
-    fecha_hora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    if seccion:
-        linea = f"[{fecha_hora}] ************ {mensaje} ************\n"
-    else:
-        linea = f"[{fecha_hora}] {mensaje}\n"
-
-    try:
-        old = ""
-        if os.path.exists(LOG_FILE):
-            with open(LOG_FILE, "r", encoding="utf-8", errors="ignore") as f:
-                old = f.read()
-    except Exception:
-        old = ""
-    with open(LOG_FILE, "w", encoding="utf-8") as f:
-        f.write(linea + old)
+def registrar_progreso(mensaje: str, seccion: bool = False, **datos):
+    """Agrega UNA entrada al final de la bitácora; `datos` son campos extra del JSON."""
+    bitacora.registrar(LOG_FILE, mensaje, seccion=seccion, origen="entrenamiento", **datos)
 
 # -----------------------
 # DATASET
 # -----------------------
 class CustomInferenceDataset(Dataset):
-    """Dataset con columnas: sentence (fragmento), inference (respuesta), label (int)."""
-    def __init__(self, df: pd.DataFrame):
-        self.s = df["sentence"].astype(str).tolist()
-        self.i = df["inference"].astype(str).tolist()
+    """
+    Filas de `df` (columna label; su índice es la posición en el CSV) con los
+    ids ya tokenizados, leídos del caché memory-mapped.
+    """
+    def __init__(self, df: pd.DataFrame, cache: dataset_tokenizado.CacheTokens):
+        self.filas = df.index.to_numpy()
         self.l = df["label"].astype(int).tolist()
+        self.cache = cache
     def __len__(self): return len(self.l)
     def __getitem__(self, idx: int):
+        ids, tipos = self.cache.fila(self.filas[idx])
         return {
-            "sentence": self.s[idx],
-            "inference": self.i[idx],
+            "input_ids": torch.from_numpy(ids.astype(np.int64)),
+            "token_type_ids": torch.from_numpy(tipos.astype(np.int64)),
             "label": torch.tensor(self.l[idx], dtype=torch.long)
         }
 
+def rellenar_lote(items, pad_id: int):
+    """collate_fn: padding a la longitud del par más largo del lote (padding="longest")."""
+    largo = max(len(it["input_ids"]) for it in items)
+    input_ids = torch.full((len(items), largo), pad_id, dtype=torch.long)
+    token_type_ids = torch.zeros((len(items), largo), dtype=torch.long)
+    attention_mask = torch.zeros((len(items), largo), dtype=torch.long)
+    for n, it in enumerate(items):
+        k = len(it["input_ids"])
+        input_ids[n, :k] = it["input_ids"]
+        token_type_ids[n, :k] = it["token_type_ids"]
+        attention_mask[n, :k] = 1
+    return {
+        "input_ids": input_ids,
+        "token_type_ids": token_type_ids,
+        "attention_mask": attention_mask,
+        "label": torch.stack([it["label"] for it in items]),
+    }
+
+def cargador(df: pd.DataFrame, cache, tokenizer, batch_size: int, shuffle: bool):
+    """DataLoader sobre el caché; con AGRUPAR_LONGITUD cada lote junta pares de longitud parecida."""
+    dataset = CustomInferenceDataset(df, cache)
+    collate = partial(rellenar_lote, pad_id=tokenizer.pad_token_id)
+    if AGRUPAR_LONGITUD:
+        muestreador = MuestreadorPorLongitud(cache.longitudes[dataset.filas], batch_size, barajar=shuffle)
+        return DataLoader(dataset, batch_sampler=muestreador, collate_fn=collate,
+                          num_workers=0, pin_memory=False)
+    return DataLoader(dataset, batch_size=batch_size, shuffle=shuffle, collate_fn=collate,
+                      num_workers=0, pin_memory=False)
+
 # -----------------------
 # UTILIDADES
 # -----------------------
@@ -99,103 +156,206 @@ def hacer_backup_carpeta(origen: str, destino_base: str):
                 shutil.copy2(src, dst)
     registrar_progreso(f"Backup del modelo realizado en: {destino}")
 
-def crear_modelo():
-    """Carga modelo/tokenizer y selecciona CPU o GPU."""
-    tokenizer = BertTokenizer.from_pretrained(MODEL_NAME)
-    model = BertForSequenceClassification.from_pretrained(MODEL_NAME, num_labels=NUM_LABELS)
+def crear_modelo(origen: str = MODEL_NAME):
+    """Carga modelo/tokenizer desde `origen` (modelo base o trained_model/) y selecciona CPU o GPU."""
+    tokenizer = BertTokenizer.from_pretrained(origen)
+    model = BertForSequenceClassification.from_pretrained(origen, num_labels=NUM_LABELS)
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
     model.to(device)
-    registrar_progreso(f"Modelo/tokenizer listos. Dispositivo: {device}")
+    registrar_progreso(f"Modelo/tokenizer listos desde {origen}. Dispositivo: {device}")
     return model, tokenizer
 
-def truncate_head_tail_ids(ids, max_tokens):
-    """Para respuestas outlier: conserva inicio+final de la respuesta (head+tail)."""
-    if len(ids) <= max_tokens: return ids
-    front = (max_tokens + 1) // 2
-    tail  = max_tokens // 2
-    return ids[:front] + ids[-tail:] if tail > 0 else ids[:front]
-
-def forward_micro_batches(model, tokenizer, batch, device):
+def es_validacion(sentence: str, inference: str) -> bool:
+    """Partición estable por hash: un par cae siempre del mismo lado aunque el CSV crezca."""
+    if VALIDACION_MOD <= 0:
+        return False
+    clave = f"{sentence.strip().lower()}||{inference.strip().lower()}".encode("utf-8")
+    return zlib.crc32(clave) % VALIDACION_MOD == 0
+
+def dividir_dataset(df: pd.DataFrame):
+    """(entrenamiento, validación); la validación es la misma para ambos modos."""
+    mascara = pd.Series(
+        [es_validacion(s, i) for s, i in zip(df["sentence"].fillna("").astype(str),
+                                             df["inference"].fillna("").astype(str))],
+        index=df.index,
+    )
+    return df[~mascara], df[mascara]
+
+def seleccionar_incremental(df_total: pd.DataFrame, df_entrenar: pd.DataFrame, filas_nuevas: int):
+    """Filas nuevas (las últimas del CSV) + una muestra al azar de las anteriores para no olvidarlas."""
+    nuevas = df_entrenar[df_entrenar.index.isin(df_total.tail(filas_nuevas).index)]
+    anteriores = df_entrenar.drop(nuevas.index)
+    repaso = anteriores.sample(n=min(len(anteriores), int(len(nuevas) * REPASO_FACTOR)))
+    return pd.concat([nuevas, repaso]), len(nuevas), len(repaso)
+
+def seleccionar_control(df_entrenar: pd.DataFrame, seleccion: pd.DataFrame):
+    """Muestra fija de las filas anteriores que el incremental no vuelve a ver (vacía si no quedan)."""
+    fuera = df_entrenar.drop(seleccion.index)
+    return fuera.sample(n=min(len(fuera), max(0, CONTROL_FILAS)), random_state=0)
+
+def leer_metricas() -> dict:
+    try:
+        with open(RUTA_METRICAS, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def guardar_metricas(metricas: dict):
+    tmp = RUTA_METRICAS + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(metricas, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, RUTA_METRICAS)
+
+def preparar_cache_tokens(tokenizer, df_total: pd.DataFrame):
+    """Tokeniza (una sola vez) las filas del CSV que aún no están en el caché."""
+    inicio = time.perf_counter()
+    cache, nuevas = dataset_tokenizado.preparar(
+        CARPETA_TOKENS, tokenizer,
+        df_total["sentence"].fillna("").astype(str).tolist(),
+        df_total["inference"].fillna("").astype(str).tolist(),
+        MAX_LEN, RESP_MAX,
+    )
+    registrar_progreso(f"Caché de tokens: {len(cache)} pares ({nuevas} tokenizados ahora, "
+                       f"{time.perf_counter() - inicio:.1f}s).", pares=len(cache), tokenizados=nuevas)
+    return cache
+
+def submatriz(batch, start: int, end: int, device):
+    """Filas start:end del lote ya tokenizado, recortadas al par más largo de esas filas."""
+    largo = int(batch["attention_mask"][start:end].sum(dim=1).max())
+    return {k: batch[k][start:end, :largo].to(device)
+            for k in ("input_ids", "token_type_ids", "attention_mask")}
+
+def tokens_lote(batch):
+    """(tokens reales, tokens procesados con relleno) del lote, micro-batch por micro-batch."""
+    largos = batch["attention_mask"].sum(dim=1)
+    procesados = sum(int(largos[i:i + MICRO_BATCH].max()) * len(largos[i:i + MICRO_BATCH])
+                     for i in range(0, len(largos), MICRO_BATCH))
+    return int(largos.sum()), procesados
+
+def acumular_gradientes(model, batch, device, recolectar: bool = GC_MICRO_BATCH) -> float:
     """
-    Procesa un batch en micro-batches (para ahorrar RAM).
-    - Respuestas outlier: head+tail si superan RESP_MAX.
-    - Fragmento: truncation='only_first'.
-    - padding='longest' para no inflar.
+    Forward + backward de un batch en micro-batches (acumulación de gradientes).
+    Cada pérdida se escala por la fracción del batch que cubre su micro-batch,
+    así los gradientes acumulados son los de la pérdida media del batch
+    completo. El grafo de cada micro-batch se libera en su propio backward: el
+    pico de memoria depende de MICRO_BATCH, no de BATCH_SIZE.
+    Los pares llegan tokenizados del caché; cada micro-batch se recorta a su
+    par más largo. Devuelve la pérdida media del batch.
     """
-    sentences, inferences, labels = batch["sentence"], batch["inference"], batch["label"]
-    total, start, losses = len(labels), 0, []
+    labels = batch["label"]
+    total, start, perdida = len(labels), 0, 0.0
 
     while start < total:
         end = min(start + MICRO_BATCH, total)
-        sentences_mb, inferences_mb = sentences[start:end], inferences[start:end]
-        labels_mb = labels[start:end].to(device)
-
-        # Truncar respuestas muy largas preservando inicio y final
-        resp_proc = []
-        for r in inferences_mb:
-            ids = tokenizer.encode(r, add_special_tokens=False)
-            if len(ids) > RESP_MAX:
-                ids = truncate_head_tail_ids(ids, RESP_MAX)
-            resp_proc.append(tokenizer.decode(ids, skip_special_tokens=True))
-
-        enc = tokenizer(
-            text=sentences_mb,
-            text_pair=resp_proc,
-            add_special_tokens=True,
-            truncation="only_first",
-            max_length=MAX_LEN,
-            padding="longest",
-            return_tensors="pt"
-        )
-        enc = {k: v.to(device) for k, v in enc.items()}
-
-        outputs = model(**enc, labels=labels_mb)
-        losses.append(outputs.loss)  # <<-- sin .detach(): mantiene grad_fn
-
-        del enc, outputs
-        if device.type == "cuda": torch.cuda.empty_cache()
-        gc.collect()
+        enc = submatriz(batch, start, end, device)
+        loss = model(**enc, labels=labels[start:end].to(device)).loss * ((end - start) / total)
+        loss.backward()
+        perdida += loss.item()
+
+        del enc, loss
+        if recolectar:
+            if device.type == "cuda": torch.cuda.empty_cache()
+            gc.collect()
         start = end
 
-    return torch.stack(losses).mean()  # mantiene grad_fn para backward
+    return perdida
 
-def entrenar_modelo(model, tokenizer, dataloader):
-    """Entrena por épocas con AdamW + micro-batching."""
+def entrenar_modelo(model, dataloader, epocas: int = NUM_EPOCHS, lr: float = LEARNING_RATE):
+    """Entrena por épocas con AdamW + acumulación de gradientes por micro-batch."""
     device = next(model.parameters()).device
-    optimizer = AdamW(model.parameters(), lr=LEARNING_RATE)
+    optimizer = AdamW(model.parameters(), lr=lr)
     model.train()
 
-    for epoch in range(NUM_EPOCHS):
-        registrar_progreso(f"Época {epoch+1}/{NUM_EPOCHS}", seccion=True)
+    for epoch in range(epocas):
+        registrar_progreso(f"Época {epoch+1}/{epocas}", seccion=True)
         pasos, acum_loss = 0, 0.0
+        reales = procesados = 0
+        inicio = time.perf_counter()
         for batch in dataloader:
-            loss = forward_micro_batches(model, tokenizer, batch, device)
-            loss.backward()
+            r, p = tokens_lote(batch)
+            reales, procesados = reales + r, procesados + p
+            perdida = acumular_gradientes(model, batch, device)
             optimizer.step()
-            optimizer.zero_grad()
+            optimizer.zero_grad(set_to_none=True)
             pasos += 1
-            # Para promedio en bitácora usamos item() sin romper grafo del siguiente batch
-            acum_loss += loss.detach().item()
+            acum_loss += perdida
             if pasos % 50 == 0:
-                registrar_progreso(f"Batch {pasos}, Pérdida: {loss.detach().item():.6f}")
-        registrar_progreso(f"Época {epoch+1} finalizada. Loss promedio: {acum_loss/max(1,pasos):.6f}")
+                registrar_progreso(f"Batch {pasos}, Pérdida: {perdida:.6f}", epoca=epoch + 1, paso=pasos, perdida=perdida)
+        promedio = acum_loss / max(1, pasos)
+        eficiencia = reales / max(1, procesados)
+        tokens_s = reales / max(1e-9, time.perf_counter() - inicio)
+        registrar_progreso(f"Época {epoch+1} finalizada. Loss promedio: {promedio:.6f}. "
+                           f"Relleno: {eficiencia*100:.1f}% de tokens reales, {tokens_s:.0f} tokens/s.",
+                           epoca=epoch + 1, perdida_promedio=promedio,
+                           eficiencia_relleno=round(eficiencia, 4), tokens_por_segundo=round(tokens_s, 1))
 
     registrar_progreso("Entrenamiento completado.")
 
-def guardar_modelo(model, tokenizer, carpeta_destino: str):
-    """Guardado atómico: escribe en tmp y luego reemplaza la carpeta destino."""
-    os.makedirs(carpeta_destino, exist_ok=True)
-    tmp_dir = os.path.join(CARPETA_BASE, f"trained_model_tmp_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+def evaluar_exactitud(model, tokenizer, df_val: pd.DataFrame, cache):
+    """Exactitud del modelo sobre las filas de `df_val` (validación o control; None si está vacía)."""
+    if df_val.empty:
+        return None
+    device = next(model.parameters()).device
+    aciertos = 0
+    model.eval()
+    with torch.no_grad():
+        for batch in cargador(df_val, cache, tokenizer, MICRO_BATCH, shuffle=False):
+            enc = submatriz(batch, 0, len(batch["label"]), device)
+            pred = model(**enc).logits.argmax(dim=-1).cpu()
+            aciertos += int((pred == batch["label"]).sum())
+    model.train()
+    return aciertos / len(df_val)
+
+def exportar_onnx_modelo(model, tokenizer, carpeta: str, pares_paridad=None):
+    """Exporta a ONNX dentro de `carpeta`; model.onnx solo queda si pasa la paridad."""
+    try:
+        from evaluacionescl.inferencia.exportacion_onnx import exportar_y_activar
+        ok, deriva, acuerdo = exportar_y_activar(model, tokenizer, carpeta, pares_paridad)
+    except ImportError as e:
+        registrar_progreso(f"Exportación ONNX omitida (falta dependencia): {e}")
+        return
+    except Exception as e:
+        registrar_progreso(f"❌ Error al exportar a ONNX (se conserva solo PyTorch): {e}")
+        return
+    if ok:
+        registrar_progreso(f"Exportación ONNX verificada (deriva máx {deriva:.2e}).")
+    else:
+        registrar_progreso(f"❌ Paridad ONNX fallida (deriva máx {deriva:.2e}, acuerdo {acuerdo*100:.1f}%). "
+                           "El modelo nuevo se publica sin model.onnx.")
+
+def guardar_modelo(model, tokenizer, carpeta_destino: str, pares_paridad=None):
+    """
+    Guardado atómico: escribe en tmp y luego reemplaza la carpeta destino.
+    El archivo VERSION (lo último que se escribe) avisa a los workers web que
+    hay un modelo nuevo para recargar en caliente.
+    """
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    destino = carpeta_destino.rstrip("/")
+    tmp_dir = os.path.join(CARPETA_BASE, f"trained_model_tmp_{stamp}")
     os.makedirs(tmp_dir, exist_ok=True)
     model.save_pretrained(tmp_dir)
     tokenizer.save_pretrained(tmp_dir)
-    if os.path.exists(carpeta_destino):
-        shutil.rmtree(carpeta_destino)
-    shutil.move(tmp_dir, carpeta_destino)
-    registrar_progreso(f"Modelo actualizado en: {carpeta_destino}")
+    if EXPORTAR_ONNX:
+        # Se exporta en la carpeta temporal: el ONNX se activa junto con el modelo
+        exportar_onnx_modelo(model, tokenizer, tmp_dir, pares_paridad)
+    with open(os.path.join(tmp_dir, "VERSION"), "w", encoding="utf-8") as f:
+        f.write(f"{stamp}-{os.getpid()}")
+
+    # Dos renombres en el mismo sistema de archivos en lugar de rmtree + move:
+    # la carpeta nueva aparece completa de una sola vez.
+    anterior = None
+    if os.path.exists(destino):
+        anterior = f"{destino}_anterior_{stamp}"
+        os.rename(destino, anterior)
+    os.rename(tmp_dir, destino)
+    if anterior:
+        shutil.rmtree(anterior, ignore_errors=True)
+    registrar_progreso(f"Modelo actualizado en: {carpeta_destino} (versión {stamp})")
 
 def main():
-    registrar_progreso("INICIO DEL ENTRENAMIENTO", seccion=True)
+    inicio = time.perf_counter()
+    modo = MODO
+    registrar_progreso(f"INICIO DEL ENTRENAMIENTO ({modo.upper()})", seccion=True)
 
     if not os.path.exists(RUTA_DATASET):
         registrar_progreso("❌ dataset_principal.csv no encontrado. Abortando.", seccion=True)
@@ -207,21 +367,92 @@ def main():
             raise ValueError(f"Falta la columna '{col}' en dataset_principal.csv")
     registrar_progreso(f"Dataset cargado con {len(df_total)} registros.")
 
+    if modo == "incremental" and not os.path.exists(os.path.join(CARPETA_MODELO, "config.json")):
+        registrar_progreso("No hay un modelo entrenado del cual partir: se hace entrenamiento completo.")
+        modo = "completo"
+    if modo == "incremental" and FILAS_NUEVAS <= 0:
+        registrar_progreso("Modo incremental sin FILAS_NUEVAS: se hace entrenamiento completo.")
+        modo = "completo"
+
     os.makedirs(CARPETA_BACKUPS, exist_ok=True)
     hacer_backup_carpeta(CARPETA_MODELO, CARPETA_BACKUPS)
 
-    dataset = CustomInferenceDataset(df_total)
-    dataloader = DataLoader(dataset, batch_size=BATCH_SIZE, shuffle=True,
-                            num_workers=0, pin_memory=False)
-
-    model, tokenizer = crear_modelo()
-    entrenar_modelo(model, tokenizer, dataloader)
-    guardar_modelo(model, tokenizer, CARPETA_MODELO)
+    df_entrenar, df_val = dividir_dataset(df_total)
+    df_control = df_val.iloc[0:0]
+    if modo == "incremental":
+        seleccion, n_nuevas, n_repaso = seleccionar_incremental(df_total, df_entrenar, FILAS_NUEVAS)
+        df_control = seleccionar_control(df_entrenar, seleccion)
+        df_entrenar = seleccion
+        origen, epocas, lr = CARPETA_MODELO, EPOCHS_INCREMENTAL, LR_INCREMENTAL
+        registrar_progreso(f"Incremental: {n_nuevas} filas nuevas + {n_repaso} de repaso, "
+                           f"{epocas} épocas (lr {lr}).")
+    else:
+        origen, epocas, lr = MODEL_NAME, NUM_EPOCHS, LEARNING_RATE
+    registrar_progreso(f"Entrenamiento con {len(df_entrenar)} registros; {len(df_val)} reservados para validación.")
+
+    model, tokenizer = crear_modelo(origen)
+    cache = preparar_cache_tokens(tokenizer, df_total)
+    # En incremental `model` es aún el publicado: su exactitud en el control es la referencia
+    control_previa = evaluar_exactitud(model, tokenizer, df_control, cache)
+    dataloader = cargador(df_entrenar, cache, tokenizer, BATCH_SIZE, shuffle=True)
+    entrenar_modelo(model, dataloader, epocas, lr)
+    exactitud = evaluar_exactitud(model, tokenizer, df_val, cache)
+    control = evaluar_exactitud(model, tokenizer, df_control, cache)
+    segundos = time.perf_counter() - inicio
+
+    metricas = leer_metricas()
+    registro = {
+        "modo": modo,
+        "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "segundos": round(segundos, 1),
+        "exactitud": exactitud,
+        "filas_entrenamiento": len(df_entrenar),
+        "filas_validacion": len(df_val),
+        "exactitud_control": control,
+        "exactitud_control_previa": control_previa,
+        "filas_control": len(df_control),
+    }
+    texto_exactitud = f"{exactitud:.3f}" if exactitud is not None else "sin validación"
+    registrar_progreso(f"Tiempo: {segundos/60:.1f} min. Exactitud en validación: {texto_exactitud}.",
+                       metricas=registro)
+
+    referencia = metricas.get("ultimo_completo")
+    perdio = False
+    if modo == "incremental" and control is not None:
+        delta = control - control_previa
+        registrar_progreso(f"Control ({len(df_control)} pares ya aprendidos, fuera de este ajuste): "
+                           f"exactitud {control_previa:.3f} antes -> {control:.3f} después ({delta:+.3f}).",
+                           delta_control=delta)
+        perdio = delta < -TOLERANCIA_INCREMENTAL
+    if modo == "incremental" and referencia:
+        ref_exactitud = referencia.get("exactitud")
+        texto_ref = f"{ref_exactitud:.3f}" if ref_exactitud is not None else "sin validación"
+        registrar_progreso(f"Comparado con el último completo ({referencia['fecha']}): "
+                           f"{segundos/60:.1f} vs {referencia['segundos']/60:.1f} min, "
+                           f"exactitud {texto_exactitud} vs {texto_ref}.")
+        if exactitud is not None and ref_exactitud is not None and exactitud < ref_exactitud - TOLERANCIA_INCREMENTAL:
+            perdio = True
+    if perdio:
+        registrar_progreso("❌ El incremental perdió exactitud: no se publica y el próximo "
+                           "reentrenamiento será completo.", seccion=True)
+        metricas.update(ultimo=registro, forzar_completo=True)
+        guardar_metricas(metricas)
+        return SALIDA_NO_PUBLICADO
+
+    muestra = df_total.sample(n=min(64, len(df_total)), random_state=0)
+    pares_paridad = list(zip(muestra["sentence"].astype(str), muestra["inference"].astype(str)))
+    guardar_modelo(model, tokenizer, CARPETA_MODELO, pares_paridad)
+
+    metricas["ultimo"] = registro
+    if modo == "completo":
+        metricas.update(ultimo_completo=registro, forzar_completo=False)
+    guardar_metricas(metricas)
 
     with open(os.path.join(CARPETA_BASE, "ultima_fecha_entrenamiento.txt"), "w", encoding="utf-8") as f:
         f.write(datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
 
     registrar_progreso("Proceso de entrenamiento finalizado exitosamente.", seccion=True)
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -2,7 +2,7 @@ from django.contrib import admin
 
 # Register your models here.
 from django.contrib import admin
-from .models import RegistroUsuarios, RegistroAdmin, EvaluacionLectura, EvaluacionLecturaIndividual, VistaAdmin, LecturaEnCurso
+from .models import RegistroUsuarios, RegistroAdmin, EvaluacionLectura, EvaluacionLecturaIndividual, VistaAdmin, LecturaEnCurso, CacheClasificacion, FragmentoLectura
 
 admin.site.register(RegistroUsuarios)
 admin.site.register(RegistroAdmin)
@@ -10,3 +10,5 @@ admin.site.register(EvaluacionLectura)
 admin.site.register(EvaluacionLecturaIndividual)
 admin.site.register(VistaAdmin)
 admin.site.register(LecturaEnCurso)
+admin.site.register(CacheClasificacion)
+admin.site.register(FragmentoLectura)
@@ -0,0 +1,120 @@
+"""
+Bitácora de reentrenamiento en JSON lines, solo de anexar.
+
+La escriben entrenar_modelo.py y orquestar_reentrenamiento.py (por eso no
+depende de Django). Cada entrada es UNA línea JSON que se agrega al final con
+una sola escritura en modo O_APPEND: el costo no depende del tamaño del
+archivo, dos procesos pueden escribir a la vez sin pisarse y un corte a mitad
+de camino deja intactas las líneas anteriores (la bitácora vieja en texto
+reescribía el archivo completo por cada línea, para poner lo nuevo arriba).
+
+Al pasar de `max_bytes` el archivo rota: ruta -> ruta.1 -> ruta.2 ... hasta
+`conservar` archivos. `leer_recientes` devuelve lo más nuevo primero leyendo
+el archivo por bloques desde el final, así mostrar las últimas N entradas no
+recorre la bitácora completa.
+"""
+
+import json
+import os
+from datetime import datetime
+
+MAX_BYTES = int(os.getenv("BITACORA_MAX_BYTES", str(5 * 1024 * 1024)))
+CONSERVAR = int(os.getenv("BITACORA_CONSERVAR", "5"))
+BLOQUE = 8192
+
+try:
+    import fcntl
+except ImportError:  # Windows: la rotación queda sin bloqueo entre procesos
+    fcntl = None
+
+
+def _rotados(ruta, conservar):
+    return [ruta] + [f"{ruta}.{i}" for i in range(1, conservar)]
+
+
+def _rotar(ruta, max_bytes, conservar):
+    with open(f"{ruta}.lock", "a") as candado:
+        if fcntl:
+            fcntl.flock(candado, fcntl.LOCK_EX)
+        # Otro proceso pudo rotar mientras se esperaba el bloqueo
+        if not os.path.exists(ruta) or os.path.getsize(ruta) < max_bytes:
+            return
+        archivos = _rotados(ruta, conservar)
+        if os.path.exists(archivos[-1]):
+            os.remove(archivos[-1])
+        for origen, destino in reversed(list(zip(archivos, archivos[1:]))):
+            if os.path.exists(origen):
+                os.replace(origen, destino)
+
+
+def registrar(ruta, mensaje, seccion=False, origen="", max_bytes=MAX_BYTES, conservar=CONSERVAR, **datos):
+    """Agrega una entrada al final de la bitácora. Los `datos` extra van como campos del JSON."""
+    try:
+        if os.path.getsize(ruta) >= max_bytes:
+            _rotar(ruta, max_bytes, conservar)
+    except OSError:
+        pass  # aún no existe
+
+    entrada = {
+        "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "origen": origen,
+        "seccion": seccion,
+        "mensaje": mensaje,
+        **datos,
+    }
+    linea = (json.dumps(entrada, ensure_ascii=False) + "\n").encode("utf-8")
+    fd = os.open(ruta, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.write(fd, linea)
+    finally:
+        os.close(fd)
+
+
+def _lineas_al_reves(ruta):
+    """Líneas del archivo (bytes, sin el salto) de la última a la primera."""
+    with open(ruta, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        posicion = f.tell()
+        resto = b""
+        while posicion > 0:
+            leer = min(BLOQUE, posicion)
+            posicion -= leer
+            f.seek(posicion)
+            partes = (f.read(leer) + resto).split(b"\n")
+            # La primera parte puede ser el final de una línea que empieza en el bloque anterior
+            resto = partes.pop(0)
+            for linea in reversed(partes):
+                if linea:
+                    yield linea
+        if resto:
+            yield resto
+
+
+def leer_recientes(ruta, limite=100, origen=None, conservar=CONSERVAR):
+    """
+    Hasta `limite` entradas (dicts), la más nueva primero, incluyendo los
+    archivos rotados. Con `origen` solo las de ese script.
+    """
+    entradas = []
+    for archivo in _rotados(ruta, conservar):
+        if not os.path.exists(archivo):
+            continue
+        for linea in _lineas_al_reves(archivo):
+            try:
+                entrada = json.loads(linea)
+            except ValueError:
+                continue  # línea incompleta (el proceso murió escribiéndola)
+            if origen and entrada.get("origen") != origen:
+                continue
+            entradas.append(entrada)
+            if len(entradas) >= limite:
+                return entradas
+    return entradas
+
+
+def formatear(entrada):
+    """Línea de texto al estilo de la bitácora anterior: [fecha] mensaje."""
+    mensaje = entrada.get("mensaje", "")
+    if entrada.get("seccion"):
+        mensaje = f"************ {mensaje} ************"
+    return f"[{entrada.get('fecha', '')}] {mensaje}"
@@ -0,0 +1,76 @@
+"""
+Catálogo en memoria del banco de textos.
+
+Sustituye al `os.listdir(media/bancotext/<tipo>)` que hacía cada selección de
+lectura: la lista de PDFs de cada tipo se lee UNA vez de la tabla Lectura y se
+guarda en el proceso. Se invalida al subir o registrar lecturas (`invalidar`),
+y como cada worker web tiene su propia copia, la invalidación se publica
+también como una versión en la caché de Django; si la caché no es compartida
+entre procesos (LocMemCache), las demás copias caducan a los CATALOGO_TTL
+segundos.
+"""
+
+import os
+import threading
+from time import monotonic
+
+from django.conf import settings
+from django.core.cache import cache
+
+CLAVE_VERSION = "catalogo_lecturas_version"
+
+_lock = threading.Lock()
+_catalogo = {}  # tipo_texto -> (version, caduca_en, frozenset de nombres de archivo)
+
+
+def _version():
+    return cache.get(CLAVE_VERSION, 0)
+
+
+def _cargar(tipo_texto):
+    from .models import Lectura
+
+    # Por tipo y no por carpeta: las lecturas subidas antes de 0012 guardaban
+    # bancotext/<archivo> (0019 las mueve a bancotext/<tipo>/ si el archivo existe)
+    rutas = Lectura.objects.filter(tipo_texto=tipo_texto).values_list("archivo_pdf", flat=True)
+    return frozenset(os.path.basename(r) for r in rutas if r.endswith(".pdf"))
+
+
+def archivos(tipo_texto):
+    """Nombres de archivo (ej. 'Mi_texto.pdf') de las lecturas de ese tipo."""
+    version = _version()
+    entrada = _catalogo.get(tipo_texto)
+    if entrada is not None and entrada[0] == version and monotonic() < entrada[1]:
+        return entrada[2]
+    with _lock:
+        entrada = _catalogo.get(tipo_texto)
+        if entrada is None or entrada[0] != version or monotonic() >= entrada[1]:
+            ttl = getattr(settings, "CATALOGO_TTL", 300)
+            entrada = (version, monotonic() + ttl, _cargar(tipo_texto))
+            _catalogo[tipo_texto] = entrada
+    return entrada[2]
+
+
+def no_leidos(usuario, tipo_texto):
+    """
+    Textos del tipo que el usuario aún no ha respondido: una sola consulta
+    (sus títulos ya leídos) y la diferencia de conjuntos contra el catálogo.
+    """
+    from .models import EvaluacionLecturaIndividual
+
+    leidos = set(EvaluacionLecturaIndividual.objects.filter(
+        usuario=usuario,
+        tipo_texto=tipo_texto,
+        respuesta_usuario__isnull=False
+    ).values_list("titulo_lectura", flat=True))
+    return archivos(tipo_texto) - leidos
+
+
+def invalidar():
+    """Llamar al crear, modificar o borrar lecturas."""
+    with _lock:
+        _catalogo.clear()
+    try:
+        cache.incr(CLAVE_VERSION)
+    except ValueError:
+        cache.set(CLAVE_VERSION, 1, None)
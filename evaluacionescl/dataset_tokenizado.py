@@ -0,0 +1,210 @@
+"""
+Caché del dataset de entrenamiento ya tokenizado, en arreglos memory-mapped.
+
+entrenar_modelo.py tokenizaba cada par (fragmento, respuesta) en cada época:
+codificaba la respuesta, la recortaba head+tail, la decodificaba a texto y
+volvía a tokenizar el par completo. Aquí cada par se tokeniza UNA vez (con el
+recorte aplicado directamente sobre los ids) y se guarda en la carpeta del
+caché como arreglos planos de NumPy:
+
+    input_ids.bin       int32  ids de todos los pares, uno detrás de otro
+    token_type_ids.bin  int8   0 = fragmento, 1 = respuesta
+    longitudes.bin      int32  tokens de cada par
+    hashes.bin          uint64 huella del texto de cada par
+    meta.json          huella del tokenizador y cantidad de filas/tokens
+
+El caché está atado a la huella del tokenizador (vocabulario, MAX_LEN y
+RESP_MAX): si cambia, se reconstruye. Como el orquestador solo anexa filas al
+final del CSV, en la siguiente corrida se tokenizan únicamente las filas
+nuevas y se agregan al final de los archivos; si el CSV se editó de otra
+forma, se arma un caché nuevo reutilizando los pares que ya estaban.
+
+No depende de Django ni de torch (lo usa entrenar_modelo.py).
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+VERSION = 1
+ARCHIVOS = {
+    "input_ids": np.int32,
+    "token_type_ids": np.int8,
+    "longitudes": np.int32,
+    "hashes": np.uint64,
+}
+
+
+def hash_tokenizador(tokenizer, max_len, resp_max):
+    """Huella de todo lo que cambia los ids resultantes."""
+    h = hashlib.sha256()
+    h.update(json.dumps({
+        "version": VERSION,
+        "clase": type(tokenizer).__name__,
+        "minusculas": getattr(tokenizer, "do_lower_case", None),
+        "max_len": max_len,
+        "resp_max": resp_max,
+    }, sort_keys=True).encode("utf-8"))
+    for token, i in sorted(tokenizer.get_vocab().items(), key=lambda x: x[1]):
+        h.update(f"{i}\t{token}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def hash_fila(sentence, inference):
+    """Huella de 64 bits del texto del par."""
+    digest = hashlib.blake2b(f"{sentence}\x1f{inference}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def truncar_head_tail(ids, max_tokens):
+    """Para respuestas outlier: conserva inicio+final de la respuesta (head+tail)."""
+    if len(ids) <= max_tokens:
+        return ids
+    front = (max_tokens + 1) // 2
+    tail = max_tokens // 2
+    return ids[:front] + ids[-tail:] if tail > 0 else ids[:front]
+
+
+def tokenizar_par(tokenizer, sentence, inference, max_len, resp_max):
+    """
+    (input_ids, token_type_ids) de un par: respuesta recortada head+tail a
+    `resp_max` y fragmento truncado para no pasar de `max_len` (only_first).
+    """
+    ids_respuesta = truncar_head_tail(tokenizer.encode(inference, add_special_tokens=False), resp_max)
+    ids_fragmento = tokenizer.encode(sentence, add_special_tokens=False)
+    disponible = max_len - tokenizer.num_special_tokens_to_add(pair=True) - len(ids_respuesta)
+    ids_fragmento = ids_fragmento[:max(0, disponible)]
+    return (
+        tokenizer.build_inputs_with_special_tokens(ids_fragmento, ids_respuesta),
+        tokenizer.create_token_type_ids_from_sequences(ids_fragmento, ids_respuesta),
+    )
+
+
+class CacheTokens:
+    """Lectura del caché: los ids quedan en disco (np.memmap) y se leen por fila."""
+
+    def __init__(self, carpeta):
+        self.meta = _leer_meta(carpeta)
+        filas, tokens = self.meta["filas"], self.meta["tokens"]
+        self.input_ids = _mapear(carpeta, "input_ids", tokens)
+        self.token_type_ids = _mapear(carpeta, "token_type_ids", tokens)
+        self.longitudes = np.array(_mapear(carpeta, "longitudes", filas))
+        self.inicios = np.zeros(filas, dtype=np.int64)
+        np.cumsum(self.longitudes[:-1], out=self.inicios[1:])
+
+    def __len__(self):
+        return len(self.longitudes)
+
+    def fila(self, i):
+        """(input_ids, token_type_ids) del par en la posición `i` del CSV, como vistas del memmap."""
+        inicio = self.inicios[i]
+        fin = inicio + self.longitudes[i]
+        return self.input_ids[inicio:fin], self.token_type_ids[inicio:fin]
+
+
+def preparar(carpeta, tokenizer, sentences, inferences, max_len, resp_max):
+    """
+    Deja el caché de `carpeta` al día con los pares dados (en el orden del CSV)
+    y devuelve (CacheTokens, pares tokenizados en esta llamada).
+    """
+    clave = hash_tokenizador(tokenizer, max_len, resp_max)
+    hashes = np.fromiter((hash_fila(s, i) for s, i in zip(sentences, inferences)), dtype=np.uint64)
+    meta = _leer_meta(carpeta)
+    previos, guardados = 0, np.zeros(0, dtype=np.uint64)
+    if meta and meta["tokenizador"] == clave:
+        previos = meta["filas"]
+        guardados = np.array(_mapear(carpeta, "hashes", previos))
+
+    def tokenizar(desde):
+        for h, s, i in zip(hashes[desde:], sentences[desde:], inferences[desde:]):
+            yield (h, *tokenizar_par(tokenizer, s, i, max_len, resp_max))
+
+    if meta and meta["tokenizador"] == clave and np.array_equal(guardados, hashes[:previos]):
+        # Caso común: el CSV solo creció al final
+        if previos < len(hashes):
+            _escribir(carpeta, meta, tokenizar(previos))
+        return CacheTokens(carpeta), len(hashes) - previos
+
+    reutilizables = {}
+    anterior = None
+    if previos:
+        anterior = CacheTokens(carpeta)
+        reutilizables = {int(h): n for n, h in enumerate(guardados)}
+
+    nuevos = 0
+
+    def reconstruir():
+        nonlocal nuevos
+        for h, s, i in zip(hashes, sentences, inferences):
+            if int(h) in reutilizables:
+                ids, tipos = anterior.fila(reutilizables[int(h)])
+            else:
+                ids, tipos = tokenizar_par(tokenizer, s, i, max_len, resp_max)
+                nuevos += 1
+            yield h, ids, tipos
+
+    temporal = carpeta.rstrip("/") + ".tmp"
+    shutil.rmtree(temporal, ignore_errors=True)
+    os.makedirs(temporal)
+    _escribir(temporal, {"version": VERSION, "tokenizador": clave, "filas": 0, "tokens": 0}, reconstruir())
+    shutil.rmtree(carpeta, ignore_errors=True)
+    os.rename(temporal, carpeta)
+    return CacheTokens(carpeta), nuevos
+
+
+def _ruta(carpeta, nombre):
+    return os.path.join(carpeta, f"{nombre}.bin")
+
+
+def _mapear(carpeta, nombre, cantidad):
+    if cantidad == 0:
+        return np.zeros(0, dtype=ARCHIVOS[nombre])
+    return np.memmap(_ruta(carpeta, nombre), dtype=ARCHIVOS[nombre], mode="r", shape=(cantidad,))
+
+
+def _leer_meta(carpeta):
+    try:
+        with open(os.path.join(carpeta, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("version") == VERSION else None
+
+
+def _escribir(carpeta, meta, pares):
+    """
+    Agrega los pares al final de los archivos y actualiza meta.json al último
+    (reemplazo atómico). Lo que una corrida interrumpida dejó escrito más allá
+    de lo que dice meta.json se descarta antes de anexar.
+    """
+    tamanos = {
+        "input_ids": meta["tokens"], "token_type_ids": meta["tokens"],
+        "longitudes": meta["filas"], "hashes": meta["filas"],
+    }
+    archivos = {}
+    try:
+        for nombre, cantidad in tamanos.items():
+            f = open(_ruta(carpeta, nombre), "ab")
+            f.truncate(cantidad * np.dtype(ARCHIVOS[nombre]).itemsize)
+            archivos[nombre] = f
+        filas, tokens = meta["filas"], meta["tokens"]
+        for h, ids, tipos in pares:
+            archivos["input_ids"].write(np.asarray(ids, dtype=np.int32).tobytes())
+            archivos["token_type_ids"].write(np.asarray(tipos, dtype=np.int8).tobytes())
+            archivos["longitudes"].write(np.int32(len(ids)).tobytes())
+            archivos["hashes"].write(np.uint64(h).tobytes())
+            filas += 1
+            tokens += len(ids)
+    finally:
+        for f in archivos.values():
+            f.close()
+
+    meta = dict(meta, filas=filas, tokens=tokens)
+    ruta_meta = os.path.join(carpeta, "meta.json")
+    with open(ruta_meta + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(ruta_meta + ".tmp", ruta_meta)
+    return meta
@@ -0,0 +1,284 @@
+"""
+Exportaciones con memoria acotada.
+
+Los libros se escriben en modo write-only de openpyxl (cada fila se vuelca a
+disco al agregarla, no queda el libro entero en memoria) a partir de
+iteradores sobre UNA consulta leída por bloques (`.iterator(chunk_size=...)`).
+El archivo resultante es temporal y se envía con FileResponse, que lo lee en
+trozos; se borra solo al cerrarse la respuesta.
+
+Las mismas hojas se pueden escribir como CSV o Parquet (pyarrow, opcional);
+esos formatos llevan solo la primera hoja. Los trabajos en segundo plano
+(trabajos_exportacion.py) usan `EXPORTACIONES` y `escribir`.
+
+`filas_evaluaciones` recorre EvaluacionLecturaIndividual completa (una fila
+por evaluación) por páginas de clave primaria: cada página es
+`WHERE id > <último id> ORDER BY id LIMIT n`, así el costo por página no
+crece con la posición como con OFFSET y la memoria queda acotada a una
+página. La usan la vista exportar_evaluaciones y manage.py
+exportar_evaluaciones.
+"""
+
+import csv
+import tempfile
+from datetime import datetime, time, timedelta
+
+import openpyxl
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from . import vista_admin
+from .puntuacion import SIN_EVALUAR, etiqueta_nivel, nivel_comprension
+from .resumenes import estadisticas_por_alumno
+
+CONTENT_TYPE_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+FILAS_POR_BLOQUE = 2000
+
+ENCABEZADOS_ALUMNOS = ["Nombre", "Matrícula", "Textos leídos", "Puntaje total", "Porcentaje", "Nivel de comprensión"]
+
+
+class Contador:
+    """Envuelve un iterable de filas y cuenta las que se escribieron."""
+
+    def __init__(self, filas):
+        self.filas = filas
+        self.total = 0
+
+    def __iter__(self):
+        for fila in self.filas:
+            self.total += 1
+            yield fila
+
+
+def escribir_xlsx(hojas, destino):
+    """hojas: lista de (título, encabezados, filas iterables); destino: ruta o archivo binario."""
+    wb = openpyxl.Workbook(write_only=True)
+    for titulo, encabezados, filas in hojas:
+        ws = wb.create_sheet(titulo)
+        ws.append(encabezados)
+        for fila in filas:
+            ws.append(fila)
+    wb.save(destino)
+
+
+def escribir_csv(hojas, destino):
+    _, encabezados, filas = hojas[0]
+    # utf-8-sig: Excel reconoce los acentos al abrir el CSV
+    with open(destino, "w", newline="", encoding="utf-8-sig") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(encabezados)
+        escritor.writerows(filas)
+
+
+class _Eco:
+    """Archivo de mentira para csv.writer: devuelve la línea en vez de guardarla."""
+
+    def write(self, valor):
+        return valor
+
+
+def lineas_csv(encabezados, filas):
+    """Genera el CSV línea por línea (bytes) para StreamingHttpResponse."""
+    escritor = csv.writer(_Eco())
+    yield "\ufeff".encode("utf-8") + escritor.writerow(encabezados).encode("utf-8")
+    for fila in filas:
+        yield escritor.writerow(fila).encode("utf-8")
+
+
+def escribir_parquet(hojas, destino, filas_por_grupo=FILAS_POR_BLOQUE, esquema=None):
+    """Sin `esquema` se deduce del primer bloque (una columna toda vacía queda como texto)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    _, encabezados, filas = hojas[0]
+    escritor = None
+    bloque = []
+
+    def volcar():
+        nonlocal escritor, esquema
+        columnas = {nombre: [fila[i] for fila in bloque] for i, nombre in enumerate(encabezados)}
+        if esquema is None:
+            esquema = pa.Table.from_pydict(columnas).schema
+            # Columnas vacías en el primer bloque: se guardan como texto
+            esquema = pa.schema([
+                pa.field(c.name, pa.string()) if pa.types.is_null(c.type) else c for c in esquema
+            ])
+        if escritor is None:
+            escritor = pq.ParquetWriter(destino, esquema)
+        escritor.write_table(pa.Table.from_pydict(columnas, schema=esquema))
+        bloque.clear()
+
+    try:
+        for fila in filas:
+            bloque.append(fila)
+            if len(bloque) >= filas_por_grupo:
+                volcar()
+        if bloque or escritor is None:
+            volcar()
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+
+ESCRITORES = {"xlsx": escribir_xlsx, "csv": escribir_csv, "parquet": escribir_parquet}
+CONTENT_TYPES = {"xlsx": CONTENT_TYPE_XLSX, "csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+
+def formatos_disponibles():
+    formatos = ["xlsx", "csv"]
+    try:
+        import pyarrow  # noqa: F401
+        formatos.append("parquet")
+    except ImportError:
+        pass
+    return formatos
+
+
+def escribir(hojas, formato, destino):
+    ESCRITORES[formato](hojas, destino)
+
+
+def respuesta_xlsx(hojas, nombre_archivo):
+    temporal = tempfile.TemporaryFile(suffix=".xlsx")
+    escribir_xlsx(hojas, temporal)
+    temporal.seek(0)
+    return FileResponse(temporal, as_attachment=True, filename=nombre_archivo, content_type=CONTENT_TYPE_XLSX)
+
+
+def filas_estadisticas_alumnos(usuarios=None, chunk_size=FILAS_POR_BLOQUE):
+    """Una fila por alumno, de una sola consulta anotada leída por bloques."""
+    consulta = estadisticas_por_alumno(usuarios).order_by("id").values_list(
+        "nombre", "apellido", "matricula", "textos", "puntaje", "porcentaje"
+    )
+    for nombre, apellido, matricula, textos, puntaje, porcentaje in consulta.iterator(chunk_size=chunk_size):
+        yield [
+            f"{nombre} {apellido}",
+            matricula,
+            textos,
+            puntaje,
+            int(porcentaje),
+            nivel_comprension(porcentaje) if textos else SIN_EVALUAR,
+        ]
+
+
+def hojas_estadisticas_alumnos():
+    return [("Estadísticas por alumno", ENCABEZADOS_ALUMNOS, filas_estadisticas_alumnos())]
+
+
+def hojas_resultados_globales():
+    por_tipo = (
+        [r["tipo"], r["cantidad"], r["suma"], int(r["porcentaje"]),
+         etiqueta_nivel(r["porcentaje"]) if r["evaluado"] else SIN_EVALUAR]
+        for r in vista_admin.resumen_por_tipo()
+    )
+    # Segunda hoja: el mismo resumen por cuatrimestre y sexo
+    por_grupo = (
+        [r["tipo"], r["cuatrimestre"], r["sexo"], r["usuarios"], r["cantidad"], r["suma"], int(r["porcentaje"]),
+         etiqueta_nivel(r["porcentaje"]) if r["evaluado"] else SIN_EVALUAR]
+        for r in vista_admin.resumen_por_grupo()
+    )
+    return [
+        ("Resumen por tipo de texto",
+         ["Tipo de texto", "Documentos leídos", "Puntaje total", "Porcentaje", "Nivel de comprensión"],
+         por_tipo),
+        ("Por cuatrimestre y sexo",
+         ["Tipo de texto", "Cuatrimestre", "Sexo", "Alumnos", "Documentos leídos", "Puntaje total", "Porcentaje", "Nivel de comprensión"],
+         por_grupo),
+    ]
+
+
+ENCABEZADOS_EVALUACIONES = [
+    "id", "Fecha", "Tipo de texto", "Título", "Fragmento", "Instrucción", "Respuesta", "Puntaje",
+    "Tipo de inferencia", "Palabras por minuto", "Tiempo de lectura (s)",
+    "id alumno", "Matrícula", "Edad", "Sexo", "Cuatrimestre",
+]
+CAMPOS_EVALUACIONES = [
+    "id", "fecha_lectura", "tipo_texto", "titulo_lectura", "fragmento", "instruccion", "respuesta_usuario",
+    "puntaje", "tipo_inferencia", "palabras_por_minuto", "tiempo_lectura_segundos",
+    "usuario_id", "usuario__matricula", "usuario__edad", "usuario__sexo", "usuario__cuatrimestre",
+]
+
+
+def esquema_evaluaciones():
+    """Tipos fijos: en una tabla grande, el primer bloque puede traer columnas enteras en None."""
+    import pyarrow as pa
+
+    tipos = [pa.int64(), pa.string(), pa.string(), pa.string(), pa.string(), pa.string(), pa.string(),
+             pa.int64(), pa.string(), pa.int64(), pa.float64(),
+             pa.int64(), pa.string(), pa.int64(), pa.string(), pa.string()]
+    return pa.schema([pa.field(nombre, tipo) for nombre, tipo in zip(ENCABEZADOS_EVALUACIONES, tipos)])
+
+
+def _inicio_del_dia(fecha):
+    momento = datetime.combine(fecha, time.min)
+    return timezone.make_aware(momento) if settings.USE_TZ else momento
+
+
+def filtros_evaluaciones(desde=None, hasta=None, tipo_texto=None):
+    """
+    Arma los filtros de la exportación a partir de texto (GET o línea de
+    comandos). Fechas AAAA-MM-DD, ambas inclusive; lanza ValueError si no son
+    válidas. Se filtra por rango de fecha_lectura (no por __date) para poder
+    usar un índice.
+    """
+    filtros = {}
+    for nombre, valor in (("desde", desde), ("hasta", hasta)):
+        if not valor:
+            continue
+        fecha = parse_date(valor)
+        if fecha is None:
+            raise ValueError(f"Fecha no válida en '{nombre}': {valor} (se espera AAAA-MM-DD)")
+        if nombre == "desde":
+            filtros["fecha_lectura__gte"] = _inicio_del_dia(fecha)
+        else:
+            filtros["fecha_lectura__lt"] = _inicio_del_dia(fecha + timedelta(days=1))
+    if tipo_texto:
+        filtros["tipo_texto"] = tipo_texto
+    return filtros
+
+
+def filas_evaluaciones(filtros=None, tamano_pagina=FILAS_POR_BLOQUE):
+    """Una fila por EvaluacionLecturaIndividual con los datos del alumno, paginada por id."""
+    from .models import EvaluacionLecturaIndividual
+
+    consulta = EvaluacionLecturaIndividual.objects.filter(**(filtros or {})).order_by("id")
+    ultimo = 0
+    while True:
+        pagina = list(consulta.filter(id__gt=ultimo).values_list(*CAMPOS_EVALUACIONES)[:tamano_pagina])
+        for fila in pagina:
+            fila = list(fila)
+            if fila[1] is not None:
+                fila[1] = (timezone.localtime(fila[1]) if settings.USE_TZ else fila[1]).isoformat(sep=" ")
+            yield fila
+        if len(pagina) < tamano_pagina:
+            return
+        ultimo = pagina[-1][0]
+
+
+def hojas_evaluaciones(filtros=None, tamano_pagina=FILAS_POR_BLOQUE):
+    return [("Evaluaciones", ENCABEZADOS_EVALUACIONES, filas_evaluaciones(filtros, tamano_pagina))]
+
+
+def respuesta_evaluaciones(filtros, formato, nombre_archivo):
+    """CSV: se genera mientras se envía. Parquet: se escribe a un temporal y se envía por trozos."""
+    if formato == "csv":
+        respuesta = StreamingHttpResponse(
+            lineas_csv(ENCABEZADOS_EVALUACIONES, filas_evaluaciones(filtros)),
+            content_type="text/csv; charset=utf-8",
+        )
+        respuesta["Content-Disposition"] = f'attachment; filename="{nombre_archivo}.csv"'
+        return respuesta
+    temporal = tempfile.TemporaryFile(suffix=".parquet")
+    escribir_parquet(hojas_evaluaciones(filtros), temporal, esquema=esquema_evaluaciones())
+    temporal.seek(0)
+    return FileResponse(temporal, as_attachment=True, filename=f"{nombre_archivo}.parquet",
+                        content_type=CONTENT_TYPES["parquet"])
+
+
+# nombre -> (función que arma las hojas, nombre base del archivo descargado)
+EXPORTACIONES = {
+    "estadisticas_alumnos": (hojas_estadisticas_alumnos, "admin_estadisticas_alumnos"),
+    "resultados_globales": (hojas_resultados_globales, "admin_resultados_globales"),
+}
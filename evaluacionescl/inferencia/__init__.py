@@ -0,0 +1,11 @@
+"""
+Capa de inferencia del clasificador BERT (fragmento + respuesta -> tipo de inferencia).
+
+Los módulos de este paquete no dependen de Django salvo que se indique lo
+contrario, para poder usarlos también desde los scripts de entrenamiento.
+"""
+
+CLASS_NAMES = [
+    "asociativa", "elaborativa", "predictiva",
+    "no_inferencia_parafrasis", "no_inferencia_sinsentido"
+]
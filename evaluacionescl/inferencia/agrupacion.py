@@ -0,0 +1,90 @@
+"""
+Lotes agrupados por longitud.
+
+Con padding="longest" cada lote se rellena hasta su par más largo: un solo
+fragmento literario largo en un lote de respuestas cortas obliga a procesar
+casi todo el lote a MAX_LEN, y la mayor parte del cómputo se va en relleno.
+Aquí los índices se reparten en "buckets" de `tamano_bucket` ejemplos, cada
+bucket se ordena por longitud y se corta en lotes; así cada lote junta pares
+de longitud parecida. Para entrenar se baraja el orden de los ejemplos antes
+de armar los buckets y el orden de los lotes al final (cada época es
+distinta); para clasificar se ordena todo por longitud.
+
+Solo depende de NumPy: `MuestreadorPorLongitud` sirve como `batch_sampler`
+de un DataLoader de torch (entrenar_modelo.py) y `predecir_por_longitud`
+envuelve cualquier `predecir(sentences, inferences)` de los backends.
+"""
+
+import numpy as np
+
+BUCKET_LOTES = 50  # lotes por bucket: suficiente para ordenar sin perder aleatoriedad
+
+
+class MuestreadorPorLongitud:
+    """Itera listas de índices (un lote cada una) con longitudes parecidas."""
+
+    def __init__(self, longitudes, tamano_lote, barajar=True, tamano_bucket=None, semilla=None):
+        self.longitudes = np.asarray(longitudes)
+        self.tamano_lote = max(1, int(tamano_lote))
+        # Múltiplo del lote: solo el último bucket puede dejar un lote incompleto
+        lotes_bucket = max(1, (tamano_bucket or self.tamano_lote * BUCKET_LOTES) // self.tamano_lote)
+        self.tamano_bucket = lotes_bucket * self.tamano_lote
+        self.barajar = barajar
+        self._rng = np.random.default_rng(semilla)
+
+    def __len__(self):
+        return -(-len(self.longitudes) // self.tamano_lote)
+
+    def __iter__(self):
+        if not self.barajar:
+            orden = np.argsort(self.longitudes, kind="stable")
+            yield from (orden[i:i + self.tamano_lote].tolist() for i in range(0, len(orden), self.tamano_lote))
+            return
+
+        indices = self._rng.permutation(len(self.longitudes))
+        lotes = []
+        for b in range(0, len(indices), self.tamano_bucket):
+            bucket = indices[b:b + self.tamano_bucket]
+            bucket = bucket[np.argsort(self.longitudes[bucket], kind="stable")]
+            lotes.extend(bucket[i:i + self.tamano_lote] for i in range(0, len(bucket), self.tamano_lote))
+        for n in self._rng.permutation(len(lotes)):
+            yield lotes[n].tolist()
+
+
+def lotes_secuenciales(cantidad, tamano_lote, barajar=True, semilla=None):
+    """Lotes como los de DataLoader(shuffle=barajar): la referencia sin agrupar."""
+    indices = np.random.default_rng(semilla).permutation(cantidad) if barajar else np.arange(cantidad)
+    return [indices[i:i + tamano_lote].tolist() for i in range(0, cantidad, tamano_lote)]
+
+
+def eficiencia_relleno(longitudes, lotes):
+    """
+    Tokens reales / tokens procesados (con relleno) para esa partición en
+    lotes: 1.0 significa que no se procesa nada de relleno.
+    """
+    longitudes = np.asarray(longitudes)
+    reales = procesados = 0
+    for lote in lotes:
+        largos = longitudes[lote]
+        if len(largos):
+            reales += int(largos.sum())
+            procesados += int(largos.max()) * len(largos)
+    return reales / procesados if procesados else 1.0
+
+
+def predecir_por_longitud(predecir, sentences, inferences, tamano_lote=16, longitudes=None):
+    """
+    Clasifica todos los pares en lotes ordenados por longitud y devuelve las
+    probabilidades en el orden original. Sin `longitudes` se usa el largo en
+    caracteres del par, que sigue de cerca al número de tokens.
+    """
+    sentences, inferences = list(sentences), list(inferences)
+    if longitudes is None:
+        longitudes = [len(s) + len(i) for s, i in zip(sentences, inferences)]
+    resultado = None
+    for lote in MuestreadorPorLongitud(longitudes, tamano_lote, barajar=False):
+        probs = np.asarray(predecir([sentences[n] for n in lote], [inferences[n] for n in lote]))
+        if resultado is None:
+            resultado = np.empty((len(sentences), probs.shape[1]), dtype=probs.dtype)
+        resultado[lote] = probs
+    return resultado if resultado is not None else np.zeros((0, 0))
@@ -0,0 +1,101 @@
+"""
+Backends intercambiables para clasificar pares (fragmento, respuesta).
+
+Todos exponen `predecir(sentences, inferences) -> np.ndarray` con una fila de
+probabilidades por par, de modo que `ClasificadorPorLotes` y el servidor de
+inferencia no necesitan saber qué motor hay detrás.
+
+    torch  modelo fp32 de PyTorch (GPU si está disponible)
+    int8   PyTorch con las capas Linear cuantizadas a INT8 (solo CPU)
+    onnx   ONNX Runtime con el proveedor de CPU (requiere `manage.py exportar_onnx`)
+"""
+
+import os
+
+import numpy as np
+
+from .version import version_modelo
+
+
+class BackendTorch:
+    nombre = "torch"
+
+    def __init__(self, model_path):
+        from .modelo import cargar_modelo
+        self.model_path = model_path
+        self.model, self.tokenizer = cargar_modelo(model_path)
+
+    def predecir(self, sentences, inferences):
+        from .modelo import predecir_lote
+        return predecir_lote(self.model, self.tokenizer, sentences, inferences)
+
+
+class BackendInt8(BackendTorch):
+    nombre = "int8"
+
+    def __init__(self, model_path):
+        from .cuantizacion import cargar_modelo_cuantizado
+        self.model_path = model_path
+        self.model, self.tokenizer = cargar_modelo_cuantizado(model_path)
+
+
+class BackendOnnx:
+    nombre = "onnx"
+
+    def __init__(self, model_path, tokenizer=None, ruta_onnx=None):
+        import onnxruntime as ort  # pip install onnxruntime
+        from .exportacion_onnx import ARCHIVO_ONNX
+
+        self.model_path = model_path
+        ruta_onnx = ruta_onnx or os.path.join(model_path, ARCHIVO_ONNX)
+        if not os.path.exists(ruta_onnx):
+            raise FileNotFoundError(f"No existe {ruta_onnx}; ejecuta 'manage.py exportar_onnx'.")
+        if tokenizer is None:
+            from transformers import BertTokenizer
+            tokenizer = BertTokenizer.from_pretrained(model_path)
+        self.tokenizer = tokenizer
+        self.sesion = ort.InferenceSession(ruta_onnx, providers=["CPUExecutionProvider"])
+        self.entradas = [e.name for e in self.sesion.get_inputs()]
+
+    @classmethod
+    def desde_archivo(cls, ruta_onnx, tokenizer):
+        return cls(os.path.dirname(ruta_onnx), tokenizer=tokenizer, ruta_onnx=ruta_onnx)
+
+    def predecir(self, sentences, inferences):
+        inputs = self.tokenizer(
+            list(sentences), list(inferences),
+            return_tensors="np", truncation=True, padding=True
+        )
+        feed = {nombre: inputs[nombre].astype(np.int64) for nombre in self.entradas}
+        logits = self.sesion.run(["logits"], feed)[0]
+        logits = logits - logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+
+BACKENDS = {
+    BackendTorch.nombre: BackendTorch,
+    BackendInt8.nombre: BackendInt8,
+    BackendOnnx.nombre: BackendOnnx,
+}
+
+
+def crear_backend(nombre, model_path):
+    """
+    Instancia el backend pedido y anota en `backend.version` la versión del
+    modelo que cargó. Si ONNX no está disponible (falta el archivo o el
+    paquete onnxruntime) se avisa y se usa PyTorch.
+    """
+    if nombre not in BACKENDS:
+        raise ValueError(f"Backend de inferencia desconocido: {nombre!r} (opciones: {', '.join(BACKENDS)})")
+    # La versión se toma antes de cargar: si el modelo cambia mientras tanto, no se confunde
+    version = version_modelo(model_path)
+    try:
+        backend = BACKENDS[nombre](model_path)
+    except (ImportError, FileNotFoundError) as e:
+        if nombre != BackendOnnx.nombre:
+            raise
+        print(f"ADVERTENCIA: backend ONNX no disponible, se usa PyTorch. Detalles: {e}")
+        backend = BackendTorch(model_path)
+    backend.version = version
+    return backend
@@ -0,0 +1,118 @@
+"""
+Caché persistente de clasificaciones (usa Django y la tabla CacheClasificacion).
+
+La clave es un sha256 del fragmento y la respuesta normalizados más la
+versión del modelo, así que al publicar un modelo nuevo las entradas viejas
+dejan de coincidir y se borran con `invalidar_otras_versiones`. El tamaño
+se limita a INFERENCIA_CACHE_MAX filas desalojando las menos usadas (LRU).
+
+Un acierto no escribe en la base: `ultimo_uso` solo se renueva cuando tiene
+más de INFERENCIA_CACHE_REFRESCO segundos (para el LRU basta esa precisión)
+y los aciertos se acumulan en el proceso y se suman en esa misma escritura.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import unicodedata
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import CacheClasificacion
+
+# Cada cuántas inserciones (por proceso) se revisa el tamaño de la tabla
+REVISAR_CADA = 100
+
+_lock = threading.Lock()
+_inserciones = 0
+_aciertos_pendientes = {}  # clave -> aciertos aún no escritos en la tabla
+
+
+def tamano_maximo():
+    return getattr(settings, "INFERENCIA_CACHE_MAX", 50000)
+
+
+def segundos_refresco():
+    return getattr(settings, "INFERENCIA_CACHE_REFRESCO", 300)
+
+
+def normalizar(texto):
+    """Unicode NFC y espacios compactados. No cambia mayúsculas: el modelo es 'cased'."""
+    texto = unicodedata.normalize("NFC", texto or "")
+    return re.sub(r"\s+", " ", texto).strip()
+
+
+def clave_cache(sentence, inference, version):
+    datos = "\x1f".join((normalizar(sentence), normalizar(inference), version or ""))
+    return hashlib.sha256(datos.encode("utf-8")).hexdigest()
+
+
+def obtener(sentence, inference, version):
+    """Devuelve (etiqueta, probabilidades) si el par ya fue clasificado con esa versión."""
+    if tamano_maximo() <= 0:
+        return None
+    clave = clave_cache(sentence, inference, version)
+    entrada = CacheClasificacion.objects.filter(clave=clave).values_list(
+        "tipo_inferencia", "probabilidades", "ultimo_uso"
+    ).first()
+    if entrada is None:
+        return None
+    with _lock:
+        aciertos = _aciertos_pendientes.get(clave, 0) + 1
+        ahora = timezone.now()
+        renovar = (ahora - entrada[2]).total_seconds() >= segundos_refresco()
+        if renovar:
+            _aciertos_pendientes.pop(clave, None)
+        else:
+            _aciertos_pendientes[clave] = aciertos
+    if renovar:
+        CacheClasificacion.objects.filter(clave=clave).update(
+            ultimo_uso=ahora, aciertos=F("aciertos") + aciertos
+        )
+    return entrada[0], json.loads(entrada[1])
+
+
+def guardar(sentence, inference, version, etiqueta, probs):
+    global _inserciones
+    if tamano_maximo() <= 0:
+        return
+    try:
+        with transaction.atomic():  # savepoint: no romper la transacción de la petición
+            CacheClasificacion.objects.create(
+                clave=clave_cache(sentence, inference, version),
+                version_modelo=version or "",
+                tipo_inferencia=etiqueta,
+                probabilidades=json.dumps([round(float(p), 6) for p in probs]),
+            )
+    except IntegrityError:
+        return  # otra petición guardó el mismo par al mismo tiempo
+
+    with _lock:
+        _inserciones += 1
+        revisar = _inserciones % REVISAR_CADA == 0
+    if revisar:
+        desalojar()
+
+
+def desalojar():
+    """Borra las entradas menos usadas recientemente que excedan el tamaño máximo."""
+    exceso = CacheClasificacion.objects.count() - tamano_maximo()
+    if exceso <= 0:
+        return 0
+    ids = list(
+        CacheClasificacion.objects.order_by("ultimo_uso").values_list("id", flat=True)[:exceso]
+    )
+    CacheClasificacion.objects.filter(id__in=ids).delete()
+    return len(ids)
+
+
+def invalidar_otras_versiones(version):
+    """Elimina las entradas de cualquier versión del modelo distinta de `version`."""
+    borradas, _ = CacheClasificacion.objects.exclude(version_modelo=version or "").delete()
+    with _lock:
+        _aciertos_pendientes.clear()
+    return borradas
@@ -0,0 +1,68 @@
+import socket
+from time import monotonic
+
+import numpy as np
+
+from . import protocolo
+
+
+class ServidorNoDisponible(Exception):
+    """El servidor de inferencia no respondió (caído, ocupado o socket inexistente)."""
+
+
+class ErrorServidor(Exception):
+    """El servidor respondió, pero con un error (p. ej. su lote no terminó a tiempo)."""
+
+
+class ClienteInferencia:
+    """
+    Cliente del servidor de inferencia (ver `servidor.py`).
+
+    Si no se puede conectar deja de intentar durante `pausa_tras_fallo`
+    segundos para que las peticiones no fallen una y otra vez mientras el
+    servidor está caído. Un timeout NO lo marca como caído: solo está
+    ocupado, y mandar a todos los workers al modelo local cargaría el modelo
+    completo en cada uno. Por eso `timeout` debe cubrir la espera máxima del
+    lote en el servidor (INFERENCIA_LOTE_TIMEOUT + la ventana del lote).
+    """
+
+    def __init__(self, ruta_socket, timeout=5.0, pausa_tras_fallo=10.0):
+        self.ruta_socket = ruta_socket
+        self.timeout = timeout
+        self.pausa_tras_fallo = pausa_tras_fallo
+        self._reintentar_en = 0.0
+
+    def disponible(self):
+        return monotonic() >= self._reintentar_en
+
+    def _pedir(self, pedido):
+        if not self.disponible():
+            raise ServidorNoDisponible("Servidor marcado como caído; se reintentará más tarde.")
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(self.ruta_socket)
+                protocolo.enviar(sock, pedido)
+                respuesta = protocolo.recibir(sock)
+        except TimeoutError as e:
+            raise ServidorNoDisponible(f"Sin respuesta en {self.timeout:.0f}s: {e}") from e
+        except (OSError, EOFError, ValueError) as e:
+            self._reintentar_en = monotonic() + self.pausa_tras_fallo
+            raise ServidorNoDisponible(str(e)) from e
+
+        if not respuesta.get("ok"):
+            raise ErrorServidor(respuesta.get("error", "Error desconocido del servidor de inferencia."))
+        return respuesta
+
+    def salud(self):
+        """Devuelve el estado reportado por el servidor (pid, modelo, métricas)."""
+        return self._pedir({"op": "salud"})
+
+    def clasificar(self, sentence, inference):
+        """Devuelve (etiqueta, probabilidades, versión del modelo que respondió)."""
+        respuesta = self._pedir({"op": "clasificar", "sentence": sentence, "inference": inference})
+        return (
+            respuesta["etiqueta"],
+            np.asarray(respuesta["probs"], dtype=np.float32),
+            respuesta.get("version"),
+        )
@@ -0,0 +1,92 @@
+"""
+Modo de inferencia INT8 para CPU.
+
+Las capas Linear del BERT se cuantizan dinámicamente a INT8 (pesos en int8,
+activaciones cuantizadas al vuelo). El resultado se guarda junto al modelo
+como `model_int8.pt`, con la huella del modelo fp32 del que salió, para que
+los workers lo carguen directamente en lugar de re-cuantizar al arrancar.
+"""
+
+import os
+from time import perf_counter
+
+import numpy as np
+import torch
+from transformers import BertConfig, BertTokenizer, BertForSequenceClassification
+
+from .agrupacion import predecir_por_longitud
+from .modelo import predecir_lote
+from .version import version_modelo as huella_modelo
+
+ARCHIVO_INT8 = "model_int8.pt"
+
+
+def cuantizar(model):
+    model.eval()
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def guardar_cuantizado(model_path, model=None):
+    """Cuantiza el modelo fp32 de `model_path` y escribe el artefacto de forma atómica."""
+    if model is None:
+        model = BertForSequenceClassification.from_pretrained(model_path)
+    modelo_int8 = cuantizar(model)
+    destino = os.path.join(model_path, ARCHIVO_INT8)
+    tmp = f"{destino}.{os.getpid()}.tmp"  # varios workers pueden cuantizar a la vez
+    torch.save({"huella": huella_modelo(model_path), "state_dict": modelo_int8.state_dict()}, tmp)
+    os.replace(tmp, destino)
+    return modelo_int8, destino
+
+
+def cargar_modelo_cuantizado(model_path):
+    """
+    Devuelve (modelo INT8, tokenizer). Usa el artefacto guardado si corresponde
+    al modelo fp32 actual; si falta o está desactualizado, lo regenera.
+    """
+    tokenizer = BertTokenizer.from_pretrained(model_path)
+    ruta_int8 = os.path.join(model_path, ARCHIVO_INT8)
+
+    if os.path.exists(ruta_int8):
+        artefacto = torch.load(ruta_int8, map_location="cpu", weights_only=False)
+        if artefacto.get("huella") == huella_modelo(model_path):
+            # Esqueleto sin pesos fp32: solo hace falta la estructura cuantizada
+            esqueleto = BertForSequenceClassification(BertConfig.from_pretrained(model_path))
+            modelo_int8 = cuantizar(esqueleto)
+            modelo_int8.load_state_dict(artefacto["state_dict"])
+            return modelo_int8.eval(), tokenizer
+
+    try:
+        modelo_int8, _ = guardar_cuantizado(model_path)
+    except OSError:
+        # Sin permisos de escritura en la carpeta del modelo: cuantizar solo en memoria
+        modelo_int8 = cuantizar(BertForSequenceClassification.from_pretrained(model_path))
+    return modelo_int8.eval(), tokenizer
+
+
+def comparar(model_fp32, model_int8, tokenizer, pares, lote=16):
+    """
+    Compara ambos modelos sobre una lista de pares (fragmento, respuesta).
+    Devuelve acuerdo de etiquetas, deriva de probabilidades y tiempos.
+    """
+    sentences = [p[0] for p in pares]
+    inferences = [p[1] for p in pares]
+
+    # Lotes agrupados por longitud: el relleno no distorsiona la comparación de tiempos
+    inicio = perf_counter()
+    a = predecir_por_longitud(lambda s, i: predecir_lote(model_fp32, tokenizer, s, i), sentences, inferences, lote)
+    t_fp32 = perf_counter() - inicio
+
+    inicio = perf_counter()
+    b = predecir_por_longitud(lambda s, i: predecir_lote(model_int8, tokenizer, s, i), sentences, inferences, lote)
+    t_int8 = perf_counter() - inicio
+
+    deriva = np.abs(a - b).max(axis=1)
+    return {
+        "pares": len(pares),
+        "acuerdo_etiquetas": float((a.argmax(axis=1) == b.argmax(axis=1)).mean()),
+        "deriva_media": float(deriva.mean()),
+        "deriva_p95": float(np.percentile(deriva, 95)),
+        "deriva_max": float(deriva.max()),
+        "segundos_fp32": t_fp32,
+        "segundos_int8": t_int8,
+    }
@@ -0,0 +1,97 @@
+"""
+Exportación del clasificador a ONNX (longitud de secuencia y lote dinámicos).
+
+El archivo se escribe primero como `model.onnx.tmp`; solo se activa (se
+renombra a `model.onnx`) si sus probabilidades coinciden con las de PyTorch
+sobre una muestra de pares. Este módulo no depende de Django para poder
+llamarlo desde `entrenar_modelo.guardar_modelo`.
+"""
+
+import os
+
+import numpy as np
+import torch
+
+from .agrupacion import predecir_por_longitud
+from .modelo import predecir_lote
+
+ARCHIVO_ONNX = "model.onnx"
+ENTRADAS = ["input_ids", "attention_mask", "token_type_ids"]
+
+# Pares de respaldo para la paridad si no se dispone del dataset
+PARES_PARIDAD = [
+    ("El perro corrió por el parque.", "El perro estaba feliz."),
+    ("La mañana de febrero en que Beatriz Viterbo murió, las carteleras de la plaza habían renovado un aviso.",
+     "El mundo sigue su curso sin detenerse por ella."),
+    ("El cambio climático afecta a los océanos y a la agricultura de muchos países.",
+     "Probablemente habrá menos alimentos en el futuro si no se reducen las emisiones."),
+    ("Don Quijote confundió los molinos de viento con gigantes.", "asdf qwerty"),
+]
+
+
+class _SoloLogits(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask, token_type_ids):
+        return self.model(
+            input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids
+        ).logits
+
+
+def exportar_onnx(model, tokenizer, destino, opset=14):
+    """Exporta el modelo (en CPU y modo eval) a `destino`."""
+    model = model.to("cpu").eval()
+    ejemplo = tokenizer("texto de ejemplo", "respuesta de ejemplo", return_tensors="pt")
+    dinamicos = {nombre: {0: "lote", 1: "secuencia"} for nombre in ENTRADAS}
+    dinamicos["logits"] = {0: "lote"}
+    with torch.no_grad():
+        torch.onnx.export(
+            _SoloLogits(model),
+            tuple(ejemplo[nombre] for nombre in ENTRADAS),
+            destino,
+            input_names=ENTRADAS,
+            output_names=["logits"],
+            dynamic_axes=dinamicos,
+            opset_version=opset,
+        )
+    return destino
+
+
+def verificar_paridad(model, tokenizer, ruta_onnx, pares=None, tolerancia=1e-3, lote=8):
+    """
+    Compara probabilidades PyTorch vs ONNX Runtime.
+    Devuelve (ok, deriva_max, acuerdo_etiquetas).
+    """
+    from .backends import BackendOnnx
+
+    pares = list(pares or PARES_PARIDAD)
+    onnx = BackendOnnx.desde_archivo(ruta_onnx, tokenizer)
+    sentences = [p[0] for p in pares]
+    inferences = [p[1] for p in pares]
+    a = predecir_por_longitud(lambda s, i: predecir_lote(model, tokenizer, s, i), sentences, inferences, lote)
+    b = predecir_por_longitud(onnx.predecir, sentences, inferences, lote)
+
+    deriva = float(np.abs(a - b).max())
+    acuerdo = float((a.argmax(axis=1) == b.argmax(axis=1)).mean())
+    return deriva <= tolerancia and acuerdo == 1.0, deriva, acuerdo
+
+
+def exportar_y_activar(model, tokenizer, carpeta, pares=None, tolerancia=1e-3):
+    """
+    Exporta a `carpeta/model.onnx.tmp`, verifica paridad y solo entonces lo activa.
+    Si la paridad falla se borra el temporal y se conserva el `model.onnx` anterior.
+    Devuelve (activado, deriva_max, acuerdo_etiquetas).
+    """
+    destino = os.path.join(carpeta, ARCHIVO_ONNX)
+    tmp = destino + ".tmp"
+    try:
+        exportar_onnx(model, tokenizer, tmp)
+        ok, deriva, acuerdo = verificar_paridad(model, tokenizer, tmp, pares, tolerancia)
+        if ok:
+            os.replace(tmp, destino)
+        return ok, deriva, acuerdo
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
@@ -0,0 +1,154 @@
+"""
+Micro-batching de inferencias.
+
+Cuando muchos alumnos envían su respuesta al mismo tiempo, cada petición
+deja su par (fragmento, respuesta) en una cola. Un hilo de fondo agrupa los
+pedidos que llegan dentro de una ventana corta (hasta `max_lote` pedidos o
+`ventana_ms` milisegundos), los clasifica en UNA sola pasada del modelo y
+entrega a cada petición su etiqueta y probabilidades.
+"""
+
+import os
+import queue
+import threading
+from collections import Counter
+from time import monotonic
+
+from . import CLASS_NAMES
+
+
+class _Pedido:
+    __slots__ = ("sentence", "inference", "creado", "listo", "resultado", "error")
+
+    def __init__(self, sentence, inference):
+        self.sentence = sentence
+        self.inference = inference
+        self.creado = monotonic()
+        self.listo = threading.Event()
+        self.resultado = None
+        self.error = None
+
+
+class ClasificadorPorLotes:
+    """
+    Agrupa pedidos concurrentes y los clasifica por lotes.
+
+    `predecir` recibe dos listas (fragmentos, respuestas) y devuelve un arreglo
+    de probabilidades con una fila por par.
+    """
+
+    def __init__(self, predecir, max_lote=8, ventana_ms=10, timeout=30):
+        self._predecir = predecir
+        self.max_lote = max(1, int(max_lote))
+        self.ventana = max(0, float(ventana_ms)) / 1000.0
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._pid = None
+        self._cola = None
+        self._hilo = None
+        self._reiniciar_metricas()
+
+    # -----------------------
+    # API pública
+    # -----------------------
+    def clasificar(self, sentence, inference):
+        """Encola el par, espera su lote y devuelve (etiqueta, probabilidades)."""
+        pedido = _Pedido(sentence, inference)
+        cola = self._asegurar_hilo()
+        cola.put(pedido)
+        with self._lock:
+            self._profundidad_max = max(self._profundidad_max, cola.qsize())
+
+        if not pedido.listo.wait(self.timeout):
+            raise TimeoutError("La inferencia por lotes no respondió a tiempo.")
+        if pedido.error is not None:
+            raise pedido.error
+        return pedido.resultado
+
+    def metricas(self):
+        """Foto de la profundidad de la cola y del llenado de los lotes."""
+        with self._lock:
+            lotes = self._lotes
+            return {
+                "profundidad_cola": self._cola.qsize() if self._cola else 0,
+                "profundidad_max": self._profundidad_max,
+                "max_lote": self.max_lote,
+                "ventana_ms": self.ventana * 1000,
+                "lotes_procesados": lotes,
+                "pedidos_procesados": self._pedidos,
+                "tamano_promedio_lote": (self._pedidos / lotes) if lotes else 0,
+                "llenado_promedio": (self._pedidos / (lotes * self.max_lote)) if lotes else 0,
+                "espera_promedio_ms": (self._espera_total / self._pedidos * 1000) if self._pedidos else 0,
+                "inferencia_promedio_ms": (self._inferencia_total / lotes * 1000) if lotes else 0,
+                "histograma_lotes": dict(sorted(self._histograma.items())),
+                "errores": self._errores,
+            }
+
+    # -----------------------
+    # Internos
+    # -----------------------
+    def _reiniciar_metricas(self):
+        self._lotes = 0
+        self._pedidos = 0
+        self._errores = 0
+        self._profundidad_max = 0
+        self._espera_total = 0.0
+        self._inferencia_total = 0.0
+        self._histograma = Counter()
+
+    def _asegurar_hilo(self):
+        """Arranca el hilo de fondo en el primer uso (y de nuevo tras un fork)."""
+        pid = os.getpid()
+        if self._pid == pid and self._hilo is not None and self._hilo.is_alive():
+            return self._cola
+        with self._lock:
+            if self._pid != pid or self._hilo is None or not self._hilo.is_alive():
+                self._pid = pid
+                self._cola = queue.Queue()
+                self._hilo = threading.Thread(
+                    target=self._bucle, args=(self._cola,),
+                    name="clasificador-lotes", daemon=True
+                )
+                self._hilo.start()
+            return self._cola
+
+    def _bucle(self, cola):
+        while True:
+            lote = [cola.get()]
+            limite = monotonic() + self.ventana
+            while len(lote) < self.max_lote:
+                restante = limite - monotonic()
+                try:
+                    if restante > 0:
+                        lote.append(cola.get(timeout=restante))
+                    else:
+                        lote.append(cola.get_nowait())
+                except queue.Empty:
+                    break
+            self._procesar(lote)
+
+    def _procesar(self, lote):
+        inicio = monotonic()
+        try:
+            probs = self._predecir(
+                [p.sentence for p in lote],
+                [p.inference for p in lote],
+            )
+            for pedido, fila in zip(lote, probs):
+                pedido.resultado = (CLASS_NAMES[fila.argmax()], fila)
+        except Exception as e:
+            for pedido in lote:
+                pedido.error = e
+            with self._lock:
+                self._errores += 1
+        fin = monotonic()
+
+        with self._lock:
+            self._lotes += 1
+            self._pedidos += len(lote)
+            self._histograma[len(lote)] += 1
+            self._inferencia_total += fin - inicio
+            self._espera_total += sum(inicio - p.creado for p in lote)
+
+        for pedido in lote:
+            pedido.listo.set()
@@ -0,0 +1,30 @@
+import torch
+from torch.nn.functional import softmax
+from transformers import BertTokenizer, BertForSequenceClassification
+
+
+def cargar_modelo(model_path):
+    """Carga modelo y tokenizer desde la carpeta indicada (GPU si está disponible)."""
+    model = BertForSequenceClassification.from_pretrained(model_path)
+    tokenizer = BertTokenizer.from_pretrained(model_path)
+    if torch.cuda.is_available():
+        model.to('cuda')
+    model.eval()
+    return model, tokenizer
+
+
+def predecir_lote(model, tokenizer, sentences, inferences):
+    """
+    Clasifica varios pares (fragmento, respuesta) en una sola pasada.
+    Los pares se rellenan (padding) a la longitud del más largo del lote.
+    Devuelve un arreglo numpy de probabilidades con forma (n, len(CLASS_NAMES)).
+    """
+    with torch.no_grad():
+        inputs = tokenizer(
+            list(sentences), list(inferences),
+            return_tensors="pt", truncation=True, padding=True
+        )
+        device = next(model.parameters()).device
+        inputs = {k: v.to(device) for k, v in inputs.items()}
+        logits = model(**inputs).logits
+        return softmax(logits, dim=1).cpu().numpy()
@@ -0,0 +1,43 @@
+"""
+Protocolo del servidor de inferencia sobre un socket Unix.
+
+Cada mensaje es un encabezado de 4 bytes (longitud, big-endian) seguido de un
+objeto JSON en UTF-8. Pedidos:
+
+    {"op": "salud"}
+    {"op": "clasificar", "sentence": "...", "inference": "..."}
+
+Respuestas:
+
+    {"ok": true, ...}
+    {"ok": false, "error": "..."}
+"""
+
+import json
+import struct
+
+ENCABEZADO = struct.Struct(">I")
+MAX_MENSAJE = 1024 * 1024  # 1 MB: un fragmento + respuesta nunca se acerca
+
+
+def enviar(sock, obj):
+    datos = json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    sock.sendall(ENCABEZADO.pack(len(datos)) + datos)
+
+
+def _leer_exacto(sock, n):
+    partes, faltan = [], n
+    while faltan:
+        parte = sock.recv(faltan)
+        if not parte:
+            raise EOFError("Conexión cerrada por el otro extremo.")
+        partes.append(parte)
+        faltan -= len(parte)
+    return b"".join(partes)
+
+
+def recibir(sock):
+    (n,) = ENCABEZADO.unpack(_leer_exacto(sock, ENCABEZADO.size))
+    if n > MAX_MENSAJE:
+        raise ValueError(f"Mensaje demasiado grande ({n} bytes).")
+    return json.loads(_leer_exacto(sock, n).decode("utf-8"))
@@ -0,0 +1,95 @@
+"""
+Recarga en caliente del modelo.
+
+`ModeloRecargable` envuelve el backend activo. Cada cierto tiempo compara la
+versión publicada en disco (archivo VERSION que escribe
+`entrenar_modelo.guardar_modelo`) con la del backend en memoria; si cambió,
+carga el modelo nuevo en un hilo de fondo y, solo cuando está completo, lo
+intercambia por el anterior. Los lotes en curso terminan con el backend que
+tomaron al empezar, así que ninguna petición ve un modelo a medio cargar.
+"""
+
+import threading
+from time import monotonic
+
+from .version import version_modelo
+
+
+class ModeloRecargable:
+    def __init__(self, crear_backend, model_path, intervalo=5.0):
+        self._crear_backend = crear_backend  # callable sin argumentos -> backend
+        self.model_path = model_path
+        self.intervalo = intervalo
+        self._actual = None
+        self._lock = threading.Lock()
+        self._recargando = False
+        self._proxima_revision = 0.0
+        self.recargas = 0
+        self.ultimo_error = None
+
+    @property
+    def cargado(self):
+        return self._actual is not None
+
+    @property
+    def version(self):
+        return self._actual.version if self._actual is not None else None
+
+    @property
+    def nombre(self):
+        return self._actual.nombre if self._actual is not None else None
+
+    def obtener(self):
+        """Backend activo; la primera vez se carga de forma bloqueante."""
+        actual = self._actual
+        if actual is None:
+            with self._lock:
+                if self._actual is None:
+                    self._actual = self._crear_backend()
+                actual = self._actual
+        return actual
+
+    def predecir(self, sentences, inferences):
+        return self.obtener().predecir(sentences, inferences)
+
+    def revisar(self):
+        """Si hay una versión nueva publicada, dispara su carga en segundo plano."""
+        if self.intervalo <= 0 or self._actual is None or self._recargando:
+            return
+        ahora = monotonic()
+        if ahora < self._proxima_revision:
+            return
+        self._proxima_revision = ahora + self.intervalo
+
+        publicada = version_modelo(self.model_path)
+        # None: la carpeta se está reemplazando en este momento; se revisa la próxima vez
+        if publicada is None or publicada == self._actual.version:
+            return
+        with self._lock:
+            if self._recargando:
+                return
+            self._recargando = True
+        threading.Thread(target=self._recargar, name="recarga-modelo", daemon=True).start()
+
+    def _recargar(self):
+        try:
+            nuevo = self._crear_backend()
+            with self._lock:
+                anterior, self._actual = self._actual, nuevo
+            self.recargas += 1
+            self.ultimo_error = None
+            print(f"Modelo recargado: {anterior.version} -> {nuevo.version}")
+        except Exception as e:
+            self.ultimo_error = str(e)
+            print(f"ADVERTENCIA: no se pudo recargar el modelo, se sigue con el anterior: {e}")
+        finally:
+            self._recargando = False
+
+    def revisar_periodicamente(self):
+        """Hilo que revisa la versión sin depender de que lleguen peticiones (servidor)."""
+        def _bucle():
+            evento = threading.Event()
+            while not evento.wait(self.intervalo):
+                self.revisar()
+        if self.intervalo > 0:
+            threading.Thread(target=_bucle, name="revision-modelo", daemon=True).start()
@@ -0,0 +1,134 @@
+"""
+Punto de entrada de Django para clasificar inferencias.
+
+Si `INFERENCIA_SOCKET` está configurado, se consulta al servidor de inferencia
+(`manage.py servidor_inferencia`) y el worker no carga el modelo. Si el
+servidor no responde o responde con un error, se clasifica en el propio proceso: el modelo local se
+carga la primera vez que hace falta y se recarga en caliente cuando se
+publica uno nuevo (`recarga.py`). Antes de llamar a cualquiera de los dos
+se consulta la caché persistente de clasificaciones (`cache.py`).
+"""
+
+from time import monotonic
+
+import numpy as np
+from django.conf import settings
+
+from . import cache
+from ..recursos import registro
+from .cliente import ClienteInferencia, ErrorServidor, ServidorNoDisponible
+from .lotes import ClasificadorPorLotes
+from .recarga import ModeloRecargable
+from .version import version_modelo
+
+_ultima_version = None
+_proxima_lectura = 0.0
+
+
+def crear_backend_configurado():
+    """Instancia el backend elegido en INFERENCIA_BACKEND (torch, int8 u onnx)."""
+    from .backends import crear_backend
+    try:
+        return crear_backend(
+            getattr(settings, "INFERENCIA_BACKEND", "torch"),
+            getattr(settings, "INFERENCIA_MODELO_DIR", "trained_model"),
+        )
+    except Exception as e:
+        print(f" No se pudo cargar el modelo o el tokenizer. Detalles: {e}")
+        raise
+
+
+# Backend local: se carga al primer uso y se recarga en caliente al publicarse un modelo nuevo
+modelo_local = ModeloRecargable(
+    crear_backend_configurado,
+    getattr(settings, "INFERENCIA_MODELO_DIR", "trained_model"),
+    intervalo=getattr(settings, "INFERENCIA_RECARGA_INTERVALO", 5),
+)
+
+# Las peticiones concurrentes de guardar_respuesta se agrupan en lotes
+clasificador_lotes = ClasificadorPorLotes(
+    modelo_local.predecir,
+    max_lote=getattr(settings, "INFERENCIA_LOTE_MAX", 8),
+    ventana_ms=getattr(settings, "INFERENCIA_LOTE_VENTANA_MS", 10),
+    timeout=getattr(settings, "INFERENCIA_LOTE_TIMEOUT", 30),
+)
+
+
+def timeout_cliente():
+    """INFERENCIA_TIMEOUT, pero nunca menos que lo que el servidor puede tardar en responder un lote."""
+    minimo = (getattr(settings, "INFERENCIA_LOTE_TIMEOUT", 30)
+              + getattr(settings, "INFERENCIA_LOTE_VENTANA_MS", 10) / 1000 + 1)
+    return max(getattr(settings, "INFERENCIA_TIMEOUT", minimo), minimo)
+
+
+_ruta_socket = getattr(settings, "INFERENCIA_SOCKET", "")
+cliente = ClienteInferencia(_ruta_socket, timeout=timeout_cliente()) if _ruta_socket else None
+
+
+def _clasificar_con_modelo(sentence, inference):
+    """(etiqueta, probabilidades, versión del modelo que respondió): servidor o modelo local."""
+    if cliente is not None and cliente.disponible():
+        try:
+            return cliente.clasificar(sentence, inference)
+        except ServidorNoDisponible as e:
+            print(f"ADVERTENCIA: servidor de inferencia no disponible, se usa el modelo local: {e}")
+        except ErrorServidor as e:
+            print(f"ADVERTENCIA: el servidor de inferencia respondió con error, se usa el modelo local: {e}")
+    modelo_local.revisar()
+    # La versión se lee ANTES de clasificar: si el modelo se cambia durante el lote,
+    # el resultado (del modelo nuevo) queda marcado como viejo y no se guarda en caché.
+    version = registro.obtener("clasificador").obtener().version
+    etiqueta, probs = clasificador_lotes.clasificar(sentence, inference)
+    return etiqueta, probs, version
+
+
+def version_publicada():
+    """
+    Versión del modelo publicado en disco, releída a lo sumo cada
+    INFERENCIA_RECARGA_INTERVALO segundos. La primera vez que un proceso ve una
+    versión nueva borra de la caché las clasificaciones de versiones anteriores.
+    """
+    global _ultima_version, _proxima_lectura
+    ahora = monotonic()
+    if ahora < _proxima_lectura:
+        return _ultima_version
+    _proxima_lectura = ahora + getattr(settings, "INFERENCIA_RECARGA_INTERVALO", 5)
+    version = version_modelo(getattr(settings, "INFERENCIA_MODELO_DIR", "trained_model"))
+    if version != _ultima_version:
+        _ultima_version = version
+        if version is not None:
+            cache.invalidar_otras_versiones(version)
+    return version
+
+
+def clasificar(sentence, inference):
+    """Devuelve (etiqueta, probabilidades), consultando primero la caché de clasificaciones."""
+    version = version_publicada()
+    if version is not None:
+        en_cache = cache.obtener(sentence, inference, version)
+        if en_cache is not None:
+            etiqueta, probs = en_cache
+            return etiqueta, np.asarray(probs, dtype=np.float32)
+
+    etiqueta, probs, version_usada = _clasificar_con_modelo(sentence, inference)
+    # Solo se guarda lo que respondió el modelo publicado (no uno viejo aún en memoria)
+    if version is not None and version_usada == version:
+        cache.guardar(sentence, inference, version, etiqueta, probs)
+    return etiqueta, probs
+
+
+def metricas():
+    """Estado del servidor remoto (si está configurado) y del clasificador local."""
+    datos = {
+        "local": clasificador_lotes.metricas(),
+        "backend_local": modelo_local.nombre,
+        "version_local": modelo_local.version,
+        "recargas": modelo_local.recargas,
+        "error_recarga": modelo_local.ultimo_error,
+    }
+    if cliente is not None:
+        try:
+            datos["servidor"] = cliente.salud()
+        except Exception as e:
+            datos["servidor"] = {"ok": False, "error": str(e)}
+    return datos
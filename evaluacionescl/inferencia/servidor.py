@@ -0,0 +1,77 @@
+"""
+Servidor de inferencia: un solo proceso mantiene el modelo en memoria y los
+workers de Django le consultan por un socket Unix (ver `protocolo.py`).
+
+Los pedidos de todas las conexiones pasan por el mismo `ClasificadorPorLotes`,
+así que los envíos simultáneos de distintos workers se agrupan en lotes.
+"""
+
+import os
+import socketserver
+
+from . import protocolo
+
+
+class _Manejador(socketserver.BaseRequestHandler):
+    def handle(self):
+        # Una conexión puede mandar varios pedidos seguidos
+        while True:
+            try:
+                pedido = protocolo.recibir(self.request)
+            except (EOFError, ConnectionError):
+                return
+            except ValueError as e:
+                protocolo.enviar(self.request, {"ok": False, "error": str(e)})
+                return
+            respuesta = self.server.atender(pedido)
+            try:
+                protocolo.enviar(self.request, respuesta)
+            except ConnectionError:
+                return  # el cliente se cansó de esperar (timeout) y cerró la conexión
+
+
+class ServidorInferencia(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, ruta_socket, clasificador, info=None, version=None):
+        self.ruta_socket = ruta_socket
+        self.clasificador = clasificador
+        self.info = info or {}
+        self.version = version or (lambda: None)  # versión del modelo activo
+        if os.path.exists(ruta_socket):
+            os.unlink(ruta_socket)  # socket huérfano de una ejecución anterior
+        super().__init__(ruta_socket, _Manejador)
+        os.chmod(ruta_socket, 0o660)
+
+    def atender(self, pedido):
+        op = pedido.get("op")
+        try:
+            if op == "salud":
+                return {
+                    "ok": True,
+                    "pid": os.getpid(),
+                    **self.info,
+                    "version": self.version(),
+                    "metricas": self.clasificador.metricas(),
+                }
+            if op == "clasificar":
+                version = self.version()  # antes de clasificar, igual que en servicio.py
+                etiqueta, probs = self.clasificador.clasificar(
+                    str(pedido.get("sentence", "")), str(pedido.get("inference", ""))
+                )
+                return {
+                    "ok": True,
+                    "etiqueta": etiqueta,
+                    "probs": [round(float(p), 6) for p in probs],
+                    "version": version,
+                }
+            return {"ok": False, "error": f"Operación desconocida: {op!r}"}
+        except Exception as e:
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.ruta_socket)
+        except OSError:
+            pass
@@ -0,0 +1,25 @@
+import os
+
+ARCHIVO_VERSION = "VERSION"  # lo escribe entrenar_modelo.guardar_modelo
+PESOS = ("model.safetensors", "pytorch_model.bin")
+
+
+def version_modelo(model_path):
+    """
+    Identifica la versión publicada del modelo en `model_path`: el contenido
+    del archivo VERSION o, si no existe (modelos anteriores), el tamaño y la
+    fecha de modificación de sus pesos. Devuelve None si no hay modelo.
+    """
+    try:
+        with open(os.path.join(model_path, ARCHIVO_VERSION), "r", encoding="utf-8") as f:
+            contenido = f.read().strip()
+        if contenido:
+            return f"{ARCHIVO_VERSION}:{contenido}"
+    except OSError:
+        pass
+    for nombre in PESOS:
+        ruta = os.path.join(model_path, nombre)
+        if os.path.exists(ruta):
+            st = os.stat(ruta)
+            return f"{nombre}:{st.st_size}:{st.st_mtime_ns}"
+    return None
@@ -0,0 +1,94 @@
+import csv
+import os
+import random
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from evaluacionescl.dataset_tokenizado import tokenizar_par
+from evaluacionescl.inferencia.agrupacion import MuestreadorPorLongitud, eficiencia_relleno, lotes_secuenciales
+
+
+class Command(BaseCommand):
+    help = ('Compares padding efficiency and model throughput (real tokens/s) of random batches, as '
+            'DataLoader(shuffle=True) builds them, against length-bucketed and length-sorted batches.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modelo', default=getattr(settings, 'INFERENCIA_MODELO_DIR', 'trained_model'),
+                            help='Model folder (defaults to settings.INFERENCIA_MODELO_DIR).')
+        parser.add_argument('--dataset', default=os.path.join(settings.BASE_DIR, 'dataset_principal.csv'),
+                            help='CSV with sentence,inference columns.')
+        parser.add_argument('--lote', type=int, default=8, help='Batch size (default: 8).')
+        parser.add_argument('--limite', type=int, default=0,
+                            help='Use a random sample of N rows (0 = whole dataset).')
+        parser.add_argument('--max-len', type=int, default=512, help='MAX_LEN used for training (default: 512).')
+        parser.add_argument('--resp-max', type=int, default=256, help='RESP_MAX used for training (default: 256).')
+        parser.add_argument('--solo-relleno', action='store_true',
+                            help='Only report padding efficiency (no forward passes, torch not needed).')
+
+    def handle(self, *args, **options):
+        from transformers import BertTokenizer
+
+        if not os.path.exists(options['dataset']):
+            raise CommandError(f"Dataset '{options['dataset']}' not found.")
+        with open(options['dataset'], 'r', encoding='utf-8', newline='') as f:
+            pares = [(row['sentence'] or '', row['inference'] or '') for row in csv.DictReader(f)]
+        if options['limite'] and options['limite'] < len(pares):
+            pares = random.Random(0).sample(pares, options['limite'])
+        if not pares:
+            raise CommandError('The dataset has no rows.')
+
+        tokenizer = BertTokenizer.from_pretrained(options['modelo'])
+        ids = [tokenizar_par(tokenizer, s, i, options['max_len'], options['resp_max']) for s, i in pares]
+        longitudes = [len(par[0]) for par in ids]
+        lote = max(1, options['lote'])
+
+        modos = [
+            ('random (before)', lotes_secuenciales(len(ids), lote, semilla=0)),
+            ('length-bucketed (training)', list(MuestreadorPorLongitud(longitudes, lote, semilla=0))),
+            ('length-sorted (scoring)', list(MuestreadorPorLongitud(longitudes, lote, barajar=False))),
+        ]
+
+        model = None
+        if not options['solo_relleno']:
+            try:
+                import torch
+                from transformers import BertForSequenceClassification
+            except ImportError:
+                self.stdout.write(self.style.WARNING('torch is not installed: reporting padding only.'))
+            else:
+                model = BertForSequenceClassification.from_pretrained(options['modelo']).eval()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'--- Batching benchmark: {len(ids)} pairs, batch {lote}, '
+            f'{sum(longitudes) / len(longitudes):.0f} tokens/pair on average (max {max(longitudes)}) ---'
+        ))
+        self.stdout.write(f"{'mode':<28} {'padding eff.':>12} {'padded tokens':>14} {'seconds':>9} {'tokens/s':>10}")
+        for nombre, lotes in modos:
+            eficiencia = eficiencia_relleno(longitudes, lotes)
+            procesados = round(sum(longitudes) / eficiencia)
+            segundos = tokens_s = ''
+            if model is not None:
+                t = self.medir(torch, model, tokenizer.pad_token_id, ids, lotes)
+                segundos, tokens_s = f'{t:.1f}', f'{sum(longitudes) / t:.0f}'
+            self.stdout.write(f'{nombre:<28} {eficiencia * 100:>11.1f}% {procesados:>14} {segundos:>9} {tokens_s:>10}')
+
+        self.stdout.write(self.style.SUCCESS('--- Benchmark finished ---'))
+
+    def medir(self, torch, model, pad_id, ids, lotes):
+        """Seconds for one no_grad forward pass over every batch, each padded to its longest pair."""
+        inicio = perf_counter()
+        with torch.no_grad():
+            for lote in lotes:
+                largo = max(len(ids[n][0]) for n in lote)
+                input_ids = torch.full((len(lote), largo), pad_id, dtype=torch.long)
+                token_type_ids = torch.zeros((len(lote), largo), dtype=torch.long)
+                attention_mask = torch.zeros((len(lote), largo), dtype=torch.long)
+                for fila, n in enumerate(lote):
+                    k = len(ids[n][0])
+                    input_ids[fila, :k] = torch.tensor(ids[n][0])
+                    token_type_ids[fila, :k] = torch.tensor(ids[n][1])
+                    attention_mask[fila, :k] = 1
+                model(input_ids=input_ids, token_type_ids=token_type_ids, attention_mask=attention_mask)
+        return perf_counter() - inicio
@@ -0,0 +1,96 @@
+import statistics
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+
+class Command(BaseCommand):
+    help = ('Benchmarks request latency through the full WSGI stack (middleware, session, view) '
+            'opening a database connection per request vs. reusing a persistent one (CONN_MAX_AGE).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--peticiones', type=int, default=200,
+                            help='Requests per mode (default: 200).')
+        parser.add_argument('--url', default='/admin_resultados/',
+                            help='Path to request, with an admin session (default: /admin_resultados/).')
+        parser.add_argument('--max-edad', type=int, default=60,
+                            help='CONN_MAX_AGE used for the persistent modes (default: 60).')
+
+    def handle(self, *args, **options):
+        peticiones = max(1, options['peticiones'])
+        sesion = SessionStore()
+        sesion['admin_id'] = 0
+        sesion.create()
+
+        environ = RequestFactory()._base_environ(
+            PATH_INFO=options['url'],
+            REQUEST_METHOD='GET',
+            HTTP_COOKIE=f'{settings.SESSION_COOKIE_NAME}={sesion.session_key}',
+        )
+        handler = WSGIHandler()
+        modos = [
+            ('new connection per request', 0, False),
+            ('persistent (CONN_MAX_AGE)', options['max_edad'], False),
+            ('persistent + health checks', options['max_edad'], True),
+        ]
+        original = {k: connection.settings_dict[k] for k in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS')}
+
+        self.stdout.write(self.style.SUCCESS(
+            f'--- Connection benchmark: {peticiones} x GET {options["url"]} ({connection.vendor}) ---'
+        ))
+        self.stdout.write(f"{'mode':<30} {'connections':>11} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                for nombre, max_edad, health_checks in modos:
+                    tiempos, conexiones = self.medir(handler, environ, peticiones, max_edad, health_checks)
+                    tiempos.sort()
+                    p95 = tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))]
+                    self.stdout.write(
+                        f'{nombre:<30} {conexiones:>11} {statistics.mean(tiempos):>9.2f} '
+                        f'{statistics.median(tiempos):>9.2f} {p95:>9.2f}'
+                    )
+        finally:
+            connection.close()
+            connection.settings_dict.update(original)
+            sesion.delete()
+
+        self.stdout.write(self.style.SUCCESS('--- Benchmark finished ---'))
+
+    def medir(self, handler, environ, peticiones, max_edad, health_checks):
+        # La conexión toma CONN_MAX_AGE y CONN_HEALTH_CHECKS al abrirse
+        connection.close()
+        connection.settings_dict['CONN_MAX_AGE'] = max_edad
+        connection.settings_dict['CONN_HEALTH_CHECKS'] = health_checks
+
+        abiertas = []
+
+        def contar(sender, connection, **kwargs):
+            abiertas.append(connection.alias)
+
+        def peticion():
+            estado = []
+            respuesta = handler(dict(environ), lambda status, headers: estado.append(status))
+            b''.join(respuesta)
+            # Como el servidor WSGI: cerrar la respuesta dispara request_finished
+            respuesta.close()
+            if not estado[0].startswith(('2', '3')):
+                raise RuntimeError(f'{environ["PATH_INFO"]} answered {estado[0]}')
+
+        peticion()  # calentamiento (plantillas, URLconf)
+        connection_created.connect(contar)
+        try:
+            tiempos = []
+            for _ in range(peticiones):
+                inicio = perf_counter()
+                peticion()
+                tiempos.append((perf_counter() - inicio) * 1000)
+        finally:
+            connection_created.disconnect(contar)
+        return tiempos, len(abiertas)
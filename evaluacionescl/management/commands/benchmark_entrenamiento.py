@@ -0,0 +1,165 @@
+import csv
+import gc
+import multiprocessing
+import os
+import queue
+import random
+import statistics
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+VARIANTES = [
+    ('previous: stacked mean + gc', 'anterior', True),
+    ('accumulated', 'acumulado', False),
+    ('accumulated + gc (opt-in)', 'acumulado', True),
+]
+
+
+def _rss_mb(campo):
+    """VmRSS or VmHWM (peak) of this process in MB, from /proc/self/status (Linux only)."""
+    try:
+        with open('/proc/self/status') as f:
+            for linea in f:
+                if linea.startswith(campo + ':'):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reiniciar_pico():
+    """Resets VmHWM so the peak only covers the training steps (Linux >= 4.0)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def paso_anterior(em, torch, model, batch, device):
+    """The previous loop: every micro-batch graph stays alive until backward of the stacked mean."""
+    labels, losses = batch['label'], []
+    for start in range(0, len(labels), em.MICRO_BATCH):
+        end = min(start + em.MICRO_BATCH, len(labels))
+        outputs = model(**em.submatriz(batch, start, end, device), labels=labels[start:end].to(device))
+        losses.append(outputs.loss)
+        del outputs
+        gc.collect()
+    loss = torch.stack(losses).mean()
+    loss.backward()
+    return loss.item()
+
+
+def _medir(opciones, bucle, recolectar, cola):
+    """Runs in a fresh process so each loop's peak RSS is its own."""
+    try:
+        os.environ['BATCH_SIZE'] = str(opciones['lote'])
+        os.environ['MICRO_BATCH'] = str(opciones['micro_lote'])
+        import torch
+        from transformers import BertTokenizer, BertForSequenceClassification
+        import entrenar_modelo as em
+        from evaluacionescl.dataset_tokenizado import tokenizar_par
+        from evaluacionescl.inferencia.agrupacion import lotes_secuenciales
+
+        torch.manual_seed(0)
+        tokenizer = BertTokenizer.from_pretrained(opciones['modelo'])
+        model = BertForSequenceClassification.from_pretrained(opciones['modelo'], num_labels=em.NUM_LABELS)
+        device = torch.device('cpu')
+        model.to(device).train()
+        optimizer = torch.optim.AdamW(model.parameters(), lr=em.LEARNING_RATE)
+
+        items = []
+        for sentence, inference, label in opciones['pares']:
+            ids, tipos = tokenizar_par(tokenizer, sentence, inference, em.MAX_LEN, em.RESP_MAX)
+            items.append({'input_ids': torch.tensor(ids), 'token_type_ids': torch.tensor(tipos),
+                          'label': torch.tensor(label)})
+        lotes = [em.rellenar_lote([items[n] for n in lote], tokenizer.pad_token_id)
+                 for lote in lotes_secuenciales(len(items), opciones['lote'], semilla=0)]
+
+        def paso(batch):
+            if bucle == 'anterior':
+                perdida = paso_anterior(em, torch, model, batch, device)
+            else:
+                perdida = em.acumular_gradientes(model, batch, device, recolectar=recolectar)
+            optimizer.step()
+            optimizer.zero_grad(set_to_none=True)
+            return perdida
+
+        paso(lotes[0])  # warm-up: allocates the AdamW state
+        gc.collect()
+        base = _rss_mb('VmRSS')
+        _reiniciar_pico()
+        tiempos = []
+        for batch in lotes[1:]:
+            inicio = perf_counter()
+            paso(batch)
+            tiempos.append((perf_counter() - inicio) * 1000)
+        cola.put({'tiempos': tiempos, 'base': base, 'pico': _rss_mb('VmHWM')})
+    except Exception as e:
+        cola.put({'error': f'{type(e).__name__}: {e}'})
+
+
+class Command(BaseCommand):
+    help = ('Benchmarks training step time and peak RSS of the previous micro-batch loop (stacked mean, '
+            'gc.collect per micro-batch) against true gradient accumulation. Each loop runs in its own process.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modelo', default=getattr(settings, 'INFERENCIA_MODELO_DIR', 'trained_model'),
+                            help='Model folder or name to fine-tune (defaults to settings.INFERENCIA_MODELO_DIR).')
+        parser.add_argument('--dataset', default=os.path.join(settings.BASE_DIR, 'dataset_principal.csv'),
+                            help='CSV with sentence,inference,label columns.')
+        parser.add_argument('--pasos', type=int, default=20, help='Optimizer steps per loop (default: 20).')
+        parser.add_argument('--lote', type=int, default=16, help='BATCH_SIZE (default: 16).')
+        parser.add_argument('--micro-lote', type=int, default=4, help='MICRO_BATCH (default: 4).')
+
+    def handle(self, *args, **options):
+        try:
+            import torch  # noqa: F401
+        except ImportError:
+            raise CommandError('This benchmark requires torch (pip install torch).')
+        if not os.path.exists(options['dataset']):
+            raise CommandError(f"Dataset '{options['dataset']}' not found.")
+        with open(options['dataset'], 'r', encoding='utf-8', newline='') as f:
+            pares = [(row['sentence'] or '', row['inference'] or '', int(row['label'])) for row in csv.DictReader(f)]
+        lote = max(1, options['lote'])
+        necesarios = (max(1, options['pasos']) + 1) * lote
+        if len(pares) < necesarios:
+            raise CommandError(f'The dataset has {len(pares)} rows; {necesarios} are needed.')
+        opciones = {
+            'modelo': options['modelo'],
+            'lote': lote,
+            'micro_lote': max(1, options['micro_lote']),
+            'pares': random.Random(0).sample(pares, necesarios),
+        }
+
+        self.stdout.write(self.style.SUCCESS(
+            f"--- Training loop benchmark: {options['pasos']} steps, batch {lote}, "
+            f"micro-batch {opciones['micro_lote']} ---"
+        ))
+        self.stdout.write(f"{'loop':<30} {'mean ms':>9} {'p50 ms':>9} {'peak RSS MB':>12} {'over base MB':>13}")
+        contexto = multiprocessing.get_context('spawn')
+        for nombre, bucle, recolectar in VARIANTES:
+            cola = contexto.Queue()
+            proceso = contexto.Process(target=_medir, args=(opciones, bucle, recolectar, cola))
+            proceso.start()
+            r = self.esperar(proceso, cola)
+            proceso.join()
+            if 'error' in r:
+                raise CommandError(f'{nombre}: {r["error"]}')
+            pico = f"{r['pico']:.0f}" if r['pico'] is not None else '-'
+            sobre = f"{r['pico'] - r['base']:.0f}" if r['pico'] is not None and r['base'] is not None else '-'
+            self.stdout.write(f"{nombre:<30} {statistics.mean(r['tiempos']):>9.1f} "
+                              f"{statistics.median(r['tiempos']):>9.1f} {pico:>12} {sobre:>13}")
+
+        self.stdout.write(self.style.SUCCESS('--- Benchmark finished ---'))
+
+    def esperar(self, proceso, cola):
+        # The child can be killed by the OOM killer without ever answering
+        while True:
+            try:
+                return cola.get(timeout=1)
+            except queue.Empty:
+                if not proceso.is_alive():
+                    return {'error': f'process exited with code {proceso.exitcode}'}
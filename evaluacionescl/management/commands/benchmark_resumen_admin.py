@@ -0,0 +1,118 @@
+import random
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from evaluacionescl.models import RegistroUsuarios, EvaluacionLecturaIndividual
+from evaluacionescl.puntuacion import TIPOS_TEXTO, VAL_MAX
+from evaluacionescl.resumenes import resumen_por_tipo
+from evaluacionescl import vista_admin
+from evaluacionescl.views import dashboard_admin, admin_resultados, exportar_admin_resultados_excel
+
+USUARIOS = 200
+LOTE = 5000
+
+
+def resumen_en_python():
+    """The previous implementation: one query per type, every row loaded to sum puntaje."""
+    resumen = []
+    for tipo in TIPOS_TEXTO:
+        lecturas = EvaluacionLecturaIndividual.objects.filter(tipo_texto=tipo)
+        cantidad = lecturas.count()
+        suma = sum([e.puntaje for e in lecturas if e.puntaje is not None])
+        porcentaje = (suma / cantidad / VAL_MAX * 100) if cantidad else 0
+        resumen.append({"tipo": tipo, "cantidad": cantidad, "suma": suma, "porcentaje": porcentaje})
+    return resumen
+
+
+class Command(BaseCommand):
+    help = ('Benchmarks the admin summary by text type (query count and latency) on synthetic data. '
+            'Everything runs inside a transaction that is rolled back at the end.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                            help='Table sizes to measure (default: 10000 100000 1000000).')
+        parser.add_argument('--repeticiones', type=int, default=3,
+                            help='Runs per measurement; the best one is reported (default: 3).')
+        parser.add_argument('--sin-antiguo', action='store_true',
+                            help='Skip the previous per-row Python implementation (slow at 1M rows).')
+
+    def handle(self, *args, **options):
+        self.repeticiones = max(1, options['repeticiones'])
+        self.factory = RequestFactory()
+        self.stdout.write(self.style.SUCCESS('--- Admin summary benchmark ---'))
+        self.stdout.write(f"{'rows':>10}  {'implementation':<38} {'queries':>7} {'best ms':>10}")
+
+        with transaction.atomic():
+            usuarios = RegistroUsuarios.objects.bulk_create([
+                RegistroUsuarios(nombre='bench', apellido=str(i), edad=20, matricula=f'bench-{i}',
+                                 cuatrimestre='1', sexo='O', contrasena='')
+                for i in range(USUARIOS)
+            ])
+            if not usuarios[0].pk:  # backends without RETURNING (MySQL)
+                usuarios = list(RegistroUsuarios.objects.filter(matricula__startswith='bench-'))
+
+            actuales = EvaluacionLecturaIndividual.objects.count()
+            for filas in sorted(options['filas']):
+                self.insertar(usuarios, filas - actuales)
+                actuales = max(actuales, filas)
+                # The views read the materialized VistaAdmin, which bulk inserts bypass
+                inicio = perf_counter()
+                vista_admin.reconstruir()
+                self.stdout.write(f'{actuales:>10}  (VistaAdmin rebuilt in {(perf_counter() - inicio) * 1000:.0f} ms)')
+                self.medir_tamano(actuales, options['sin_antiguo'])
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('--- Benchmark finished (synthetic data rolled back) ---'))
+
+    def insertar(self, usuarios, cantidad):
+        rnd = random.Random(cantidad)
+        while cantidad > 0:
+            n = min(LOTE, cantidad)
+            EvaluacionLecturaIndividual.objects.bulk_create([
+                EvaluacionLecturaIndividual(
+                    usuario=rnd.choice(usuarios),
+                    tipo_texto=rnd.choice(TIPOS_TEXTO),
+                    titulo_lectura=f'texto_{rnd.randrange(500)}.pdf',
+                    fragmento='', respuesta_usuario='r',
+                    # ~10% pending evaluations without a score
+                    puntaje=None if rnd.random() < 0.1 else rnd.randint(0, VAL_MAX),
+                    palabras_por_minuto=rnd.randint(80, 300),
+                )
+                for _ in range(n)
+            ])
+            cantidad -= n
+
+    def medir_tamano(self, filas, sin_antiguo):
+        casos = []
+        if not sin_antiguo:
+            casos.append(('previous (rows summed in Python)', resumen_en_python))
+        casos += [
+            ('resumen_por_tipo (GROUP BY)', resumen_por_tipo),
+            ('vista_admin.resumen_por_tipo', vista_admin.resumen_por_tipo),
+            ('view dashboard_admin', lambda: dashboard_admin(self.peticion())),
+            ('view admin_resultados', lambda: admin_resultados(self.peticion())),
+            ('view exportar_admin_resultados_excel', lambda: exportar_admin_resultados_excel(self.peticion())),
+        ]
+        for nombre, funcion in casos:
+            consultas, ms = self.medir(funcion)
+            self.stdout.write(f'{filas:>10}  {nombre:<38} {consultas:>7} {ms:>10.1f}')
+
+    def peticion(self):
+        request = self.factory.get('/')
+        request.session = {'admin_id': 0}
+        return request
+
+    def medir(self, funcion):
+        mejor = None
+        for _ in range(self.repeticiones):
+            with CaptureQueriesContext(connection) as ctx:
+                inicio = perf_counter()
+                funcion()
+                ms = (perf_counter() - inicio) * 1000
+            mejor = ms if mejor is None else min(mejor, ms)
+        return len(ctx.captured_queries), mejor
@@ -0,0 +1,31 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from evaluacionescl.bitacora import formatear, leer_recientes
+
+
+class Command(BaseCommand):
+    help = ('Shows the newest retraining log entries first, reading the JSON-lines log '
+            'backwards from the end (including rotated files).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('-n', '--lineas', type=int, default=50,
+                            help='Number of entries to show (default: 50).')
+        parser.add_argument('--origen', choices=['entrenamiento', 'orquestador'],
+                            help='Only show entries written by this script.')
+        parser.add_argument('--json', action='store_true',
+                            help='Print the raw JSON entries instead of formatted lines.')
+        parser.add_argument('--ruta', default=None,
+                            help='Log file (default: settings.BITACORA_REENTRENAMIENTO).')
+
+    def handle(self, *args, **options):
+        ruta = options['ruta'] or settings.BITACORA_REENTRENAMIENTO
+        entradas = leer_recientes(ruta, max(1, options['lineas']), options['origen'])
+
+        if not entradas:
+            self.stdout.write(self.style.WARNING(f'No entries in {ruta}.'))
+            return
+        for entrada in entradas:
+            self.stdout.write(json.dumps(entrada, ensure_ascii=False) if options['json'] else formatear(entrada))
@@ -0,0 +1,62 @@
+import csv
+import os
+import random
+from time import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Builds the INT8 dynamic-quantized copy of trained_model/ and optionally compares it against fp32 on dataset_principal.csv.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modelo', default=getattr(settings, 'INFERENCIA_MODELO_DIR', 'trained_model'),
+                            help='Model folder (defaults to settings.INFERENCIA_MODELO_DIR).')
+        parser.add_argument('--comparar', action='store_true',
+                            help='Compare label agreement and probability drift against fp32.')
+        parser.add_argument('--dataset', default=os.path.join(settings.BASE_DIR, 'dataset_principal.csv'),
+                            help='CSV with sentence,inference columns used for the comparison.')
+        parser.add_argument('--limite', type=int, default=0,
+                            help='Compare on a random sample of N rows (0 = whole dataset).')
+
+    def handle(self, *args, **options):
+        from transformers import BertTokenizer, BertForSequenceClassification
+        from evaluacionescl.inferencia.cuantizacion import guardar_cuantizado, comparar
+
+        ruta_modelo = options['modelo']
+        if not os.path.isdir(ruta_modelo):
+            raise CommandError(f"Model folder '{ruta_modelo}' does not exist.")
+
+        self.stdout.write(self.style.SUCCESS('--- Quantizing model to INT8 ---'))
+        inicio = time()
+        model_fp32 = BertForSequenceClassification.from_pretrained(ruta_modelo).eval()
+        model_int8, destino = guardar_cuantizado(ruta_modelo, model=model_fp32)
+        tam_fp32 = sum(
+            os.path.getsize(os.path.join(ruta_modelo, f))
+            for f in ('model.safetensors', 'pytorch_model.bin')
+            if os.path.exists(os.path.join(ruta_modelo, f))
+        )
+        self.stdout.write(f' -> Saved {destino} in {time() - inicio:.1f}s')
+        self.stdout.write(f' -> Size fp32: {tam_fp32 / 2**20:.1f} MB, int8: {os.path.getsize(destino) / 2**20:.1f} MB')
+
+        if not options['comparar']:
+            return
+
+        if not os.path.exists(options['dataset']):
+            raise CommandError(f"Dataset '{options['dataset']}' not found.")
+        with open(options['dataset'], 'r', encoding='utf-8', newline='') as f:
+            pares = [(row['sentence'], row['inference']) for row in csv.DictReader(f)]
+        if options['limite'] and options['limite'] < len(pares):
+            pares = random.sample(pares, options['limite'])
+
+        self.stdout.write(f'Comparing fp32 vs int8 on {len(pares)} pairs...')
+        tokenizer = BertTokenizer.from_pretrained(ruta_modelo)
+        r = comparar(model_fp32, model_int8, tokenizer, pares)
+
+        self.stdout.write(self.style.SUCCESS('--- Comparison finished ---'))
+        self.stdout.write(f"Label agreement: {r['acuerdo_etiquetas'] * 100:.2f}%")
+        self.stdout.write(f"Probability drift (max abs per row): mean {r['deriva_media']:.4f}, "
+                          f"p95 {r['deriva_p95']:.4f}, max {r['deriva_max']:.4f}")
+        self.stdout.write(f"Time fp32: {r['segundos_fp32']:.1f}s, int8: {r['segundos_int8']:.1f}s "
+                          f"(speed-up x{r['segundos_fp32'] / max(r['segundos_int8'], 1e-9):.2f})")
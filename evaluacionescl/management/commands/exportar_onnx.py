@@ -0,0 +1,49 @@
+import csv
+import os
+import random
+from time import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Exports trained_model/ to ONNX (dynamic sequence length) and activates it only if it matches PyTorch.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modelo', default=getattr(settings, 'INFERENCIA_MODELO_DIR', 'trained_model'),
+                            help='Model folder (defaults to settings.INFERENCIA_MODELO_DIR).')
+        parser.add_argument('--dataset', default=os.path.join(settings.BASE_DIR, 'dataset_principal.csv'),
+                            help='CSV with sentence,inference columns used for the parity check.')
+        parser.add_argument('--muestras', type=int, default=64,
+                            help='Number of dataset rows used for the parity check.')
+        parser.add_argument('--tolerancia', type=float, default=1e-3,
+                            help='Maximum absolute probability difference accepted.')
+
+    def handle(self, *args, **options):
+        try:
+            import onnxruntime  # noqa: F401
+        except ImportError:
+            raise CommandError('ONNX export requires onnxruntime (pip install onnxruntime).')
+        from evaluacionescl.inferencia.modelo import cargar_modelo
+        from evaluacionescl.inferencia.exportacion_onnx import exportar_y_activar, PARES_PARIDAD
+
+        ruta_modelo = options['modelo']
+        if not os.path.isdir(ruta_modelo):
+            raise CommandError(f"Model folder '{ruta_modelo}' does not exist.")
+
+        pares = list(PARES_PARIDAD)
+        if os.path.exists(options['dataset']):
+            with open(options['dataset'], 'r', encoding='utf-8', newline='') as f:
+                filas = [(row['sentence'], row['inference']) for row in csv.DictReader(f)]
+            pares += random.sample(filas, min(options['muestras'], len(filas)))
+
+        self.stdout.write(self.style.SUCCESS('--- Exporting model to ONNX ---'))
+        inicio = time()
+        model, tokenizer = cargar_modelo(ruta_modelo)
+        ok, deriva, acuerdo = exportar_y_activar(model, tokenizer, ruta_modelo, pares, options['tolerancia'])
+        self.stdout.write(f'Parity on {len(pares)} pairs: max drift {deriva:.2e}, label agreement {acuerdo * 100:.1f}%')
+
+        if not ok:
+            raise CommandError('Parity check failed: the ONNX artifact was NOT activated.')
+        self.stdout.write(self.style.SUCCESS(f' -> model.onnx activated in {time() - inicio:.1f}s.'))
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from evaluacionescl.trabajos_exportacion import tomar_siguiente, ejecutar, reencolar_colgados
+
+
+class Command(BaseCommand):
+    help = 'Worker that builds the export files requested from the admin panel (xlsx, csv, parquet).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--una-vez', action='store_true',
+                            help='Process the pending jobs and exit instead of waiting for new ones.')
+        parser.add_argument('--intervalo', type=float, default=2.0,
+                            help='Seconds between checks for new jobs (default: 2).')
+        parser.add_argument('--reintentar-tras', type=int, default=30,
+                            help='Minutes after which a job stuck in progress is queued again (default: 30).')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('--- Export worker started ---'))
+        while True:
+            reencolados = reencolar_colgados(options['reintentar_tras'])
+            if reencolados:
+                self.stdout.write(self.style.WARNING(f'{reencolados} stuck job(s) queued again.'))
+
+            trabajo = tomar_siguiente()
+            if trabajo is None:
+                if options['una_vez']:
+                    break
+                time.sleep(options['intervalo'])
+                continue
+
+            self.stdout.write(f'Building job {trabajo.pk}: {trabajo.tipo}.{trabajo.formato}...')
+            inicio = time.perf_counter()
+            ejecutar(trabajo)
+            segundos = time.perf_counter() - inicio
+            if trabajo.estado == 'terminado':
+                self.stdout.write(self.style.SUCCESS(f' -> {trabajo.archivo}: {trabajo.filas} rows in {segundos:.2f}s'))
+            else:
+                self.stderr.write(self.style.ERROR(f' -> Job {trabajo.pk} failed: {trabajo.error}'))
+
+        self.stdout.write(self.style.SUCCESS('--- Export worker finished ---'))
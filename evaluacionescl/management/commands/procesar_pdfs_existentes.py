@@ -1,65 +1,129 @@
 import os
-import fitz
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from time import perf_counter
 from django.core.management.base import BaseCommand
 from django.conf import settings
+from django.db import connections
 from evaluacionescl.models import Lectura
+from evaluacionescl.textos import procesar_archivo, aplicar_resultado
+from evaluacionescl import catalogo
 
 class Command(BaseCommand):
-    help = 'Scans existing PDFs in the media folder, counts their words, and registers them in the database.'
+    help = ('Scans existing PDFs in the media folder and registers them in the database. '
+            'Only new files or files whose content hash changed are extracted again; '
+            'they are processed in parallel across CPU cores.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes for extraction (default: number of cores; 1 = serial).')
+        parser.add_argument('--forzar', action='store_true',
+                            help='Ignore the stored hashes and re-extract every file.')
 
     def handle(self, *args, **kwargs):
         self.stdout.write(self.style.SUCCESS('--- Starting processing of existing PDFs ---'))
-        
+        inicio = perf_counter()
+
         bancotext_path = os.path.join(settings.MEDIA_ROOT, 'bancotext')
         tipos_texto = ['Argumentativo', 'Descriptivo', 'Expositivo', 'Narrativo']
-        
-        archivos_procesados = 0
-        archivos_omitidos = 0
 
+        # Existing readings in a single query, keyed like the files on disk
+        existentes = {(l.tipo_texto, l.titulo): l for l in Lectura.objects.filter(tipo_texto__in=tipos_texto)}
+
+        # 1. Collect the work: every PDF with the hashes stored for it (if any)
+        tareas = []
         for tipo in tipos_texto:
             carpeta_path = os.path.join(bancotext_path, tipo)
             if not os.path.isdir(carpeta_path):
                 self.stdout.write(self.style.WARNING(f"Warning: Folder for '{tipo}' does not exist."))
                 continue
 
-            for nombre_archivo in os.listdir(carpeta_path):
-                if nombre_archivo.endswith('.pdf'):
-                    # Clean the title to match how it's saved elsewhere
-                    titulo_base = nombre_archivo.replace('.pdf', '').replace('_', ' ')
-                    
-                    # 1. Check if it already exists in the database to avoid duplicates
-                    if Lectura.objects.filter(titulo=titulo_base, tipo_texto=tipo).exists():
-                        self.stdout.write(f"Skipping '{nombre_archivo}', already in DB.")
-                        archivos_omitidos += 1
+            with os.scandir(carpeta_path) as entradas:
+                for entrada in entradas:
+                    if not (entrada.is_file() and entrada.name.endswith('.pdf')):
                         continue
+                    # Clean the title to match how it's saved elsewhere
+                    titulo_base = entrada.name.replace('.pdf', '').replace('_', ' ')
+                    lectura = existentes.get((tipo, titulo_base))
+                    hash_contenido = hash_texto = ''
+                    # Readings without a fragment pool are always reprocessed
+                    if lectura is not None and lectura.num_fragmentos > 0 and not kwargs['forzar']:
+                        hash_contenido, hash_texto = lectura.hash_contenido, lectura.hash_texto
+                    tareas.append((tipo, entrada.name, titulo_base, lectura, entrada.path, hash_contenido, hash_texto))
+
+        workers = max(1, kwargs['workers'])
+        self.stdout.write(f'Files found: {len(tareas)} (workers: {workers})')
+
+        # 2. Hash / extract / segment in the pool; the DB is only written from this process
+        conteos = {'nuevos': 0, 'procesado': 0, 'mismo_texto': 0, 'sin_cambios': 0, 'error': 0}
+        bytes_leidos = 0
+        segundos_cpu = 0.0
+
+        for tarea, resultado in self.ejecutar(tareas, workers):
+            tipo, nombre_archivo, titulo_base, lectura, _, _, _ = tarea
+            estado = resultado['estado']
+            segundos = resultado['segundos']
+            segundos_cpu += segundos
+            bytes_leidos += resultado['bytes']
 
-                    # 2. If it doesn't exist, process it
-                    self.stdout.write(f"Processing '{nombre_archivo}'...")
-                    ruta_completa_pdf = os.path.join(carpeta_path, nombre_archivo)
-                    
-                    try:
-                        # 3. Count the words
-                        texto_completo = ""
-                        with fitz.open(ruta_completa_pdf) as doc:
-                            for pagina in doc:
-                                texto_completo += pagina.get_text("text")
-                        
-                        conteo = len(texto_completo.split())
-
-                        # 4. Create the record in the database
-                        Lectura.objects.create(
-                            titulo=titulo_base,
-                            tipo_texto=tipo,
-                            # The path for the FileField is saved relative to MEDIA_ROOT
-                            archivo_pdf=os.path.join('bancotext', tipo, nombre_archivo), 
-                            conteo_palabras=conteo
-                        )
-                        self.stdout.write(self.style.SUCCESS(f" -> Created record for '{titulo_base}' with {conteo} words."))
-                        archivos_procesados += 1
-                    
-                    except Exception as e:
-                        self.stderr.write(self.style.ERROR(f"Error processing '{nombre_archivo}': {e}"))
+            if estado == 'error':
+                conteos['error'] += 1
+                self.stderr.write(self.style.ERROR(f"Error processing '{nombre_archivo}': {resultado['error']}"))
+                continue
+            if estado == 'sin_cambios':
+                conteos['sin_cambios'] += 1
+                self.stdout.write(f"Skipping '{nombre_archivo}', unchanged ({segundos * 1000:.0f} ms).")
+                continue
+
+            try:
+                if lectura is None:
+                    # The path for the FileField is saved relative to MEDIA_ROOT
+                    lectura = Lectura.objects.create(
+                        titulo=titulo_base,
+                        tipo_texto=tipo,
+                        archivo_pdf=os.path.join('bancotext', tipo, nombre_archivo),
+                    )
+                    conteos['nuevos'] += 1
+                aplicar_resultado(lectura, resultado)
+            except Exception as e:
+                conteos['error'] += 1
+                self.stderr.write(self.style.ERROR(f"Error saving '{nombre_archivo}': {e}"))
+                continue
 
+            conteos[estado] += 1
+            if estado == 'mismo_texto':
+                self.stdout.write(f" -> '{titulo_base}': file changed, same text; hashes updated ({segundos:.2f}s).")
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f" -> '{titulo_base}': {lectura.conteo_palabras} words, {lectura.num_fragmentos} fragments ({segundos:.2f}s)."
+                ))
+
+        if conteos['nuevos']:
+            catalogo.invalidar()
+
+        transcurrido = perf_counter() - inicio
         self.stdout.write(self.style.SUCCESS(f'--- Process finished ---'))
-        self.stdout.write(f'New files processed: {archivos_procesados}')
-        self.stdout.write(f'Skipped files (already existing): {archivos_omitidos}')
+        self.stdout.write(f"New files registered: {conteos['nuevos']}")
+        self.stdout.write(f"Files extracted and segmented: {conteos['procesado']}")
+        self.stdout.write(f"Files changed with identical text: {conteos['mismo_texto']}")
+        self.stdout.write(f"Skipped files (unchanged): {conteos['sin_cambios']}")
+        self.stdout.write(f"Errors: {conteos['error']}")
+        if tareas and transcurrido > 0:
+            self.stdout.write(
+                f'Throughput: {len(tareas)} files, {bytes_leidos / 2**20:.1f} MB in {transcurrido:.2f}s '
+                f'({len(tareas) / transcurrido:.1f} files/s, {bytes_leidos / 2**20 / transcurrido:.1f} MB/s; '
+                f'per-file work {segundos_cpu:.2f}s, parallel speedup x{segundos_cpu / transcurrido:.1f})'
+            )
+
+    def ejecutar(self, tareas, workers):
+        """Yields (task, result) as each file finishes."""
+        if workers == 1 or len(tareas) <= 1:
+            for tarea in tareas:
+                yield tarea, procesar_archivo(*tarea[4:])
+            return
+
+        # Children must not share this process' DB connection
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futuros = {pool.submit(procesar_archivo, *tarea[4:]): tarea for tarea in tareas}
+            for futuro in as_completed(futuros):
+                yield futuros[futuro], futuro.result()
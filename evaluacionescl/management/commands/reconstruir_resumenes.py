@@ -0,0 +1,15 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from evaluacionescl.resumenes import reconstruir
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the running aggregates of EvaluacionLectura (weighted-score sum, count, per-inference counts) from the individual evaluations.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('--- Rebuilding EvaluacionLectura aggregates ---'))
+        inicio = perf_counter()
+        total = reconstruir()
+        self.stdout.write(self.style.SUCCESS(f'--- {total} summaries rebuilt in {perf_counter() - inicio:.2f}s ---'))
@@ -0,0 +1,15 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from evaluacionescl.vista_admin import reconstruir
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the materialized admin statistics (VistaAdmin) per text type, cuatrimestre and sexo from the individual evaluations.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('--- Rebuilding VistaAdmin ---'))
+        inicio = perf_counter()
+        total = reconstruir()
+        self.stdout.write(self.style.SUCCESS(f'--- {total} rows rebuilt in {perf_counter() - inicio:.2f}s ---'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from evaluacionescl.recursos import registro, formatear_reporte
+
+
+class Command(BaseCommand):
+    help = 'Loads the heavy resources (spaCy, BERT classifier) and reports how long each took and how much memory it added.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('recursos', nargs='*',
+                            help='Resources to load (default: all registered ones).')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('--- Loading resources ---'))
+        filas = registro.precargar(options['recursos'] or None)
+        self.stdout.write(formatear_reporte(filas))
+        total = sum(r.get('segundos', 0) for r in filas if r.get('cargado'))
+        self.stdout.write(self.style.SUCCESS(f'--- Total load time: {total:.1f}s ---'))
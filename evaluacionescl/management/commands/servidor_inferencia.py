@@ -0,0 +1,77 @@
+import signal
+import sys
+from time import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from evaluacionescl.inferencia.cliente import ClienteInferencia, ErrorServidor, ServidorNoDisponible
+from evaluacionescl.inferencia.lotes import ClasificadorPorLotes
+from evaluacionescl.inferencia.servidor import ServidorInferencia
+
+
+def _salir(signum, frame):
+    sys.exit(0)
+
+
+class Command(BaseCommand):
+    help = 'Starts the inference server: loads the BERT model once and serves it to the Django workers over a Unix socket.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', default=getattr(settings, 'INFERENCIA_SOCKET', ''),
+                            help='Unix socket path (defaults to settings.INFERENCIA_SOCKET).')
+        parser.add_argument('--salud', action='store_true',
+                            help='Only query the health of a running server and exit (exit code 1 if it is down).')
+
+    def handle(self, *args, **options):
+        ruta_socket = options['socket']
+        if not ruta_socket:
+            raise CommandError('No socket path given: use --socket or set INFERENCIA_SOCKET.')
+
+        if options['salud']:
+            cliente = ClienteInferencia(ruta_socket, timeout=getattr(settings, 'INFERENCIA_TIMEOUT', 5.0))
+            try:
+                estado = cliente.salud()
+            except (ServidorNoDisponible, ErrorServidor) as e:
+                self.stderr.write(self.style.ERROR(f'Inference server is down: {e}'))
+                sys.exit(1)
+            self.stdout.write(self.style.SUCCESS(f"Inference server OK (pid {estado['pid']})."))
+            self.stdout.write(str(estado))
+            return
+
+        from evaluacionescl.inferencia.recarga import ModeloRecargable
+        from evaluacionescl.inferencia.servicio import crear_backend_configurado
+
+        ruta_modelo = getattr(settings, 'INFERENCIA_MODELO_DIR', 'trained_model')
+        self.stdout.write(f"Loading model from '{ruta_modelo}' "
+                          f"(backend: {getattr(settings, 'INFERENCIA_BACKEND', 'torch')})...")
+        inicio = time()
+        modelo = ModeloRecargable(
+            crear_backend_configurado, ruta_modelo,
+            intervalo=getattr(settings, 'INFERENCIA_RECARGA_INTERVALO', 5),
+        )
+        modelo.obtener()
+        modelo.revisar_periodicamente()
+        self.stdout.write(self.style.SUCCESS(f' -> Model loaded in {time() - inicio:.1f}s ({modelo.nombre}).'))
+
+        clasificador = ClasificadorPorLotes(
+            modelo.predecir,
+            max_lote=getattr(settings, 'INFERENCIA_LOTE_MAX', 8),
+            ventana_ms=getattr(settings, 'INFERENCIA_LOTE_VENTANA_MS', 10),
+            timeout=getattr(settings, 'INFERENCIA_LOTE_TIMEOUT', 30),
+        )
+        servidor = ServidorInferencia(
+            ruta_socket, clasificador,
+            info={'modelo': str(ruta_modelo), 'backend': modelo.nombre},
+            version=lambda: modelo.version,
+        )
+
+        signal.signal(signal.SIGTERM, _salir)
+        self.stdout.write(self.style.SUCCESS(f'--- Inference server listening on {ruta_socket} ---'))
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servidor.server_close()
+            self.stdout.write('--- Inference server stopped ---')
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.20 on 2026-10-18 14:17
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evaluacionescl', '0008_lectura_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheClasificacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=64, unique=True)),
+                ('version_modelo', models.CharField(db_index=True, max_length=150)),
+                ('tipo_inferencia', models.CharField(max_length=100)),
+                ('probabilidades', models.TextField()),
+                ('aciertos', models.IntegerField(default=0)),
+                ('ultimo_uso', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
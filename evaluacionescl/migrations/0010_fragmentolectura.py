@@ -0,0 +1,31 @@
+# Generated by Django 4.2.20 on 2026-10-18 14:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evaluacionescl', '0009_cacheclasificacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lectura',
+            name='num_fragmentos',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='FragmentoLectura',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('orden', models.IntegerField()),
+                ('texto', models.TextField()),
+                ('lectura', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fragmentos', to='evaluacionescl.lectura')),
+            ],
+            options={
+                'unique_together': {('lectura', 'orden')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.20 on 2026-10-18 14:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evaluacionescl', '0010_fragmentolectura'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lectura',
+            name='hash_contenido',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='lectura',
+            name='hash_texto',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+    ]
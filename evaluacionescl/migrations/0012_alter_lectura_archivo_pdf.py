@@ -0,0 +1,19 @@
+# Generated by Django 4.2.20 on 2026-10-18 14:24
+
+from django.db import migrations, models
+import evaluacionescl.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evaluacionescl', '0011_lectura_hash_contenido_lectura_hash_texto'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='lectura',
+            name='archivo_pdf',
+            field=models.FileField(upload_to=evaluacionescl.models.ruta_banco),
+        ),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 4.2.20 on 2026-10-18 14:25
+
+from django.db import migrations, models
+
+
+# Copia fija de las reglas de puntuacion.py y de resumenes.reconstruir tal como
+# estaban al crear esta migración: si el código de la app cambia, `migrate`
+# desde cero sigue haciendo lo mismo.
+CLASES = ["asociativa", "elaborativa", "predictiva", "no_inferencia_parafrasis", "no_inferencia_sinsentido"]
+VAL_MAX = 3
+NIVELES = [
+    (90, "Alto (Comprensión profunda)"),
+    (60, "Medio (Comprensión adecuada)"),
+    (30, "Bajo (Comprensión superficial)"),
+    (0, "Deficiente (No comprensión)"),
+]
+
+
+def puntaje_ponderado(puntaje, ppm):
+    ppm = ppm or 0
+    velocidad = 100 if ppm >= 230 else 75 if ppm >= 150 else 50
+    return (puntaje / VAL_MAX) * 100 * 0.80 + velocidad * 0.20
+
+
+def nivel_comprension(porcentaje):
+    for minimo, nivel in NIVELES:
+        if porcentaje >= minimo:
+            return nivel
+    return NIVELES[-1][1]
+
+
+def reconstruir_resumenes(apps, schema_editor):
+    # Los acumulados nuevos arrancan en 0: se calculan con el historial existente
+    EvaluacionLectura = apps.get_model("evaluacionescl", "EvaluacionLectura")
+    EvaluacionLecturaIndividual = apps.get_model("evaluacionescl", "EvaluacionLecturaIndividual")
+
+    vacio = {"textos_leidos": 0, "suma_ponderada": 0.0, **{f"conteo_{c}": 0 for c in CLASES}}
+    acumulados = {}
+    filas = EvaluacionLecturaIndividual.objects.filter(puntaje__isnull=False).values_list(
+        "usuario_id", "tipo_texto", "puntaje", "palabras_por_minuto", "tipo_inferencia"
+    )
+    for usuario_id, tipo_texto, puntaje, ppm, tipo_inferencia in filas.iterator(chunk_size=2000):
+        acc = acumulados.setdefault((usuario_id, tipo_texto), dict(vacio))
+        acc["textos_leidos"] += 1
+        acc["suma_ponderada"] += puntaje_ponderado(puntaje, ppm)
+        if tipo_inferencia in CLASES:
+            acc[f"conteo_{tipo_inferencia}"] += 1
+
+    existentes = set(EvaluacionLectura.objects.values_list("usuario_id", "tipo_texto"))
+    nuevos = []
+    for clave in existentes | set(acumulados):
+        valores = dict(acumulados.get(clave, vacio))
+        valores["porcentaje"] = (
+            valores["suma_ponderada"] / valores["textos_leidos"] if valores["textos_leidos"] else 0
+        )
+        valores["nivel_comprension"] = nivel_comprension(valores["porcentaje"])
+        usuario_id, tipo_texto = clave
+        if clave in existentes:
+            EvaluacionLectura.objects.filter(usuario_id=usuario_id, tipo_texto=tipo_texto).update(**valores)
+        else:
+            nuevos.append(EvaluacionLectura(usuario_id=usuario_id, tipo_texto=tipo_texto, **valores))
+    EvaluacionLectura.objects.bulk_create(nuevos, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evaluacionescl', '0012_alter_lectura_archivo_pdf'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evaluacionlectura',
+            name='conteo_asociativa',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='evaluacionlectura',
+            name='conteo_elaborativa',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='evaluacionlectura',
+            name='conteo_no_inferencia_parafrasis',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='evaluacionlectura',
+            name='conteo_no_inferencia_sinsentido',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='evaluacionlectura',
+            name='conteo_predictiva',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='evaluacionlectura',
+            name='suma_ponderada',
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(reconstruir_resumenes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,113 @@
+# Generated by Django 4.2.20 on 2026-10-18 14:28
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+# Copia fija de vista_admin.reconstruir (y de las reglas de puntuacion.py) tal
+# como estaban al crear esta migración: si el código de la app cambia,
+# `migrate` desde cero sigue haciendo lo mismo.
+TODOS = "Todos"
+VAL_MAX = 3
+NIVELES = [
+    (90, "Alto (Comprensión profunda)"),
+    (60, "Medio (Comprensión adecuada)"),
+    (30, "Bajo (Comprensión superficial)"),
+    (0, "Deficiente (No comprensión)"),
+]
+
+
+def nivel_comprension(puntaje_total, textos_total):
+    porcentaje = (puntaje_total / textos_total / VAL_MAX) * 100 if textos_total else 0
+    for minimo, nivel in NIVELES:
+        if porcentaje >= minimo:
+            return nivel
+    return NIVELES[-1][1]
+
+
+def reconstruir_vista_admin(apps, schema_editor):
+    # Nada poblaba VistaAdmin: se llena con el historial existente
+    VistaAdmin = apps.get_model("evaluacionescl", "VistaAdmin")
+    EvaluacionLecturaIndividual = apps.get_model("evaluacionescl", "EvaluacionLecturaIndividual")
+
+    agregados = dict(
+        textos=Count("id"),
+        evaluadas=Count("puntaje"),
+        suma=Sum("puntaje"),
+        usuarios=Count("usuario", distinct=True, filter=Q(puntaje__isnull=False)),
+    )
+    base = EvaluacionLecturaIndividual.objects.order_by()
+    filas = list(base.values("tipo_texto", "usuario__cuatrimestre", "usuario__sexo").annotate(**agregados))
+    filas += [
+        dict(f, tipo_texto=TODOS)
+        for f in base.values("usuario__cuatrimestre", "usuario__sexo").annotate(**agregados)
+    ]
+
+    VistaAdmin.objects.all().delete()
+    VistaAdmin.objects.bulk_create([
+        VistaAdmin(
+            tipo_texto=f["tipo_texto"],
+            cuatrimestre=f["usuario__cuatrimestre"],
+            sexo=f["usuario__sexo"],
+            textos_total=f["textos"],
+            evaluadas_total=f["evaluadas"],
+            puntaje_total=f["suma"] or 0,
+            usuarios_total=f["usuarios"],
+            nivel_comprension_global=nivel_comprension(f["suma"] or 0, f["textos"]),
+        )
+        for f in filas
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evaluacionescl', '0013_evaluacionlectura_conteo_asociativa_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vistaadmin',
+            name='cuatrimestre',
+            field=models.CharField(default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='vistaadmin',
+            name='evaluadas_total',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='vistaadmin',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='vistaadmin',
+            name='sexo',
+            field=models.CharField(default='', max_length=1),
+        ),
+        migrations.AlterField(
+            model_name='vistaadmin',
+            name='nivel_comprension_global',
+            field=models.CharField(default='', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='vistaadmin',
+            name='puntaje_total',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='vistaadmin',
+            name='textos_total',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='vistaadmin',
+            name='usuarios_total',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(reconstruir_vista_admin, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='vistaadmin',
+            unique_together={('tipo_texto', 'cuatrimestre', 'sexo')},
+        ),
+    ]
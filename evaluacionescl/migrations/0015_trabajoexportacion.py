@@ -0,0 +1,33 @@
+# Generated by Django 4.2.20 on 2026-10-18 14:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evaluacionescl', '0014_vistaadmin_cuatrimestre_vistaadmin_evaluadas_total_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoExportacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=50)),
+                ('formato', models.CharField(choices=[('xlsx', 'Excel (xlsx)'), ('csv', 'CSV'), ('parquet', 'Parquet')], max_length=10)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_proceso', 'En proceso'), ('terminado', 'Terminado'), ('error', 'Error'), ('caducado', 'Caducado')], db_index=True, default='pendiente', max_length=20)),
+                ('version_datos', models.CharField(max_length=150)),
+                ('archivo', models.CharField(blank=True, default='', max_length=255)),
+                ('filas', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('admin_id', models.IntegerField(blank=True, null=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True)),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tipo', 'formato', 'version_datos'], name='evaluacione_tipo_263a94_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.20 on 2026-10-18 14:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evaluacionescl', '0015_trabajoexportacion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='evaluacionlecturaindividual',
+            index=models.Index(fields=['usuario', 'tipo_texto', 'titulo_lectura'], name='eval_ind_usuario_tipo_titulo'),
+        ),
+        migrations.AddIndex(
+            model_name='evaluacionlecturaindividual',
+            index=models.Index(condition=models.Q(('respuesta_usuario__isnull', True)), fields=['usuario', 'tipo_texto'], name='eval_ind_pendientes'),
+        ),
+        migrations.AddIndex(
+            model_name='evaluacionlecturaindividual',
+            index=models.Index(fields=['usuario', 'fecha_lectura'], name='eval_ind_usuario_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='evaluacionlecturaindividual',
+            index=models.Index(fields=['tipo_texto'], name='eval_ind_tipo'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.20 on 2026-10-18 14:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evaluacionescl', '0016_indices_evaluacionlecturaindividual'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registrousuarios',
+            name='resultados_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+# Copia fija del índice de 0016: la migración no depende del Meta actual del modelo
+PENDIENTES = models.Index(
+    condition=models.Q(("respuesta_usuario__isnull", True)), fields=["usuario", "tipo_texto"],
+    name="eval_ind_pendientes",
+)
+
+
+def quitar_en_mysql(apps, schema_editor):
+    # MySQL no tiene índices parciales: 0016 creó eval_ind_pendientes sin su
+    # condición, un (usuario, tipo_texto) que solo repite el inicio de
+    # eval_ind_usuario_tipo_titulo y encarece las escrituras
+    if schema_editor.connection.vendor == "mysql":
+        modelo = apps.get_model("evaluacionescl", "EvaluacionLecturaIndividual")
+        schema_editor.remove_index(modelo, PENDIENTES)
+
+
+def restaurar_en_mysql(apps, schema_editor):
+    if schema_editor.connection.vendor == "mysql":
+        modelo = apps.get_model("evaluacionescl", "EvaluacionLecturaIndividual")
+        schema_editor.add_index(modelo, PENDIENTES)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evaluacionescl', '0017_registrousuarios_resultados_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(quitar_en_mysql, restaurar_en_mysql),
+    ]
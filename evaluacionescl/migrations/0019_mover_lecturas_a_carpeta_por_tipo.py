@@ -0,0 +1,37 @@
+# Generated by Django 4.2.20 on 2026-10-18 15:04
+
+import os
+
+from django.conf import settings
+from django.db import migrations
+
+
+def mover_a_carpeta_por_tipo(apps, schema_editor):
+    # Antes de 0012 las subidas quedaban en bancotext/<archivo>; los PDFs se
+    # sirven desde bancotext/<tipo>/ (ver mostrar_texto_pdf), así que se mueven
+    # ahí y se reescribe archivo_pdf. Si el archivo no está en disco no se toca.
+    Lectura = apps.get_model("evaluacionescl", "Lectura")
+    for lectura in Lectura.objects.exclude(archivo_pdf="").iterator():
+        nombre = lectura.archivo_pdf.name
+        nuevo = f"bancotext/{lectura.tipo_texto}/{os.path.basename(nombre)}"
+        if nombre == nuevo:
+            continue
+        origen = os.path.join(settings.MEDIA_ROOT, nombre)
+        destino = os.path.join(settings.MEDIA_ROOT, nuevo)
+        if not os.path.exists(destino):
+            if not os.path.exists(origen):
+                continue
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            os.replace(origen, destino)
+        Lectura.objects.filter(pk=lectura.pk).update(archivo_pdf=nuevo)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evaluacionescl', '0018_sin_eval_ind_pendientes_en_mysql'),
+    ]
+
+    operations = [
+        migrations.RunPython(mover_a_carpeta_por_tipo, migrations.RunPython.noop),
+    ]
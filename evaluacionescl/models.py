@@ -19,6 +19,9 @@ class RegistroUsuarios(models.Model):
     contrasena = models.CharField(max_length=200)
 #    sexo = models.CharField(max_length=1, choices=SEXO_OPCIONES, null=True, blank=True)  # temporalmente opcional
     sexo = models.CharField(max_length=1, choices=SEXO_OPCIONES)  # ← obligatorio
+    # Sube cada vez que el alumno inicia o responde una evaluación: forma parte
+    # de la clave de su página de resultados en caché (ver evaluacion_views.py)
+    resultados_version = models.PositiveIntegerField(default=0, editable=False)
 
     def set_contrasena(self, contrasena):
         self.contrasena = make_password(contrasena)
@@ -48,6 +51,11 @@ class RegistroAdmin(models.Model):
         return f"{self.nombre} {self.apellido}"
     
 
+def ruta_banco(instance, filename):
+    # Los PDFs se sirven desde bancotext/<tipo>/ (ver mostrar_texto_pdf)
+    return f"bancotext/{instance.tipo_texto}/{filename}"
+
+
 class Lectura(models.Model):
     TIPO_TEXTO_OPCIONES = [
         ('Argumentativo', 'Argumentativo'),
@@ -58,13 +66,29 @@ class Lectura(models.Model):
     
     titulo = models.CharField(max_length=255)
     tipo_texto = models.CharField(max_length=50, choices=TIPO_TEXTO_OPCIONES)
-    archivo_pdf = models.FileField(upload_to='bancotext/')
+    archivo_pdf = models.FileField(upload_to=ruta_banco)
     conteo_palabras = models.IntegerField(default=0, editable=False)
+    num_fragmentos = models.IntegerField(default=0, editable=False)  # tamaño del pool precalculado
+    hash_contenido = models.CharField(max_length=64, blank=True, default="", editable=False)  # sha256 del PDF
+    hash_texto = models.CharField(max_length=64, blank=True, default="", editable=False)  # sha256 del texto extraído
 
     def __str__(self):
         return self.titulo  
 
 
+class FragmentoLectura(models.Model):
+    """Fragmento de 50-80 palabras precalculado al registrar la Lectura (ver textos.py)."""
+    lectura = models.ForeignKey(Lectura, on_delete=models.CASCADE, related_name="fragmentos")
+    orden = models.IntegerField()
+    texto = models.TextField()
+
+    class Meta:
+        unique_together = ("lectura", "orden")
+
+    def __str__(self):
+        return f"{self.lectura} - fragmento {self.orden}"
+
+
 class EvaluacionLectura(models.Model):
     usuario = models.ForeignKey(RegistroUsuarios, on_delete=models.CASCADE)
     tipo_texto = models.CharField(max_length=100)
@@ -72,6 +96,15 @@ class EvaluacionLectura(models.Model):
     porcentaje = models.FloatField(default=0 )
     nivel_comprension = models.CharField(max_length=50)
 
+    # Acumulados que guardar_respuesta actualiza en O(1) (ver resumenes.py);
+    # manage.py reconstruir_resumenes los recalcula desde cero
+    suma_ponderada = models.FloatField(default=0)
+    conteo_asociativa = models.IntegerField(default=0)
+    conteo_elaborativa = models.IntegerField(default=0)
+    conteo_predictiva = models.IntegerField(default=0)
+    conteo_no_inferencia_parafrasis = models.IntegerField(default=0)
+    conteo_no_inferencia_sinsentido = models.IntegerField(default=0)
+
     def __str__(self):
         return f"{self.usuario} - {self.tipo_texto}"
 
@@ -95,20 +128,43 @@ class EvaluacionLecturaIndividual(models.Model):
 
     palabras_por_minuto = models.IntegerField(null=True, blank=True)
     tiempo_lectura_segundos = models.FloatField(null=True, blank=True)
-    
+
+    class Meta:
+        indexes = [
+            # Lecturas de un alumno por tipo y título (mostrar_fragmento, catálogo de no leídos, gráficas)
+            models.Index(fields=["usuario", "tipo_texto", "titulo_lectura"], name="eval_ind_usuario_tipo_titulo"),
+            # Evaluaciones pendientes (mostrar_texto_pdf). MySQL no tiene índices
+            # parciales: la migración 0018 lo quita ahí y esas consultas usan
+            # eval_ind_usuario_tipo_titulo, que empieza por (usuario, tipo_texto)
+            models.Index(fields=["usuario", "tipo_texto"], condition=models.Q(respuesta_usuario__isnull=True),
+                         name="eval_ind_pendientes"),
+            # Última inferencia y pendientes del alumno (resultados_usuario)
+            models.Index(fields=["usuario", "fecha_lectura"], name="eval_ind_usuario_fecha"),
+            # Exportaciones y resúmenes filtrados solo por tipo
+            models.Index(fields=["tipo_texto"], name="eval_ind_tipo"),
+        ]
+
     def __str__(self):
         return f"{self.usuario} - {self.titulo_lectura} - {self.tipo_texto}"
 
 
 class VistaAdmin(models.Model):
-    usuarios_total = models.IntegerField()
+    """Estadísticas globales materializadas por tipo, cuatrimestre y sexo (ver vista_admin.py)."""
+    usuarios_total = models.IntegerField(default=0)
     tipo_texto = models.CharField(max_length=100)
-    textos_total = models.IntegerField()
-    puntaje_total = models.FloatField()
-    nivel_comprension_global = models.CharField(max_length=50)
+    cuatrimestre = models.CharField(max_length=10, default="")
+    sexo = models.CharField(max_length=1, default="")
+    textos_total = models.IntegerField(default=0)
+    evaluadas_total = models.IntegerField(default=0)
+    puntaje_total = models.FloatField(default=0)
+    nivel_comprension_global = models.CharField(max_length=50, default="")
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("tipo_texto", "cuatrimestre", "sexo")
 
     def __str__(self):
-        return f"{self.tipo_texto} - Nivel: {self.nivel_comprension_global}"
+        return f"{self.tipo_texto} ({self.cuatrimestre}/{self.sexo}) - Nivel: {self.nivel_comprension_global}"
 
 
 class LecturaEnCurso(models.Model):
@@ -122,3 +178,46 @@ class LecturaEnCurso(models.Model):
 
     def __str__(self):
         return f"{self.usuario} - {self.tipo_texto} - {self.titulo_lectura}"
+
+
+class CacheClasificacion(models.Model):
+    """Resultado del clasificador para un par (fragmento, respuesta) y una versión del modelo."""
+    clave = models.CharField(max_length=64, unique=True)  # sha256 de fragmento + respuesta + versión
+    version_modelo = models.CharField(max_length=150, db_index=True)
+    tipo_inferencia = models.CharField(max_length=100)
+    probabilidades = models.TextField()  # JSON con una probabilidad por clase
+    aciertos = models.IntegerField(default=0)
+    ultimo_uso = models.DateTimeField(default=timezone.now, db_index=True)  # para desalojo LRU
+
+    def __str__(self):
+        return f"{self.tipo_inferencia} ({self.version_modelo})"
+
+
+class TrabajoExportacion(models.Model):
+    """Exportación que arma en segundo plano manage.py procesar_exportaciones (ver trabajos_exportacion.py)."""
+    ESTADOS = [
+        ("pendiente", "Pendiente"),
+        ("en_proceso", "En proceso"),
+        ("terminado", "Terminado"),
+        ("error", "Error"),
+        ("caducado", "Caducado"),  # los datos cambiaron y se borró el archivo
+    ]
+    FORMATOS = [("xlsx", "Excel (xlsx)"), ("csv", "CSV"), ("parquet", "Parquet")]
+
+    tipo = models.CharField(max_length=50)  # clave de exportaciones.EXPORTACIONES
+    formato = models.CharField(max_length=10, choices=FORMATOS)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default="pendiente", db_index=True)
+    version_datos = models.CharField(max_length=150)  # huella de los datos al solicitarla
+    archivo = models.CharField(max_length=255, blank=True, default="")  # relativo a EXPORTACIONES_DIR
+    filas = models.IntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+    admin_id = models.IntegerField(null=True, blank=True)  # RegistroAdmin que la pidió (de la sesión)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["tipo", "formato", "version_datos"])]
+
+    def __str__(self):
+        return f"{self.tipo}.{self.formato} ({self.estado})"
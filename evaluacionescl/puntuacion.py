@@ -0,0 +1,66 @@
+"""
+Reglas de puntuación: puntaje por tipo de inferencia, puntaje de velocidad
+lectora, puntaje ponderado y niveles de comprensión.
+"""
+
+VAL_MAX = 3  # puntaje máximo de una respuesta
+
+TIPOS_TEXTO = ["Argumentativo", "Descriptivo", "Expositivo", "Narrativo"]
+
+PUNTAJE_INFERENCIA = {
+    "asociativa": 2,
+    "elaborativa": 3,
+    "predictiva": 3,
+    "no_inferencia_parafrasis": 1,
+    "no_inferencia_sinsentido": 0,
+}
+
+# Ponderación del puntaje final: 80% inferencia, 20% velocidad
+PESO_INFERENCIA = 0.80
+PESO_VELOCIDAD = 0.20
+
+# (palabras por minuto mínimas, puntaje de velocidad), de mayor a menor
+UMBRALES_VELOCIDAD = [(230, 100), (150, 75)]
+PUNTAJE_VELOCIDAD_BAJO = 50
+
+# (porcentaje mínimo, nivel), de mayor a menor
+NIVELES = [
+    (90, "Alto (Comprensión profunda)"),
+    (60, "Medio (Comprensión adecuada)"),
+    (30, "Bajo (Comprensión superficial)"),
+    (0, "Deficiente (No comprensión)"),
+]
+SIN_EVALUAR = "Sin evaluar"
+
+
+def calcular_puntaje(inf):
+    return PUNTAJE_INFERENCIA.get(inf, 0)
+
+
+def calcular_porcentaje(prom):
+    return (prom / VAL_MAX) * 100 if prom is not None else 0
+
+
+def puntaje_velocidad(ppm):
+    ppm = ppm or 0
+    for minimo, puntaje in UMBRALES_VELOCIDAD:
+        if ppm >= minimo:
+            return puntaje
+    return PUNTAJE_VELOCIDAD_BAJO
+
+
+def puntaje_ponderado(puntaje, ppm):
+    """Puntaje final (0-100) de una evaluación individual."""
+    return calcular_porcentaje(puntaje) * PESO_INFERENCIA + puntaje_velocidad(ppm) * PESO_VELOCIDAD
+
+
+def nivel_comprension(porcentaje):
+    for minimo, nivel in NIVELES:
+        if porcentaje >= minimo:
+            return nivel
+    return NIVELES[-1][1]
+
+
+def etiqueta_nivel(porcentaje):
+    """Nivel con el porcentaje, ej. 'Medio (Comprensión adecuada) - 72%'."""
+    return f"{nivel_comprension(porcentaje)} - {int(porcentaje)}%"
@@ -0,0 +1,125 @@
+"""
+Registro de recursos pesados (spaCy, clasificador BERT).
+
+Cada recurso se carga UNA vez por proceso, la primera vez que se pide, detrás
+de un candado propio; así `manage.py migrate`, `shell` o cualquier comando que
+no los use arrancan sin pagar segundos ni cientos de MB. Los workers web
+pueden precargarlos al arrancar (PRECARGAR_RECURSOS, ver sistemagccl/wsgi.py)
+y `reporte()` dice qué se cargó, cuánto tardó y cuánta memoria sumó.
+"""
+
+import os
+import threading
+from datetime import datetime
+from time import perf_counter
+
+
+def _rss_mb():
+    """Memoria residente actual del proceso en MB (solo Linux; None en otros sistemas)."""
+    try:
+        with open("/proc/self/statm") as f:
+            paginas = int(f.read().split()[1])
+        return paginas * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return None
+
+
+class RegistroRecursos:
+    def __init__(self):
+        self._cargadores = {}
+        self._recursos = {}
+        self._locks = {}
+        self._reporte = {}
+
+    def registrar(self, nombre, cargador):
+        self._cargadores[nombre] = cargador
+        self._locks[nombre] = threading.Lock()
+
+    def cargado(self, nombre):
+        return nombre in self._recursos
+
+    def obtener(self, nombre):
+        if nombre in self._recursos:
+            return self._recursos[nombre]
+        with self._locks[nombre]:
+            if nombre not in self._recursos:
+                rss_antes, inicio = _rss_mb(), perf_counter()
+                try:
+                    recurso = self._cargadores[nombre]()
+                except Exception as e:
+                    self._reporte[nombre] = {"recurso": nombre, "cargado": False, "error": str(e)}
+                    raise
+                rss_despues = _rss_mb()
+                self._reporte[nombre] = {
+                    "recurso": nombre,
+                    "cargado": True,
+                    "segundos": round(perf_counter() - inicio, 3),
+                    "rss_mb": round(rss_despues - rss_antes, 1) if rss_antes is not None else None,
+                    "pid": os.getpid(),
+                    "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                }
+                self._recursos[nombre] = recurso
+        return self._recursos[nombre]
+
+    def precargar(self, nombres=None):
+        """Carga los recursos indicados (todos si es None); un fallo no detiene a los demás."""
+        for nombre in (nombres or list(self._cargadores)):
+            if nombre not in self._cargadores:
+                print(f"ADVERTENCIA: recurso desconocido en la precarga: {nombre!r}")
+                continue
+            try:
+                self.obtener(nombre)
+            except Exception as e:
+                print(f"ADVERTENCIA: no se pudo precargar '{nombre}': {e}")
+        return self.reporte()
+
+    def reporte(self):
+        return [
+            self._reporte.get(nombre, {"recurso": nombre, "cargado": False})
+            for nombre in self._cargadores
+        ]
+
+
+def _cargar_spacy():
+    import spacy
+    return spacy.load("es_core_news_md")
+
+
+def _cargar_clasificador():
+    from .inferencia.servicio import modelo_local
+    modelo_local.obtener()
+    return modelo_local
+
+
+registro = RegistroRecursos()
+registro.registrar("spacy_es", _cargar_spacy)
+registro.registrar("clasificador", _cargar_clasificador)
+
+
+def obtener_nlp():
+    """Pipeline de spaCy en español (es_core_news_md)."""
+    return registro.obtener("spacy_es")
+
+
+def formatear_reporte(filas):
+    lineas = []
+    for r in filas:
+        if r.get("cargado"):
+            rss = f", +{r['rss_mb']} MB" if r.get("rss_mb") is not None else ""
+            lineas.append(f"  {r['recurso']}: {r['segundos']}s{rss}")
+        elif r.get("error"):
+            lineas.append(f"  {r['recurso']}: ERROR {r['error']}")
+        else:
+            lineas.append(f"  {r['recurso']}: no cargado (se cargará al primer uso)")
+    return "\n".join(lineas)
+
+
+def precargar_configurados():
+    """Hook para los workers web: precarga lo que diga PRECARGAR_RECURSOS e imprime el reporte."""
+    from django.conf import settings
+    nombres = [n for n in getattr(settings, "PRECARGAR_RECURSOS", []) if n]
+    if not nombres:
+        return []
+    filas = registro.precargar(nombres)
+    print(f"Recursos precargados (pid {os.getpid()}):\n{formatear_reporte(filas)}")
+    return filas
@@ -0,0 +1,213 @@
+"""
+Resumen por usuario y tipo de texto (EvaluacionLectura).
+
+guardar_respuesta ya no relee el historial del alumno: cada respuesta suma su
+puntaje ponderado y su tipo de inferencia a los acumulados del resumen, dentro
+de la misma transacción que guarda la evaluación. `reconstruir` los recalcula
+desde EvaluacionLecturaIndividual (manage.py reconstruir_resumenes).
+
+`resumen_por_tipo` y `estadisticas_por_alumno` son los resúmenes de las vistas
+de administración, calculados en la base de datos con una sola consulta agrupada.
+`resultados_usuario` arma la página de resultados del alumno con dos consultas.
+"""
+
+from django.db import transaction
+from django.db.models import Case, Count, ExpressionWrapper, F, FloatField, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from . import vista_admin
+from .inferencia import CLASS_NAMES
+from .puntuacion import (
+    SIN_EVALUAR, TIPOS_TEXTO, VAL_MAX, calcular_porcentaje, etiqueta_nivel, puntaje_ponderado, nivel_comprension,
+)
+
+
+def campo_conteo(tipo_inferencia):
+    """Campo de EvaluacionLectura que cuenta ese tipo de inferencia (None si no es una clase conocida)."""
+    return f"conteo_{tipo_inferencia}" if tipo_inferencia in CLASS_NAMES else None
+
+
+def registrar_respuesta(evaluacion):
+    """Suma una evaluación recién respondida al resumen de su usuario y tipo. O(1)."""
+    from .models import EvaluacionLectura
+
+    with transaction.atomic():
+        # La fila queda bloqueada hasta el final de la transacción: dos envíos
+        # simultáneos del mismo alumno no pierden incrementos
+        resumen, _ = EvaluacionLectura.objects.select_for_update().get_or_create(
+            usuario_id=evaluacion.usuario_id,
+            tipo_texto=evaluacion.tipo_texto,
+        )
+        resumen.textos_leidos += 1
+        resumen.suma_ponderada += puntaje_ponderado(evaluacion.puntaje, evaluacion.palabras_por_minuto)
+        campos = ["textos_leidos", "suma_ponderada", "porcentaje", "nivel_comprension"]
+        campo = campo_conteo(evaluacion.tipo_inferencia)
+        if campo:
+            setattr(resumen, campo, getattr(resumen, campo) + 1)
+            campos.append(campo)
+        resumen.porcentaje = resumen.suma_ponderada / resumen.textos_leidos
+        resumen.nivel_comprension = nivel_comprension(resumen.porcentaje)
+        resumen.save(update_fields=campos)
+
+        # Estadísticas globales (VistaAdmin): ¿es la primera evaluación puntuada del alumno?
+        primera_del_tipo = resumen.textos_leidos == 1
+        primera_global = primera_del_tipo and not EvaluacionLectura.objects.filter(
+            usuario_id=evaluacion.usuario_id, textos_leidos__gt=0
+        ).exclude(pk=resumen.pk).exists()
+        vista_admin.registrar_respuesta(evaluacion, primera_del_tipo, primera_global)
+    return resumen
+
+
+def reconstruir(modelo_resumen=None, modelo_individual=None):
+    """
+    Recalcula todos los resúmenes desde cero. Recibe los modelos para poder
+    usarse también desde una migración (con apps.get_model). Devuelve el
+    número de resúmenes escritos.
+    """
+    if modelo_resumen is None or modelo_individual is None:
+        from .models import EvaluacionLectura, EvaluacionLecturaIndividual
+        modelo_resumen, modelo_individual = EvaluacionLectura, EvaluacionLecturaIndividual
+
+    acumulados = {}
+    filas = modelo_individual.objects.filter(puntaje__isnull=False).values_list(
+        "usuario_id", "tipo_texto", "puntaje", "palabras_por_minuto", "tipo_inferencia"
+    )
+    for usuario_id, tipo_texto, puntaje, ppm, tipo_inferencia in filas.iterator(chunk_size=2000):
+        acc = acumulados.setdefault((usuario_id, tipo_texto), {
+            "textos_leidos": 0, "suma_ponderada": 0.0, **{f"conteo_{c}": 0 for c in CLASS_NAMES}
+        })
+        acc["textos_leidos"] += 1
+        acc["suma_ponderada"] += puntaje_ponderado(puntaje, ppm)
+        campo = campo_conteo(tipo_inferencia)
+        if campo:
+            acc[campo] += 1
+
+    vacio = {"textos_leidos": 0, "suma_ponderada": 0.0, **{f"conteo_{c}": 0 for c in CLASS_NAMES}}
+    with transaction.atomic():
+        existentes = set(modelo_resumen.objects.values_list("usuario_id", "tipo_texto"))
+        nuevos = []
+        for clave in existentes | set(acumulados):
+            valores = dict(acumulados.get(clave, vacio))
+            valores["porcentaje"] = (
+                valores["suma_ponderada"] / valores["textos_leidos"] if valores["textos_leidos"] else 0
+            )
+            valores["nivel_comprension"] = nivel_comprension(valores["porcentaje"])
+            usuario_id, tipo_texto = clave
+            if clave in existentes:
+                modelo_resumen.objects.filter(usuario_id=usuario_id, tipo_texto=tipo_texto).update(**valores)
+            else:
+                nuevos.append(modelo_resumen(usuario_id=usuario_id, tipo_texto=tipo_texto, **valores))
+        modelo_resumen.objects.bulk_create(nuevos, batch_size=1000)
+    return len(existentes | set(acumulados))
+
+
+def resumen_por_tipo(evaluaciones=None):
+    """
+    Lista con un dict por tipo de texto (en el orden de TIPOS_TEXTO):
+    tipo, cantidad (evaluaciones iniciadas), suma (puntos obtenidos),
+    porcentaje (promedio de puntos por evaluación sobre VAL_MAX) y evaluado.
+    Una sola consulta GROUP BY tipo_texto.
+    """
+    if evaluaciones is None:
+        from .models import EvaluacionLecturaIndividual
+        evaluaciones = EvaluacionLecturaIndividual.objects.all()
+
+    filas = {
+        f["tipo_texto"]: f
+        for f in evaluaciones.filter(tipo_texto__in=TIPOS_TEXTO)
+        .values("tipo_texto")
+        .annotate(cantidad=Count("id"), suma=Sum("puntaje"))
+        .order_by()
+    }
+    resumen = []
+    for tipo in TIPOS_TEXTO:
+        fila = filas.get(tipo, {})
+        cantidad = fila.get("cantidad", 0)
+        suma = fila.get("suma") or 0
+        resumen.append({
+            "tipo": tipo,
+            "cantidad": cantidad,
+            "suma": suma,
+            "porcentaje": calcular_porcentaje(suma / cantidad) if cantidad else 0,
+            "evaluado": cantidad > 0,
+        })
+    return resumen
+
+
+def estadisticas_por_alumno(usuarios=None):
+    """
+    Anota cada RegistroUsuarios con textos (evaluaciones iniciadas), puntaje
+    (puntos obtenidos) y porcentaje (promedio sobre VAL_MAX, 0 sin textos),
+    todo en la misma consulta, así que se puede ordenar y paginar por ellos.
+    """
+    if usuarios is None:
+        from .models import RegistroUsuarios
+        usuarios = RegistroUsuarios.objects.all()
+
+    return usuarios.annotate(
+        textos=Count("evaluacionlecturaindividual"),
+        puntaje=Coalesce(Sum("evaluacionlecturaindividual__puntaje"), Value(0)),
+    ).annotate(
+        porcentaje=Case(
+            When(textos__gt=0, then=ExpressionWrapper(
+                F("puntaje") * 100.0 / (F("textos") * VAL_MAX), output_field=FloatField()
+            )),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    )
+
+
+def _etiqueta_inferencia(tipo):
+    if tipo == "no_inferencia_sinsentido":
+        return "No inferencia: sin sentido"
+    if tipo == "no_inferencia_parafrasis":
+        return "No inferencia: paráfrasis"
+    return tipo.capitalize()
+
+
+def resultados_usuario(usuario_id):
+    """
+    Contexto de la página de resultados del alumno (tabla_resultados.html) en
+    dos consultas: sus resúmenes por tipo, y en una sola lectura de
+    EvaluacionLecturaIndividual sus evaluaciones pendientes junto con la
+    última que tiene inferencia. Solo valores simples, para poder cachearlo.
+    """
+    from .models import EvaluacionLectura, EvaluacionLecturaIndividual
+
+    resumenes = {
+        tipo: (textos, porcentaje or 0)
+        for tipo, textos, porcentaje in EvaluacionLectura.objects.filter(usuario_id=usuario_id)
+        .values_list("tipo_texto", "textos_leidos", "porcentaje")
+    }
+    resultados = []
+    for tipo in TIPOS_TEXTO:
+        if tipo in resumenes:
+            total, porcentaje = resumenes[tipo]
+            resultados.append({"tipo": tipo, "cantidad": total, "nivel": etiqueta_nivel(porcentaje)})
+        else:
+            resultados.append({"tipo": tipo, "cantidad": 0, "nivel": SIN_EVALUAR})
+
+    ultima = (
+        EvaluacionLecturaIndividual.objects.filter(usuario_id=usuario_id, tipo_inferencia__isnull=False)
+        .order_by("-fecha_lectura").values("id")[:1]
+    )
+    filas = EvaluacionLecturaIndividual.objects.filter(usuario_id=usuario_id).filter(
+        Q(respuesta_usuario__isnull=True) | Q(id=Subquery(ultima))
+    ).values("id", "tipo_texto", "respuesta_usuario", "tipo_inferencia", "fecha_lectura",
+             "palabras_por_minuto", "tiempo_lectura_segundos")
+
+    pendientes = set()
+    ultima_eval = None
+    for f in filas:
+        if f["respuesta_usuario"] is None:
+            pendientes.add(f["tipo_texto"])
+        if f["tipo_inferencia"] and (ultima_eval is None or f["fecha_lectura"] > ultima_eval["fecha_lectura"]):
+            ultima_eval = f
+
+    return {
+        "resultados": resultados,
+        "ultima_inferencia": _etiqueta_inferencia(ultima_eval["tipo_inferencia"]) if ultima_eval else SIN_EVALUAR,
+        "pendientes": [tipo for tipo in TIPOS_TEXTO if tipo in pendientes],
+        "ultima_eval": ultima_eval,
+    }
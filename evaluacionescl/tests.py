@@ -1,3 +1,837 @@
+from unittest import skipUnless
+
+from django.db import connection
 from django.test import TestCase
+from django.urls import reverse
+
+from .models import RegistroUsuarios, EvaluacionLecturaIndividual
+
+
+def crear_alumnos(cantidad, desde=0, evaluaciones=3):
+    for i in range(desde, desde + cantidad):
+        usuario = RegistroUsuarios.objects.create(
+            nombre=f"Alumno{i:03d}", apellido="Prueba", edad=20,
+            matricula=f"M{i:05d}", cuatrimestre="1", sexo="O", contrasena="x",
+        )
+        EvaluacionLecturaIndividual.objects.bulk_create([
+            EvaluacionLecturaIndividual(
+                usuario=usuario, tipo_texto="Narrativo", titulo_lectura=f"texto_{j}.pdf",
+                respuesta_usuario="r", puntaje=(i + j) % 4,
+            )
+            for j in range(evaluaciones)
+        ])
+
+
+class AdminEstadisticasTests(TestCase):
+    # Sesión + conteo del paginador + página anotada
+    PRESUPUESTO_CONSULTAS = 3
+
+    def setUp(self):
+        sesion = self.client.session
+        sesion["admin_id"] = 1
+        sesion.save()
+
+    def test_presupuesto_de_consultas_no_crece_con_los_alumnos(self):
+        crear_alumnos(10)
+        with self.assertNumQueries(self.PRESUPUESTO_CONSULTAS):
+            self.client.get(reverse("admin_estadisticas"))
+
+        crear_alumnos(60, desde=10)
+        with self.assertNumQueries(self.PRESUPUESTO_CONSULTAS):
+            respuesta = self.client.get(reverse("admin_estadisticas"), {"orden": "-puntaje", "page": 2})
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_totales_y_orden(self):
+        crear_alumnos(5)
+        RegistroUsuarios.objects.create(
+            nombre="Sin", apellido="Lecturas", edad=20, matricula="M99999",
+            cuatrimestre="1", sexo="O", contrasena="x",
+        )
+        respuesta = self.client.get(reverse("admin_estadisticas"), {"orden": "-puntaje"})
+        resultados = respuesta.context["resultados"]
+
+        puntajes = [r["puntaje"] for r in resultados]
+        self.assertEqual(puntajes, sorted(puntajes, reverse=True))
+
+        por_matricula = {r["matricula"]: r for r in resultados}
+        # Alumno 1: puntajes 1, 2, 3 -> 6 de 9 posibles = 66%
+        self.assertEqual(por_matricula["M00001"]["textos"], 3)
+        self.assertEqual(por_matricula["M00001"]["puntaje"], 6)
+        self.assertEqual(por_matricula["M00001"]["nivel"], "Medio (Comprensión adecuada) - 66%")
+        self.assertEqual(por_matricula["M99999"]["nivel"], "Sin evaluar")
+
+    def test_paginacion_y_orden_invalido(self):
+        crear_alumnos(55)
+        respuesta = self.client.get(reverse("admin_estadisticas"), {"orden": "contrasena", "page": 2})
+        self.assertEqual(respuesta.context["orden"], "nombre")
+        self.assertEqual(len(respuesta.context["resultados"]), 5)
+
+
+def estado_vista_admin():
+    from .models import VistaAdmin
+    return sorted(VistaAdmin.objects.values_list(
+        "tipo_texto", "cuatrimestre", "sexo", "textos_total", "evaluadas_total",
+        "puntaje_total", "usuarios_total", "nivel_comprension_global",
+    ))
+
+
+class VistaAdminTests(TestCase):
+    def estado(self):
+        return estado_vista_admin()
+
+    def test_incremental_coincide_con_reconstruccion(self):
+        from . import vista_admin
+        from .resumenes import registrar_respuesta
+
+        alumnos = [
+            RegistroUsuarios.objects.create(
+                nombre=f"A{i}", apellido="B", edad=20, matricula=f"V{i}",
+                cuatrimestre=str(1 + i % 2), sexo="MF"[i % 2], contrasena="x",
+            )
+            for i in range(4)
+        ]
+        for i, alumno in enumerate(alumnos):
+            for j, tipo in enumerate(["Narrativo", "Expositivo", "Narrativo"]):
+                evaluacion = EvaluacionLecturaIndividual.objects.create(
+                    usuario=alumno, tipo_texto=tipo, titulo_lectura=f"t{j}.pdf")
+                vista_admin.registrar_inicio(evaluacion)
+                if (i + j) % 3:  # algunas quedan pendientes
+                    evaluacion.respuesta_usuario = "r"
+                    evaluacion.puntaje = (i + j) % 4
+                    evaluacion.tipo_inferencia = "asociativa"
+                    evaluacion.save()
+                    registrar_respuesta(evaluacion)
+
+        vista_admin.descontar_usuario(alumnos[0])
+        alumnos[0].delete()
+
+        incremental = self.estado()
+        vista_admin.reconstruir()
+        self.assertEqual(incremental, self.estado())
+        self.assertEqual(vista_admin.usuarios_activos(), 3)
+
+
+class AcumuladosIncrementalesTests(TestCase):
+    """Respuestas y bajas por las vistas: los acumulados deben quedar igual que una reconstrucción."""
+
+    def setUp(self):
+        from unittest import mock
+        from .inferencia import CLASS_NAMES
+        from .models import Lectura
+
+        for n, tipo in enumerate(["Narrativo", "Expositivo", "Narrativo", "Descriptivo"]):
+            lectura = Lectura.objects.create(titulo=f"texto {n}", tipo_texto=tipo,
+                                             archivo_pdf=f"bancotext/{tipo}/texto_{n}.pdf", conteo_palabras=200 + 40 * n)
+            lectura.fragmentos.create(orden=0, texto=f"Fragmento {n}.")
+
+        # (cuatrimestre, sexo): el último alumno está solo en su grupo
+        grupos = [("1", "M"), ("1", "M"), ("2", "F"), ("2", "F"), ("3", "O")]
+        self.alumnos = [
+            RegistroUsuarios.objects.create(nombre=f"A{i}", apellido="B", edad=20, matricula=f"R{i}",
+                                            cuatrimestre=c, sexo=s, contrasena="x")
+            for i, (c, s) in enumerate(grupos)
+        ]
+        clases = iter(CLASS_NAMES * 10)
+        with mock.patch("evaluacionescl.views.evaluacion_views.classify_inference",
+                        side_effect=lambda s, i: (next(clases), None)):
+            for i, alumno in enumerate(self.alumnos):
+                sesion = self.client.session
+                sesion["usuario_id"] = alumno.id
+                sesion.save()
+                for n, tipo in enumerate(["Narrativo", "Expositivo", "Narrativo", "Descriptivo"]):
+                    if (i + n) % 4 == 3:
+                        continue  # lectura no iniciada
+                    self.client.get(reverse("mostrar_fragmento"), {"tipo": tipo, "titulo": f"texto_{n}.pdf"})
+                    if (i + n) % 4 == 2:
+                        continue  # iniciada y pendiente
+                    evaluacion = EvaluacionLecturaIndividual.objects.get(
+                        usuario=alumno, titulo_lectura=f"texto_{n}.pdf")
+                    self.client.post(reverse("guardar_respuesta"), {
+                        "evaluacion_id": evaluacion.id, "respuesta": "Mi respuesta.",
+                        "tiempo_lectura": str(20 + 15 * ((i + n) % 5)),
+                    })
+
+        sesion = self.client.session
+        sesion["admin_id"] = 1
+        sesion.save()
+        for alumno in (self.alumnos[0], self.alumnos[4]):
+            self.client.post(reverse("eliminar_usuario", args=[alumno.id]))
+
+    def test_resumenes_coinciden_con_reconstruccion(self):
+        from .models import EvaluacionLectura
+        from .resumenes import reconstruir
+
+        campos = [f.name for f in EvaluacionLectura._meta.fields if f.name != "id"]
+        incremental = sorted(EvaluacionLectura.objects.values_list(*campos))
+        self.assertEqual(len(incremental), 6)  # 3 alumnos restantes x 2 tipos respondidos
+        self.assertEqual(EvaluacionLecturaIndividual.objects.filter(puntaje__isnull=False).count(),
+                         sum(r.textos_leidos for r in EvaluacionLectura.objects.all()))
+
+        reconstruir()
+        reconstruido = sorted(EvaluacionLectura.objects.values_list(*campos))
+        self.assertEqual(len(incremental), len(reconstruido))
+        for antes, despues in zip(incremental, reconstruido):
+            for campo, a, b in zip(campos, antes, despues):
+                if isinstance(a, float):
+                    self.assertAlmostEqual(a, b, msg=campo)
+                else:
+                    self.assertEqual(a, b, campo)
+
+    def test_vista_admin_coincide_con_reconstruccion(self):
+        from . import vista_admin
+
+        incremental = estado_vista_admin()
+        # El grupo del alumno eliminado que estaba solo no deja filas en cero
+        self.assertNotIn("3", {fila[1] for fila in incremental})
+        vista_admin.reconstruir()
+        self.assertEqual(incremental, estado_vista_admin())
+        self.assertEqual(vista_admin.usuarios_activos(), 3)
+
+
+class ExportacionesTests(TestCase):
+    def test_estadisticas_excel_en_una_consulta(self):
+        import io
+        import openpyxl
+
+        crear_alumnos(30)
+        # Una sola consulta anotada (sin N+1 por alumno)
+        with self.assertNumQueries(1):
+            respuesta = self.client.get(reverse("exportar_estadisticas_excel"))
+            contenido = b"".join(respuesta.streaming_content)
+
+        hoja = openpyxl.load_workbook(io.BytesIO(contenido)).active
+        filas = list(hoja.iter_rows(values_only=True))
+        self.assertEqual(len(filas), 31)
+        self.assertEqual(filas[2], ("Alumno001 Prueba", "M00001", 3, 6, 66, "Medio (Comprensión adecuada)"))
+
+
+class TrabajosExportacionTests(TestCase):
+    def setUp(self):
+        import tempfile
+        from django.test import override_settings
+
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(EXPORTACIONES_DIR=directorio.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def test_deduplica_y_cachea_hasta_que_cambian_los_datos(self):
+        from . import trabajos_exportacion, vista_admin
+
+        crear_alumnos(3)
+        vista_admin.reconstruir()
+
+        trabajo, creado = trabajos_exportacion.solicitar("estadisticas_alumnos", "csv")
+        self.assertTrue(creado)
+        # En cola: el mismo pedido no crea otro trabajo
+        self.assertEqual(trabajos_exportacion.solicitar("estadisticas_alumnos", "csv"), (trabajo, False))
+
+        trabajos_exportacion.ejecutar(trabajos_exportacion.tomar_siguiente())
+        trabajo.refresh_from_db()
+        self.assertEqual((trabajo.estado, trabajo.filas), ("terminado", 3))
+        # Terminado y sin cambios en los datos: se reutiliza el archivo
+        self.assertEqual(trabajos_exportacion.solicitar("estadisticas_alumnos", "csv"), (trabajo, False))
+
+        crear_alumnos(1, desde=3)
+        nuevo, creado = trabajos_exportacion.solicitar("estadisticas_alumnos", "csv")
+        self.assertTrue(creado)
+        trabajos_exportacion.ejecutar(trabajos_exportacion.tomar_siguiente())
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.estado, "caducado")
+
+
+class ExportacionEvaluacionesTests(TestCase):
+    def test_paginas_por_clave_y_filtros(self):
+        from .exportaciones import filas_evaluaciones, filtros_evaluaciones
+
+        crear_alumnos(5, evaluaciones=3)
+        EvaluacionLecturaIndividual.objects.filter(titulo_lectura="texto_0.pdf").update(tipo_texto="Expositivo")
+
+        # 15 filas en páginas de 4: 4 consultas (la última página viene incompleta)
+        with self.assertNumQueries(4):
+            filas = list(filas_evaluaciones(tamano_pagina=4))
+        ids = [f[0] for f in filas]
+        self.assertEqual(ids, sorted(EvaluacionLecturaIndividual.objects.values_list("id", flat=True)))
+
+        filtrados = list(filas_evaluaciones(filtros_evaluaciones(tipo_texto="Expositivo"), tamano_pagina=2))
+        self.assertEqual(len(filtrados), 5)
+        self.assertEqual(list(filas_evaluaciones(filtros_evaluaciones(hasta="2000-01-01"))), [])
+        with self.assertRaises(ValueError):
+            filtros_evaluaciones(desde="ayer")
+
+    def test_vista_csv_en_streaming(self):
+        import csv
+        import io
+
+        crear_alumnos(2, evaluaciones=2)
+        sesion = self.client.session
+        sesion["admin_id"] = 1
+        sesion.save()
+
+        respuesta = self.client.get(reverse("exportar_evaluaciones"), {"tipo_texto": "Narrativo"})
+        self.assertTrue(respuesta.streaming)
+        contenido = b"".join(respuesta.streaming_content).decode("utf-8-sig")
+        filas = list(csv.reader(io.StringIO(contenido)))
+        self.assertEqual(len(filas), 5)
+        self.assertEqual(filas[1][12:], ["M00000", "20", "O", "1"])
+
+        respuesta = self.client.get(reverse("exportar_evaluaciones"), {"desde": "31-12-2024"})
+        self.assertEqual(respuesta.status_code, 400)
+
+
+class CatalogoLecturasTests(TestCase):
+    def setUp(self):
+        import tempfile
+        from django.test import override_settings
+        from . import catalogo
+
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(MEDIA_ROOT=directorio.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.media = directorio.name
+        catalogo.invalidar()
+        self.addCleanup(catalogo.invalidar)
+
+    def test_lectura_con_ruta_anterior_sigue_ofreciendose(self):
+        from . import catalogo
+        from .models import Lectura
+
+        Lectura.objects.create(titulo="viejo", tipo_texto="Narrativo", archivo_pdf="bancotext/viejo.pdf")
+        Lectura.objects.create(titulo="nuevo", tipo_texto="Narrativo", archivo_pdf="bancotext/Narrativo/nuevo.pdf")
+        Lectura.objects.create(titulo="otro", tipo_texto="Expositivo", archivo_pdf="bancotext/otro.pdf")
+        self.assertEqual(catalogo.archivos("Narrativo"), {"viejo.pdf", "nuevo.pdf"})
+
+        usuario = RegistroUsuarios.objects.create(
+            nombre="A", apellido="B", edad=20, matricula="C1", cuatrimestre="1", sexo="O", contrasena="x")
+        sesion = self.client.session
+        sesion.update({"usuario_id": usuario.id, "tipo_texto": "Expositivo"})
+        sesion.save()
+        respuesta = self.client.get(reverse("mostrar_texto_pdf"))
+        self.assertEqual(respuesta.context["titulo"], "otro.pdf")
+
+    def test_migracion_mueve_los_pdfs_a_la_carpeta_del_tipo(self):
+        import importlib
+        import os
+        from django.apps import apps
+        from .models import Lectura
+
+        migracion = importlib.import_module("evaluacionescl.migrations.0019_mover_lecturas_a_carpeta_por_tipo")
+        os.makedirs(f"{self.media}/bancotext")
+        with open(f"{self.media}/bancotext/viejo.pdf", "wb") as f:
+            f.write(b"%PDF")
+        viejo = Lectura.objects.create(titulo="viejo", tipo_texto="Narrativo", archivo_pdf="bancotext/viejo.pdf")
+        perdido = Lectura.objects.create(titulo="perdido", tipo_texto="Narrativo", archivo_pdf="bancotext/perdido.pdf")
+
+        migracion.mover_a_carpeta_por_tipo(apps, None)
+        viejo.refresh_from_db()
+        perdido.refresh_from_db()
+        self.assertEqual(viejo.archivo_pdf.name, "bancotext/Narrativo/viejo.pdf")
+        self.assertTrue(os.path.exists(f"{self.media}/bancotext/Narrativo/viejo.pdf"))
+        self.assertFalse(os.path.exists(f"{self.media}/bancotext/viejo.pdf"))
+        # Sin archivo en disco la fila queda como estaba
+        self.assertEqual(perdido.archivo_pdf.name, "bancotext/perdido.pdf")
+
+
+class PlanesEvaluaciones:
+    """Los planes (EXPLAIN) de las consultas de las vistas usan los índices de EvaluacionLecturaIndividual."""
+
+    TABLA = EvaluacionLecturaIndividual._meta.db_table
+    PENDIENTES = "eval_ind_pendientes"  # índice que atiende la búsqueda de la evaluación pendiente
+
+    def setUp(self):
+        crear_alumnos(3, evaluaciones=4)
+        self.usuario = RegistroUsuarios.objects.get(matricula="M00001")
+        EvaluacionLecturaIndividual.objects.create(
+            usuario=self.usuario, tipo_texto="Narrativo", titulo_lectura="pendiente.pdf",
+            fragmento="Había una vez.", instruccion="Lee",
+        )
+        sesion = self.client.session
+        sesion.update({"usuario_id": self.usuario.id, "tipo_texto": "Narrativo", "admin_id": 1})
+        sesion.save()
+
+    def planes(self, url, parametros=None):
+        """Recorre la vista y devuelve el plan de cada consulta sobre la tabla de evaluaciones."""
+        consultas = []
+
+        def capturar(execute, sql, params, many, context):
+            if self.TABLA in sql and " WHERE " in sql:
+                consultas.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capturar):
+            respuesta = self.client.get(url, parametros)
+            if respuesta.streaming:
+                b"".join(respuesta.streaming_content)
+
+        with connection.cursor() as cursor:
+            return [self.explicar(cursor, sql, params) for sql, params in consultas]
+
+    def test_mostrar_texto_pdf(self):
+        # Sin pendiente: busca la pendiente y luego los textos ya leídos del tipo
+        EvaluacionLecturaIndividual.objects.filter(titulo_lectura="pendiente.pdf").delete()
+        self.assertUsaIndices(self.planes(reverse("mostrar_texto_pdf")),
+                              self.PENDIENTES, "eval_ind_usuario_tipo_titulo")
+
+    def test_mostrar_fragmento(self):
+        planes = self.planes(reverse("mostrar_fragmento"), {"tipo": "Narrativo", "titulo": "pendiente.pdf"})
+        self.assertUsaIndices(planes, "eval_ind_usuario_tipo_titulo")
+
+    def test_resultados_usuario(self):
+        self.assertUsaIndices(self.planes(reverse("resultados_usuario")), "eval_ind_usuario_fecha")
+
+    def test_vistas_admin(self):
+        self.assertUsaIndices(self.planes(reverse("ver_resultados_alumno", args=[self.usuario.id])))
+        self.assertUsaIndices(self.planes(reverse("ver_grafica_alumno_tipo", args=[self.usuario.id, "Narrativo"])),
+                              "eval_ind_usuario_tipo_titulo")
+        planes = self.planes(reverse("exportar_evaluaciones"), {"tipo_texto": "Narrativo"})
+        self.assertUsaIndices(planes, "eval_ind_tipo")
+
+    def test_indice_de_pendientes_solo_donde_es_parcial(self):
+        with connection.cursor() as cursor:
+            indices = connection.introspection.get_constraints(cursor, self.TABLA)
+        self.assertEqual("eval_ind_pendientes" in indices, connection.features.supports_partial_indexes)
+
+
+@skipUnless(connection.vendor == "sqlite", "Los planes se leen con EXPLAIN QUERY PLAN de SQLite")
+class IndicesEvaluacionesTests(PlanesEvaluaciones, TestCase):
+    def explicar(self, cursor, sql, params):
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+        return " | ".join(fila[-1] for fila in cursor.fetchall())
+
+    def assertUsaIndices(self, planes, *indices):
+        self.assertTrue(planes)
+        for plan in planes:
+            # Un SCAN sin índice es recorrer la tabla completa
+            self.assertNotRegex(plan, rf"SCAN {self.TABLA}(?! USING)", plan)
+        for indice in indices:
+            self.assertTrue(any(indice in plan for plan in planes), f"{indice} no aparece en {planes}")
+
+    def test_resultados_usuario(self):
+        super().test_resultados_usuario()
+        # La última inferencia sale del índice ya ordenado, sin ordenar en memoria
+        planes = self.planes(reverse("resultados_usuario"))
+        self.assertFalse(any("TEMP B-TREE" in plan for plan in planes), planes)
+
+
+@skipUnless(connection.vendor == "mysql", "Los planes se leen con EXPLAIN de MySQL")
+class IndicesEvaluacionesMySQLTests(PlanesEvaluaciones, TestCase):
+    # Sin índices parciales (migración 0018): la pendiente se busca por el prefijo (usuario, tipo_texto)
+    PENDIENTES = "eval_ind_usuario_tipo_titulo"
+
+    def explicar(self, cursor, sql, params):
+        cursor.execute("EXPLAIN " + sql, params)
+        columnas = [c[0] for c in cursor.description]
+        filas = [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+        return [f for f in filas if f["table"] == self.TABLA]
+
+    def assertUsaIndices(self, planes, *indices):
+        self.assertTrue(planes)
+        # Con tablas de prueba tan chicas el optimizador puede preferir recorrerlas:
+        # se verifica que el índice esté disponible para la consulta, no que se elija
+        candidatos = " ".join(f"{f.get('possible_keys') or ''} {f.get('key') or ''}" for plan in planes for f in plan)
+        for indice in indices:
+            self.assertIn(indice, candidatos, planes)
+
+
+class ResultadosUsuarioTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        crear_alumnos(1, evaluaciones=2)
+        self.usuario = RegistroUsuarios.objects.get()
+        from .resumenes import reconstruir
+        reconstruir()
+        sesion = self.client.session
+        sesion["usuario_id"] = self.usuario.id
+        sesion.save()
+
+    def test_dos_consultas_y_cache_hasta_iniciar_otra(self):
+        EvaluacionLecturaIndividual.objects.filter(titulo_lectura="texto_1.pdf").update(tipo_inferencia="asociativa")
+        EvaluacionLecturaIndividual.objects.create(
+            usuario=self.usuario, tipo_texto="Expositivo", titulo_lectura="p.pdf")
+
+        # Sesión + versión del alumno + resúmenes + pendientes/última inferencia
+        with self.assertNumQueries(4):
+            respuesta = self.client.get(reverse("resultados_usuario"))
+        self.assertEqual(respuesta.context["pendientes"], ["Expositivo"])
+        self.assertEqual(respuesta.context["ultima_inferencia"], "Asociativa")
+        self.assertEqual(respuesta.context["resultados"][3]["cantidad"], 2)
+
+        # Cacheada: solo la sesión y la versión
+        with self.assertNumQueries(2):
+            self.client.get(reverse("resultados_usuario"))
+
+        # Iniciar otra evaluación invalida la caché del alumno
+        from .models import Lectura
+        lectura = Lectura.objects.create(titulo="nuevo", tipo_texto="Narrativo", archivo_pdf="bancotext/Narrativo/nuevo.pdf")
+        lectura.fragmentos.create(orden=0, texto="Había una vez un texto.")
+        self.client.get(reverse("mostrar_fragmento"), {"tipo": "Narrativo", "titulo": "nuevo.pdf"})
+        respuesta = self.client.get(reverse("resultados_usuario"))
+        self.assertEqual(respuesta.context["pendientes"], ["Expositivo", "Narrativo"])
+
+    def test_volver_a_entrar_no_sirve_la_pagina_de_la_sesion_anterior(self):
+        from unittest import mock
+        from .models import Lectura
+
+        self.usuario.set_contrasena("clave")
+        self.usuario.save()
+        lectura = Lectura.objects.create(titulo="nuevo", tipo_texto="Narrativo", archivo_pdf="bancotext/Narrativo/nuevo.pdf")
+        lectura.fragmentos.create(orden=0, texto="Había una vez un texto.")
+
+        self.client.get(reverse("resultados_usuario"))
+        self.client.get(reverse("mostrar_fragmento"), {"tipo": "Narrativo", "titulo": "nuevo.pdf"})
+        respuesta = self.client.get(reverse("resultados_usuario"))
+        self.assertEqual(respuesta.context["pendientes"], ["Narrativo"])
+
+        # logout vacía la sesión; la versión del alumno no vuelve a empezar
+        self.client.get(reverse("logout_usuario"))
+        self.client.post(reverse("login_usuario"), {"matricula": self.usuario.matricula, "contrasena": "clave"})
+        pendiente = EvaluacionLecturaIndividual.objects.get(titulo_lectura="nuevo.pdf")
+        with mock.patch("evaluacionescl.views.evaluacion_views.classify_inference",
+                        return_value=("predictiva", None)):
+            self.client.post(reverse("guardar_respuesta"), {
+                "evaluacion_id": pendiente.id, "respuesta": "Algo pasará.", "tiempo_lectura": "30",
+            })
+
+        respuesta = self.client.get(reverse("resultados_usuario"))
+        self.assertEqual(respuesta.context["pendientes"], [])
+        self.assertEqual(respuesta.context["ultima_inferencia"], "Predictiva")
+
+
+class BitacoraTests(TestCase):
+    def setUp(self):
+        import tempfile
+
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.ruta = f"{directorio.name}/reentrenamiento_log.jsonl"
+
+    def test_anexa_rota_y_lee_lo_mas_nuevo_primero(self):
+        import os
+        from . import bitacora
+
+        for i in range(300):
+            bitacora.registrar(self.ruta, f"línea {i}", origen="entrenamiento" if i % 2 else "orquestador",
+                               max_bytes=4096, conservar=3, paso=i)
+        self.assertTrue(os.path.exists(f"{self.ruta}.1"))
+        self.assertLess(os.path.getsize(self.ruta), 4096 + 200)
+
+        # Una línea cortada por un proceso que murió escribiéndola se ignora
+        with open(self.ruta, "ab") as f:
+            f.write(b'{"fecha": "2025-01-01", "mens')
+
+        recientes = bitacora.leer_recientes(self.ruta, 5, conservar=3)
+        self.assertEqual([e["paso"] for e in recientes], [299, 298, 297, 296, 295])
+        # Continúa en los archivos rotados, en orden
+        pasos = [e["paso"] for e in bitacora.leer_recientes(self.ruta, 1000, conservar=3)]
+        self.assertEqual(pasos, sorted(pasos, reverse=True))
+        self.assertGreater(len(pasos), 60)
+        self.assertEqual([e["paso"] for e in bitacora.leer_recientes(self.ruta, 2, "orquestador", conservar=3)],
+                         [298, 296])
+
+
+class DatasetTokenizadoTests(TestCase):
+    def setUp(self):
+        import tempfile
+
+        try:
+            from transformers import BertTokenizer
+        except ImportError:
+            self.skipTest("transformers no está instalado")
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "el", "perro", "corr", "##ió", "por",
+                 "parque", ".", "estaba", "feliz", "la", "casa"]
+        with open(f"{directorio.name}/vocab.txt", "w", encoding="utf-8") as f:
+            f.write("\n".join(vocab))
+        self.tokenizer = BertTokenizer(f"{directorio.name}/vocab.txt", do_lower_case=False)
+        self.carpeta = f"{directorio.name}/cache_tokens"
+
+    def test_mismos_ids_que_decodificar_y_retokenizar(self):
+        from . import dataset_tokenizado as dt
+
+        sentences = ["el perro corrió por el parque ."] * 2 + ["la casa"]
+        inferences = ["el perro estaba feliz", "feliz " * 20, "la casa ."]
+        cache, nuevas = dt.preparar(self.carpeta, self.tokenizer, sentences, inferences, 16, 6)
+        self.assertEqual((len(cache), nuevas), (3, 3))
+        for n, (s, i) in enumerate(zip(sentences, inferences)):
+            # Lo que hacía entrenar_modelo.py antes: recortar, decodificar y volver a tokenizar el par
+            respuesta = self.tokenizer.decode(
+                dt.truncar_head_tail(self.tokenizer.encode(i, add_special_tokens=False), 6))
+            esperado = self.tokenizer(s, respuesta, truncation="only_first", max_length=16)
+            ids, tipos = cache.fila(n)
+            self.assertEqual(ids.tolist(), esperado["input_ids"])
+            self.assertEqual(tipos.tolist(), esperado["token_type_ids"])
+
+    def test_solo_tokeniza_filas_nuevas(self):
+        from . import dataset_tokenizado as dt
+
+        sentences, inferences = ["el perro", "la casa"], ["feliz", "el parque"]
+        dt.preparar(self.carpeta, self.tokenizer, sentences, inferences, 16, 6)
+        cache, nuevas = dt.preparar(self.carpeta, self.tokenizer, sentences + ["la casa"], inferences + ["."], 16, 6)
+        self.assertEqual((len(cache), nuevas), (3, 1))
+        self.assertEqual(cache.fila(2)[0].tolist(), [2, 14, 15, 3, 11, 3])
+
+        # CSV reordenado: se reconstruye sin volver a tokenizar lo conocido
+        cache, nuevas = dt.preparar(self.carpeta, self.tokenizer, sentences[::-1], inferences[::-1], 16, 6)
+        self.assertEqual((len(cache), nuevas), (2, 0))
+        self.assertEqual(cache.fila(0)[0].tolist(), [2, 14, 15, 3, 5, 10, 3])
+
+        # Otro MAX_LEN cambia la huella: todo se tokeniza de nuevo
+        cache, nuevas = dt.preparar(self.carpeta, self.tokenizer, sentences, inferences, 32, 6)
+        self.assertEqual(nuevas, 2)
+
+
+class AgrupacionPorLongitudTests(TestCase):
+    def test_lotes_cubren_todo_y_rellenan_menos(self):
+        import random
+        from .inferencia.agrupacion import (
+            MuestreadorPorLongitud, eficiencia_relleno, lotes_secuenciales, predecir_por_longitud,
+        )
+
+        azar = random.Random(0)
+        longitudes = [azar.choice([12, 20, 30, 45, 60, 512]) for _ in range(403)]
+        muestreador = MuestreadorPorLongitud(longitudes, 8, tamano_bucket=80, semilla=1)
+        epocas = [list(muestreador), list(muestreador)]
+        for lotes in epocas:
+            self.assertEqual(len(lotes), len(muestreador))
+            self.assertEqual(sorted(n for lote in lotes for n in lote), list(range(403)))
+            self.assertTrue(all(len(lote) <= 8 for lote in lotes))
+        self.assertNotEqual(epocas[0], epocas[1])
+        self.assertGreater(eficiencia_relleno(longitudes, epocas[0]),
+                           eficiencia_relleno(longitudes, lotes_secuenciales(403, 8, semilla=1)) + 0.2)
+
+        # Para clasificar: lotes ordenados, resultado en el orden original
+        vistos = []
+
+        def predecir(sentences, inferences):
+            vistos.append(len(sentences))
+            return [[len(s), len(i)] for s, i in zip(sentences, inferences)]
+
+        sentences = ["x" * n for n in longitudes]
+        probs = predecir_por_longitud(predecir, sentences, ["r"] * 403, tamano_lote=16)
+        self.assertEqual(probs[:, 0].tolist(), longitudes)
+        self.assertEqual(len(vistos), 26)
+
+
+class ClasificadorPorLotesTests(TestCase):
+    def predictor(self, espera=0.0):
+        """Backend falso: la clase de cada par sale del número del fragmento; anota el tamaño de cada lote."""
+        import time
+        import numpy as np
+
+        lotes = []
+
+        def predecir(sentences, inferences):
+            lotes.append(len(sentences))
+            time.sleep(espera)
+            probs = np.zeros((len(sentences), 5), dtype=np.float32)
+            for fila, s in enumerate(sentences):
+                probs[fila, int(s) % 5] = 1.0
+                probs[fila, (int(s) + 1) % 5] = int(s) / 100  # huella del pedido
+            return probs
+
+        return predecir, lotes
+
+    def concurrentes(self, clasificador, cantidad):
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(cantidad) as hilos:
+            return list(hilos.map(lambda n: clasificador.clasificar(str(n), f"respuesta {n}"), range(cantidad)))
+
+    def test_pedidos_concurrentes_en_un_lote_y_en_orden(self):
+        from .inferencia import CLASS_NAMES
+        from .inferencia.lotes import ClasificadorPorLotes
+
+        predecir, lotes = self.predictor()
+        # La ventana es larga: el lote se cierra al llenarse, no por tiempo
+        clasificador = ClasificadorPorLotes(predecir, max_lote=6, ventana_ms=2000)
+        resultados = self.concurrentes(clasificador, 6)
+
+        self.assertEqual(lotes, [6])
+        for n, (etiqueta, probs) in enumerate(resultados):
+            self.assertEqual(etiqueta, CLASS_NAMES[n % 5])
+            self.assertAlmostEqual(float(probs[(n + 1) % 5]), n / 100)
+        metricas = clasificador.metricas()
+        self.assertEqual((metricas["lotes_procesados"], metricas["histograma_lotes"]), (1, {6: 1}))
+
+    def test_max_lote_y_ventana(self):
+        from time import monotonic
+        from .inferencia.lotes import ClasificadorPorLotes
+
+        predecir, lotes = self.predictor()
+        clasificador = ClasificadorPorLotes(predecir, max_lote=4, ventana_ms=200)
+        self.assertEqual(len(self.concurrentes(clasificador, 10)), 10)
+        self.assertEqual(sum(lotes), 10)
+        self.assertLessEqual(max(lotes), 4)
+
+        # Un pedido solo espera la ventana y sale en su propio lote
+        lotes.clear()
+        inicio = monotonic()
+        clasificador.clasificar("3", "r")
+        self.assertGreaterEqual(monotonic() - inicio, 0.2)
+        self.assertEqual(lotes, [1])
+
+    def test_timeout_y_errores_del_backend(self):
+        from .inferencia.lotes import ClasificadorPorLotes
+
+        predecir, _ = self.predictor(espera=0.3)
+        with self.assertRaises(TimeoutError):
+            ClasificadorPorLotes(predecir, ventana_ms=0, timeout=0.05).clasificar("1", "r")
+
+        def fallar(sentences, inferences):
+            raise RuntimeError("backend caído")
+
+        clasificador = ClasificadorPorLotes(fallar, ventana_ms=0)
+        with self.assertRaisesMessage(RuntimeError, "backend caído"):
+            clasificador.clasificar("1", "r")
+        self.assertEqual(clasificador.metricas()["errores"], 1)
+
+
+class CacheClasificacionTests(TestCase):
+    def setUp(self):
+        from .inferencia import cache
+
+        cache._aciertos_pendientes.clear()
+        self.addCleanup(cache._aciertos_pendientes.clear)
+
+    def test_acierto_fallo_y_version(self):
+        from .inferencia import cache
+
+        self.assertIsNone(cache.obtener("Había una vez.", "Un cuento", "v1"))
+        cache.guardar("Había una vez.", "Un cuento", "v1", "asociativa", [0.9, 0.1])
+        # Se normalizan los espacios, no las mayúsculas
+        self.assertEqual(cache.obtener(" Había  una vez. ", "Un cuento", "v1"), ("asociativa", [0.9, 0.1]))
+        self.assertIsNone(cache.obtener("Había una vez.", "un cuento", "v1"))
+        self.assertIsNone(cache.obtener("Había una vez.", "Un cuento", "v2"))
+
+        cache.guardar("Otro.", "Otra", "v2", "predictiva", [0.2, 0.8])
+        self.assertEqual(cache.invalidar_otras_versiones("v2"), 1)
+        self.assertIsNone(cache.obtener("Había una vez.", "Un cuento", "v1"))
+        self.assertIsNotNone(cache.obtener("Otro.", "Otra", "v2"))
+
+    def test_acierto_reciente_no_escribe(self):
+        from datetime import timedelta
+        from django.test import override_settings
+        from django.utils import timezone
+        from .inferencia import cache
+        from .models import CacheClasificacion
+
+        cache.guardar("f", "r", "v1", "asociativa", [1.0])
+        # Solo las dos lecturas, ningún UPDATE
+        with override_settings(INFERENCIA_CACHE_REFRESCO=300), self.assertNumQueries(2):
+            cache.obtener("f", "r", "v1")
+            cache.obtener("f", "r", "v1")
+
+        # Con ultimo_uso viejo se renueva y se suman los aciertos acumulados
+        CacheClasificacion.objects.update(ultimo_uso=timezone.now() - timedelta(hours=1))
+        with override_settings(INFERENCIA_CACHE_REFRESCO=300), self.assertNumQueries(2):
+            cache.obtener("f", "r", "v1")
+        entrada = CacheClasificacion.objects.get()
+        self.assertEqual(entrada.aciertos, 3)
+        self.assertGreater(entrada.ultimo_uso, timezone.now() - timedelta(minutes=1))
+
+    def test_desaloja_las_menos_usadas(self):
+        from datetime import timedelta
+        from django.test import override_settings
+        from django.utils import timezone
+        from .inferencia import cache
+        from .models import CacheClasificacion
+
+        for i in range(5):
+            cache.guardar(f"f{i}", "r", "v1", "asociativa", [1.0])
+        hace = timezone.now() - timedelta(hours=1)
+        for i in range(5):
+            CacheClasificacion.objects.filter(clave=cache.clave_cache(f"f{i}", "r", "v1")).update(
+                ultimo_uso=hace + timedelta(minutes=i))
+        with override_settings(INFERENCIA_CACHE_REFRESCO=0):
+            cache.obtener("f0", "r", "v1")  # la más vieja vuelve a ser la más reciente
+        with override_settings(INFERENCIA_CACHE_MAX=3):
+            self.assertEqual(cache.desalojar(), 2)
+        restantes = {cache.obtener(f"f{i}", "r", "v1") is not None for i in (0, 3, 4)}
+        self.assertEqual(restantes, {True})
+        self.assertIsNone(cache.obtener("f1", "r", "v1"))
+
+    def test_version_publicada_se_lee_cada_intervalo(self):
+        import tempfile
+        from unittest import mock
+        from django.test import override_settings
+        from .inferencia import servicio
+
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        with open(f"{directorio.name}/VERSION", "w", encoding="utf-8") as f:
+            f.write("1")
+        with override_settings(INFERENCIA_MODELO_DIR=directorio.name, INFERENCIA_RECARGA_INTERVALO=60), \
+                mock.patch.object(servicio, "_ultima_version", None), \
+                mock.patch.object(servicio, "_proxima_lectura", 0.0), \
+                mock.patch.object(servicio, "version_modelo", wraps=servicio.version_modelo) as leer:
+            self.assertEqual(servicio.version_publicada(), "VERSION:1")
+            with open(f"{directorio.name}/VERSION", "w", encoding="utf-8") as f:
+                f.write("2")
+            self.assertEqual(servicio.version_publicada(), "VERSION:1")
+            self.assertEqual(leer.call_count, 1)
+
+            servicio._proxima_lectura = 0.0  # pasó el intervalo
+            self.assertEqual(servicio.version_publicada(), "VERSION:2")
+
+
+class ClienteInferenciaTests(TestCase):
+    def setUp(self):
+        import tempfile
+        import threading
+        import time
+        from .inferencia.lotes import ClasificadorPorLotes
+        from .inferencia.servidor import ServidorInferencia
+
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+
+        def predecir_lento(sentences, inferences):
+            time.sleep(0.3)
+            raise AssertionError("no debería llegar a responder")
+
+        # El lote del servidor no termina a tiempo: responde {"ok": false}
+        clasificador = ClasificadorPorLotes(predecir_lento, ventana_ms=0, timeout=0.05)
+        self.servidor = ServidorInferencia(f"{directorio.name}/inferencia.sock", clasificador)
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        self.addCleanup(self.servidor.server_close)
+        self.addCleanup(self.servidor.shutdown)
+
+    def test_error_del_servidor_usa_el_modelo_local_sin_marcarlo_caido(self):
+        from unittest import mock
+        import numpy as np
+        from .inferencia import servicio
+        from .inferencia.cliente import ClienteInferencia, ErrorServidor, ServidorNoDisponible
+
+        cliente = ClienteInferencia(self.servidor.ruta_socket, timeout=5)
+        with self.assertRaises(ErrorServidor):
+            cliente.clasificar("fragmento", "respuesta")
+        self.assertTrue(cliente.disponible())
+
+        # Un timeout del cliente tampoco lo marca como caído
+        lento = ClienteInferencia(self.servidor.ruta_socket, timeout=0.01)
+        with self.assertRaises(ServidorNoDisponible):
+            lento.clasificar("fragmento", "respuesta")
+        self.assertTrue(lento.disponible())
+
+        local = mock.Mock()
+        local.clasificar.return_value = ("asociativa", np.zeros(5))
+        with mock.patch.object(servicio, "cliente", cliente), \
+                mock.patch.object(servicio, "clasificador_lotes", local), \
+                mock.patch.object(servicio, "modelo_local"), \
+                mock.patch.object(servicio, "registro"):
+            etiqueta, _, _ = servicio._clasificar_con_modelo("fragmento", "respuesta")
+        self.assertEqual(etiqueta, "asociativa")
+        local.clasificar.assert_called_once_with("fragmento", "respuesta")
+
+    def test_timeout_del_cliente_cubre_el_lote_del_servidor(self):
+        from django.test import override_settings
+        from .inferencia import servicio
 
-# Create your tests here.
+        with override_settings(INFERENCIA_TIMEOUT=5, INFERENCIA_LOTE_TIMEOUT=30, INFERENCIA_LOTE_VENTANA_MS=10):
+            self.assertGreater(servicio.timeout_cliente(), 30.01)
@@ -0,0 +1,180 @@
+"""
+Procesamiento de los PDFs del banco de textos: extracción, limpieza y
+segmentación en fragmentos de 50-80 palabras.
+
+Los fragmentos se calculan una sola vez, al registrar la Lectura (subir_pdf o
+manage.py procesar_pdfs_existentes), y se guardan en FragmentoLectura; así
+mostrar_fragmento solo tiene que elegir uno al azar de la base de datos.
+
+Cada Lectura guarda además el hash del PDF y el del texto extraído, para que
+el reprocesamiento del banco solo vuelva a extraer los archivos que cambiaron.
+"""
+
+import hashlib
+import os
+import random
+import re
+from time import perf_counter
+
+import fitz
+from django.db import transaction
+
+from .recursos import obtener_nlp
+
+
+def leer_pdf(pdf_path):
+    """Texto completo del PDF, página por página."""
+    with fitz.open(pdf_path) as doc:
+        return "\n".join(pagina.get_text("text") for pagina in doc)
+
+
+def limpiar_texto(texto):
+    # Eliminar URLs
+    texto = re.sub(r'https?://\S+|www\.\S+', '', texto)
+
+    # Eliminar líneas con palabras como Referencias o Bibliografía
+    texto = re.sub(r'(?i)^.*\b(Referencias|Bibliografía)\b.*$', '', texto, flags=re.MULTILINE)
+
+    # Eliminar citas tipo (Apellido, Año)
+    texto = re.sub(r'\([A-Z][a-z]+,\s*\d{4}\)', '', texto)
+
+    # Eliminar referencias estilo científico tipo “2016;569-70:1545-52.”
+    texto = re.sub(r'\d{4};\d+-\d+:\d+-\d+\.?', '', texto)
+
+    # Eliminar nombres largos en mayúsculas (encabezados o instituciones)
+    texto = re.sub(r'^[A-Z\s]{5,}$', '', texto, flags=re.MULTILINE)
+
+    # Eliminar números de página sueltos
+    texto = re.sub(r'^\s*\d+\s*$', '', texto, flags=re.MULTILINE)
+
+    # Compactar texto, quitar saltos innecesarios
+    texto = re.sub(r'\n+', '\n', texto)
+    texto = re.sub(r'\s{2,}', ' ', texto).strip()
+
+    return texto
+
+
+def extraer_texto_limpio(pdf_path):
+    return limpiar_texto(leer_pdf(pdf_path))
+
+
+def segmentar_fragmentos(texto, min_palabras=50, max_palabras=80):
+    """Todos los fragmentos de oraciones completas entre min_palabras y max_palabras."""
+    doc = obtener_nlp()(texto)
+    oraciones = [sent.text.strip() for sent in doc.sents if sent.text.strip()]
+
+    fragmentos = []
+    bloque = []
+    total_palabras = 0
+
+    for oracion in oraciones:
+        palabras = len(oracion.split())
+        if total_palabras + palabras <= max_palabras:
+            bloque.append(oracion)
+            total_palabras += palabras
+        else:
+            if total_palabras >= min_palabras:
+                fragmentos.append(" ".join(bloque))
+            bloque = [oracion]
+            total_palabras = palabras
+
+    if bloque and total_palabras >= min_palabras:
+        fragmentos.append(" ".join(bloque))
+
+    return fragmentos
+
+
+def segmentar_texto(texto, min_palabras=50, max_palabras=80):
+    """Un fragmento al azar del texto ("" si no hay ninguno del tamaño pedido)."""
+    fragmentos = segmentar_fragmentos(texto, min_palabras, max_palabras)
+    return random.choice(fragmentos) if fragmentos else ""
+
+
+def hash_archivo(ruta, bloque=1 << 20):
+    """sha256 del contenido del archivo, leído por bloques."""
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for trozo in iter(lambda: f.read(bloque), b""):
+            h.update(trozo)
+    return h.hexdigest()
+
+
+def hash_texto(texto):
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def procesar_archivo(ruta, hash_contenido_previo="", hash_texto_previo=""):
+    """
+    Procesa un PDF del banco comparando contra los hashes ya guardados:
+
+    - "sin_cambios": el archivo es idéntico, no se abre el PDF.
+    - "mismo_texto": el archivo cambió pero el texto extraído no; no se segmenta.
+    - "procesado": texto nuevo, se devuelven conteo y fragmentos.
+    - "error": el mensaje queda en "error".
+
+    No toca la base de datos (se ejecuta en los procesos del pool); el
+    resultado se aplica después con `aplicar_resultado`.
+    """
+    inicio = perf_counter()
+    resultado = {"ruta": ruta, "estado": "error", "bytes": 0}
+    try:
+        resultado["bytes"] = os.path.getsize(ruta)
+        resultado["hash_contenido"] = hash_archivo(ruta)
+        if resultado["hash_contenido"] == hash_contenido_previo:
+            resultado["estado"] = "sin_cambios"
+        else:
+            texto = leer_pdf(ruta)
+            limpio = limpiar_texto(texto)
+            resultado["hash_texto"] = hash_texto(limpio)
+            resultado["conteo"] = len(texto.split())
+            if resultado["hash_texto"] == hash_texto_previo:
+                resultado["estado"] = "mismo_texto"
+            else:
+                resultado["fragmentos"] = segmentar_fragmentos(limpio)
+                resultado["estado"] = "procesado"
+    except Exception as e:
+        resultado["error"] = str(e)
+    resultado["segundos"] = perf_counter() - inicio
+    return resultado
+
+
+def aplicar_resultado(lectura, resultado):
+    """Guarda en la Lectura lo calculado por `procesar_archivo`."""
+    estado = resultado["estado"]
+    if estado in ("sin_cambios", "error"):
+        return
+    with transaction.atomic():
+        lectura.hash_contenido = resultado["hash_contenido"]
+        lectura.hash_texto = resultado["hash_texto"]
+        lectura.conteo_palabras = resultado["conteo"]
+        lectura.save(update_fields=["hash_contenido", "hash_texto", "conteo_palabras"])
+        if estado == "procesado":
+            guardar_fragmentos(lectura, resultado["fragmentos"])
+
+
+def guardar_fragmentos(lectura, fragmentos):
+    """Reemplaza el conjunto de fragmentos precalculados de la lectura."""
+    from .models import FragmentoLectura
+
+    with transaction.atomic():
+        FragmentoLectura.objects.filter(lectura=lectura).delete()
+        FragmentoLectura.objects.bulk_create([
+            FragmentoLectura(lectura=lectura, orden=i, texto=texto)
+            for i, texto in enumerate(fragmentos)
+        ])
+        lectura.num_fragmentos = len(fragmentos)
+        lectura.save(update_fields=["num_fragmentos"])
+
+
+def fragmento_aleatorio(tipo_texto, titulo_archivo):
+    """
+    Fragmento precalculado al azar para el PDF `titulo_archivo` del tipo dado,
+    en una sola consulta. Devuelve None si la lectura aún no tiene fragmentos.
+    """
+    from .models import FragmentoLectura
+
+    titulo_base = titulo_archivo.replace('.pdf', '').replace('_', ' ')
+    # ORDER BY RAND() solo recorre los fragmentos de UNA lectura (decenas de filas)
+    return FragmentoLectura.objects.filter(
+        lectura__titulo=titulo_base, lectura__tipo_texto=tipo_texto
+    ).order_by("?").values_list("texto", flat=True).first()
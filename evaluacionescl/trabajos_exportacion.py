@@ -0,0 +1,135 @@
+"""
+Exportaciones en segundo plano.
+
+El admin solicita una exportación (`solicitar`) y la vista responde de
+inmediato; un proceso aparte (manage.py procesar_exportaciones) toma los
+trabajos pendientes, escribe el archivo en EXPORTACIONES_DIR y lo marca como
+terminado. El admin consulta el estado y descarga el archivo cuando está listo.
+
+Cada trabajo guarda la huella de los datos al momento de pedirlo
+(`version_datos`). Pedir la misma exportación con la misma huella devuelve
+el trabajo que ya está en curso o, si ya terminó, el archivo existente; en
+cuanto los datos cambian la huella es otra y se arma un archivo nuevo.
+"""
+
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .exportaciones import EXPORTACIONES, Contador, escribir
+
+ACTIVOS = ("pendiente", "en_proceso")
+
+
+def version_datos():
+    """
+    Huella de los datos que alimentan las exportaciones: VistaAdmin cambia con
+    cada evaluación iniciada, respondida o eliminada, y los alumnos nuevos
+    aparecen en el conteo de RegistroUsuarios. Dos consultas de agregación.
+    """
+    from .models import VistaAdmin, RegistroUsuarios
+
+    vista = VistaAdmin.objects.aggregate(n=Count("id"), fecha=Max("fecha_actualizacion"))
+    usuarios = RegistroUsuarios.objects.aggregate(n=Count("id"), ultimo=Max("id"))
+    fecha = vista["fecha"].isoformat() if vista["fecha"] else "-"
+    return f"{vista['n']}:{fecha}:{usuarios['n']}:{usuarios['ultimo'] or 0}"
+
+
+def ruta_archivo(trabajo):
+    return os.path.join(settings.EXPORTACIONES_DIR, trabajo.archivo)
+
+
+def nombre_descarga(trabajo):
+    base = EXPORTACIONES[trabajo.tipo][1]
+    return f"{base}_{trabajo.fecha_creacion:%Y-%m-%d_%H-%M}.{trabajo.formato}"
+
+
+def solicitar(tipo, formato, admin_id=None):
+    """Devuelve (trabajo, creado): uno en curso o terminado con los mismos datos, o uno nuevo pendiente."""
+    from .models import TrabajoExportacion
+
+    if tipo not in EXPORTACIONES:
+        raise ValueError(f"Exportación desconocida: {tipo}")
+
+    version = version_datos()
+    existentes = TrabajoExportacion.objects.filter(
+        tipo=tipo, formato=formato, version_datos=version, estado__in=ACTIVOS + ("terminado",)
+    ).order_by("-id")
+    for trabajo in existentes:
+        if trabajo.estado in ACTIVOS or os.path.exists(ruta_archivo(trabajo)):
+            return trabajo, False
+
+    trabajo = TrabajoExportacion.objects.create(
+        tipo=tipo, formato=formato, version_datos=version, admin_id=admin_id
+    )
+    return trabajo, True
+
+
+def tomar_siguiente():
+    """Marca como 'en_proceso' el pendiente más antiguo y lo devuelve (None si no hay)."""
+    from .models import TrabajoExportacion
+
+    for trabajo in TrabajoExportacion.objects.filter(estado="pendiente").order_by("id")[:10]:
+        # UPDATE condicional: si otro worker lo tomó primero, no cambia ninguna fila
+        tomado = TrabajoExportacion.objects.filter(pk=trabajo.pk, estado="pendiente").update(
+            estado="en_proceso", fecha_inicio=timezone.now()
+        )
+        if tomado:
+            trabajo.refresh_from_db()
+            return trabajo
+    return None
+
+
+def ejecutar(trabajo):
+    """Escribe el archivo del trabajo; deja el estado en 'terminado' o 'error'."""
+    os.makedirs(settings.EXPORTACIONES_DIR, exist_ok=True)
+    trabajo.archivo = f"{trabajo.tipo}_{trabajo.pk}.{trabajo.formato}"
+    destino = ruta_archivo(trabajo)
+    temporal = f"{destino}.tmp"
+    # Huella tomada ANTES de leer los datos: si cambian durante la escritura,
+    # el próximo pedido no reutiliza este archivo
+    trabajo.version_datos = version_datos()
+    try:
+        hojas = EXPORTACIONES[trabajo.tipo][0]()
+        contadores = [Contador(filas) for _, _, filas in hojas]
+        hojas = [(titulo, encabezados, c) for (titulo, encabezados, _), c in zip(hojas, contadores)]
+        escribir(hojas, trabajo.formato, temporal)
+        os.replace(temporal, destino)
+        trabajo.filas = contadores[0].total
+        trabajo.estado = "terminado"
+    except Exception as e:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        trabajo.estado = "error"
+        trabajo.error = str(e)
+    trabajo.fecha_fin = timezone.now()
+    trabajo.save()
+    if trabajo.estado == "terminado":
+        limpiar_anteriores(trabajo)
+    return trabajo
+
+
+def limpiar_anteriores(trabajo):
+    """Borra los archivos de exportaciones iguales con datos más viejos (ya no sirven de caché)."""
+    from .models import TrabajoExportacion
+
+    viejos = TrabajoExportacion.objects.filter(
+        tipo=trabajo.tipo, formato=trabajo.formato, estado="terminado", id__lt=trabajo.id
+    ).exclude(version_datos=trabajo.version_datos)
+    for viejo in viejos:
+        if viejo.archivo and os.path.exists(ruta_archivo(viejo)):
+            os.remove(ruta_archivo(viejo))
+    viejos.update(estado="caducado", archivo="")
+
+
+def reencolar_colgados(minutos):
+    """Trabajos 'en_proceso' desde hace más de `minutos` (worker caído) vuelven a 'pendiente'."""
+    from .models import TrabajoExportacion
+
+    limite = timezone.now() - timedelta(minutes=minutos)
+    return TrabajoExportacion.objects.filter(estado="en_proceso", fecha_inicio__lt=limite).update(
+        estado="pendiente", fecha_inicio=None
+    )
@@ -1,7 +1,7 @@
 from django.urls import path
 from django.conf import settings
 from django.conf.urls.static import static
-from .views import registro_usuario, registro_admin, login_usuario, login_admin, logout_usuario, dashboard_usuario, dashboard_admin, seleccion_tipo_texto, mostrar_texto_pdf, resultados_usuario, ver_grafica_tipo, admin_resultados, admin_estadisticas, mostrar_fragmento, guardar_respuesta, ver_resultados_alumno, ver_grafica_alumno_tipo, exportar_admin_estadisticas_excel, exportar_admin_resultados_excel, resetear_datos, eliminar_usuario, logout_admin,verificar_matricula_usuario,verificar_matricula_admin,subir_pdf
+from .views import registro_usuario, registro_admin, login_usuario, login_admin, logout_usuario, dashboard_usuario, dashboard_admin, seleccion_tipo_texto, mostrar_texto_pdf, resultados_usuario, ver_grafica_tipo, admin_resultados, admin_estadisticas, mostrar_fragmento, guardar_respuesta, ver_resultados_alumno, ver_grafica_alumno_tipo, exportar_admin_estadisticas_excel, exportar_admin_resultados_excel, resetear_datos, eliminar_usuario, logout_admin,verificar_matricula_usuario,verificar_matricula_admin,subir_pdf, metricas_inferencia, exportaciones_admin, estado_exportacion, descargar_exportacion, exportar_evaluaciones, bitacora_admin
 
 urlpatterns = [
     path('registro_usuario/', registro_usuario, name='registro_usuario'),
@@ -29,4 +29,10 @@ urlpatterns = [
     path("exportar_resultados_excel/", exportar_admin_resultados_excel, name="exportar_resultados_excel"),
     path("resetear_datos/", resetear_datos, name="resetear_datos"),
     path('eliminar_usuario/<int:usuario_id>/', eliminar_usuario, name='eliminar_usuario'),
+    path('metricas_inferencia/', metricas_inferencia, name='metricas_inferencia'),
+    path('exportaciones/', exportaciones_admin, name='exportaciones_admin'),
+    path('exportaciones/<int:trabajo_id>/estado/', estado_exportacion, name='estado_exportacion'),
+    path('exportaciones/<int:trabajo_id>/descargar/', descargar_exportacion, name='descargar_exportacion'),
+    path('exportaciones/evaluaciones/', exportar_evaluaciones, name='exportar_evaluaciones'),
+    path('bitacora/', bitacora_admin, name='bitacora_admin'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -7,35 +7,25 @@ from django.template.loader import render_to_string
 import subprocess
 import os
 from ..models import Lectura, RegistroUsuarios, EvaluacionLecturaIndividual, EvaluacionLectura, RegistroAdmin, VistaAdmin
-
-VAL_MAX = 3
+from ..puntuacion import SIN_EVALUAR, TIPOS_TEXTO, calcular_porcentaje, etiqueta_nivel
+from ..resumenes import estadisticas_por_alumno
+from .. import vista_admin
+from django.db import transaction
+from django.core.paginator import Paginator
 
 # Vista: Dashboard del administrador
 def dashboard_admin(request):
-    usuarios_activos = RegistroUsuarios.objects.annotate(
-        evaluaciones_realizadas=Count(
-            'evaluacionlecturaindividual',
-            filter=Q(evaluacionlecturaindividual__puntaje__isnull=False)
-        )
-    ).filter(evaluaciones_realizadas__gt=0)
-
-    total_usuarios = usuarios_activos.count()
-
-    tipos = ["Argumentativo", "Descriptivo", "Expositivo", "Narrativo"]
-    resumen = []
-
-    for tipo in tipos:
-        lecturas = EvaluacionLecturaIndividual.objects.filter(tipo_texto=tipo)
-        total_lecturas = lecturas.count()
-        total_puntos = sum([e.puntaje for e in lecturas if e.puntaje is not None])
-        promedio = (total_puntos / total_lecturas) if total_lecturas > 0 else 0
-        porcentaje = (promedio / VAL_MAX) * 100 if total_lecturas > 0 else 0
-
-        resumen.append({
-            "tipo": tipo,
-            "total_lecturas": total_lecturas,
-            "promedio_porcentaje": round(porcentaje, 2)
-        })
+    total_usuarios = vista_admin.usuarios_activos()
+
+    # Estadísticas materializadas en VistaAdmin (no se recorren las evaluaciones)
+    resumen = [
+        {
+            "tipo": r["tipo"],
+            "total_lecturas": r["cantidad"],
+            "promedio_porcentaje": round(r["porcentaje"], 2)
+        }
+        for r in vista_admin.resumen_por_tipo()
+    ]
     contexto = {
         "total_usuarios": total_usuarios,
         "resumen_por_tipo": resumen,
@@ -47,35 +37,15 @@ def dashboard_admin(request):
 
 # Vista: Resultados globales por tipo de texto
 def admin_resultados(request):
-    tipos = ["Argumentativo", "Descriptivo", "Expositivo", "Narrativo"]
-    resumen = []
-
-    for tipo in tipos:
-        lecturas = EvaluacionLecturaIndividual.objects.filter(tipo_texto=tipo)
-        cantidad = lecturas.count()
-        suma_puntos = sum([e.puntaje for e in lecturas if e.puntaje is not None])
-
-        if cantidad > 0:
-            promedio = suma_puntos / cantidad
-            porcentaje = (promedio / VAL_MAX) * 100  # Asumiendo VAL_MAX = 3
-
-            if porcentaje >= 90:
-                nivel = f"Alto (Comprensión profunda) - {int(porcentaje)}%"
-            elif porcentaje >= 60:
-                nivel = f"Medio (Comprensión adecuada) - {int(porcentaje)}%"
-            elif porcentaje >= 30:
-                nivel = f"Bajo (Comprensión superficial) - {int(porcentaje)}%"
-            else:
-                nivel = f"Deficiente (No comprensión) - {int(porcentaje)}%"
-        else:
-            nivel = "Sin evaluar"
-
-        resumen.append({
-            "tipo": tipo,
-            "cantidad": cantidad,
-            "puntaje_total": suma_puntos,
-            "nivel": nivel
-        })
+    resumen = [
+        {
+            "tipo": r["tipo"],
+            "cantidad": r["cantidad"],
+            "puntaje_total": r["suma"],
+            "nivel": etiqueta_nivel(r["porcentaje"]) if r["evaluado"] else SIN_EVALUAR
+        }
+        for r in vista_admin.resumen_por_tipo()
+    ]
 
     total_usuarios = RegistroUsuarios.objects.count()
 
@@ -88,9 +58,17 @@ def admin_resultados(request):
 from django.db.models import Q
 from django.shortcuts import render, get_object_or_404
 from ..models import RegistroUsuarios, EvaluacionLecturaIndividual
-from .evaluacion_views import calcular_porcentaje
 
-VAL_MAX = 3
+
+# Columnas por las que se puede ordenar la tabla (?orden=campo o ?orden=-campo)
+ORDEN_ESTADISTICAS = {
+    "nombre": ("nombre", "apellido"),
+    "matricula": ("matricula",),
+    "textos": ("textos",),
+    "puntaje": ("puntaje",),
+    "nivel": ("porcentaje",),
+}
+ALUMNOS_POR_PAGINA = 50
 
 def admin_estadisticas(request):
     query = request.GET.get('q', '')
@@ -102,38 +80,36 @@ def admin_estadisticas(request):
             Q(matricula__icontains=query)
         )
 
-    resultados = []
-    for user in usuarios:
-        lecturas = EvaluacionLecturaIndividual.objects.filter(usuario=user)
-        total_textos = lecturas.count()
-        total_puntos = sum([e.puntaje for e in lecturas if e.puntaje is not None])
-        promedio = (total_puntos / total_textos) if total_textos > 0 else 0
-        porcentaje = (promedio / VAL_MAX) * 100 if total_textos > 0 else 0
-
-        if total_textos > 0:
-            if porcentaje >= 90:
-                nivel = f"Alto (Comprensión profunda) - {int(porcentaje)}%"
-            elif porcentaje >= 60:
-                nivel = f"Medio (Comprensión adecuada) - {int(porcentaje)}%"
-            elif porcentaje >= 30:
-                nivel = f"Bajo (Comprensión superficial) - {int(porcentaje)}%"
-            else:
-                nivel = f"Deficiente (No comprensión) - {int(porcentaje)}%"
-        else:
-            nivel = "Sin evaluar"
+    # Textos, puntaje y porcentaje de cada alumno en la misma consulta (sin N+1)
+    orden = request.GET.get('orden', 'nombre')
+    campo = orden.lstrip('-')
+    if campo not in ORDEN_ESTADISTICAS:
+        orden, campo = 'nombre', 'nombre'
+    prefijo = '-' if orden.startswith('-') else ''
+    usuarios = estadisticas_por_alumno(usuarios).order_by(
+        *[prefijo + c for c in ORDEN_ESTADISTICAS[campo]], 'id'
+    )
+
+    pagina = Paginator(usuarios, ALUMNOS_POR_PAGINA).get_page(request.GET.get('page'))
 
+    resultados = []
+    for user in pagina:
         resultados.append({
             "id": user.id,
             "nombre": f"{user.nombre} {user.apellido}",
             "matricula": user.matricula,
-            "textos": total_textos,
-            "puntaje": total_puntos,
-            "nivel": nivel
+            "textos": user.textos,
+            "puntaje": user.puntaje,
+            "nivel": etiqueta_nivel(user.porcentaje) if user.textos > 0 else SIN_EVALUAR
         })
 
     return render(request, 'evaluacionescl/admin_estadisticas.html', {
         'resultados': resultados,
-        'query': query
+        'query': query,
+        'orden': orden,
+        # Clic en una columna: ascendente; segundo clic en la misma: descendente
+        'enlaces_orden': {c: ('-' + c if orden == c else c) for c in ORDEN_ESTADISTICAS},
+        'pagina': pagina,
     })
 
 #--------------------------------------------------------------------------------------------
@@ -145,7 +121,9 @@ def eliminar_usuario(request, usuario_id):
     if request.method == "POST":
         try:
             usuario = RegistroUsuarios.objects.get(id=usuario_id)
-            usuario.delete()
+            with transaction.atomic():
+                vista_admin.descontar_usuario(usuario)
+                usuario.delete()
             messages.success(request, "Usuario eliminado correctamente.")
         except RegistroUsuarios.DoesNotExist:
             messages.error(request, "El usuario no existe.")
@@ -155,7 +133,6 @@ def eliminar_usuario(request, usuario_id):
 
 from django.shortcuts import get_object_or_404, render, redirect
 from ..models import RegistroUsuarios, EvaluacionLecturaIndividual
-from .evaluacion_views import calcular_porcentaje  # Asegúrate de importar si está separado
 
 
 def ver_resultados_alumno(request, usuario_id):
@@ -262,11 +239,6 @@ def ver_resultados_alumno(request, usuario_id):
 from django.shortcuts import render, get_object_or_404
 from ..models import RegistroUsuarios, EvaluacionLecturaIndividual
 
-def calcular_porcentaje(promedio):
-    if promedio is None:
-        return 0
-    return (promedio / VAL_MAX) * 100
-
 # ✅ 4. ver_grafica_alumno_tipo (con título, fecha y hora en líneas separadas)
 # ✅ 4. ver_grafica_alumno_tipo (con multilínea real para Chart.js)
 
@@ -338,111 +310,16 @@ def ver_grafica_alumno_tipo(request, usuario_id, tipo_texto):
 
 
 # Exportar estadisticas admin
-from django.http import HttpResponse
-import openpyxl
-from openpyxl.utils import get_column_letter
-from ..models import EvaluacionLecturaIndividual
+from ..exportaciones import respuesta_xlsx, hojas_estadisticas_alumnos, hojas_resultados_globales
 
 def exportar_admin_estadisticas_excel(request):
-    from ..models import RegistroUsuarios
-    from .evaluacion_views import calcular_porcentaje
-
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Estadísticas por alumno"
-
-    headers = ["Nombre", "Matrícula", "Textos leídos", "Puntaje total", "Porcentaje", "Nivel de comprensión"]
-    ws.append(headers)
-
-    usuarios = RegistroUsuarios.objects.all()
-    for user in usuarios:
-        lecturas = EvaluacionLecturaIndividual.objects.filter(usuario=user)
-        total = lecturas.count()
-        puntaje_total = sum([e.puntaje for e in lecturas if e.puntaje is not None])
-        porcentaje = calcular_porcentaje(puntaje_total / total) if total else 0
-
-        if total:
-            if porcentaje >= 90:
-                nivel = "Alto (Comprensión profunda)"
-            elif porcentaje >= 60:
-                nivel = "Medio (Comprensión adecuada)"
-            elif porcentaje >= 30:
-                nivel = "Bajo (Comprensión superficial)"
-            else:
-                nivel = "Deficiente (No comprensión)"
-        else:
-            nivel = "Sin evaluar"
-
-        fila = [
-            f"{user.nombre} {user.apellido}",
-            user.matricula,
-            total,
-            puntaje_total,
-            int(porcentaje),
-            nivel
-        ]
-        ws.append(fila)
-
-    for col in range(1, len(headers) + 1):
-        ws.column_dimensions[get_column_letter(col)].auto_size = True
-
-    response = HttpResponse(
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    response["Content-Disposition"] = 'attachment; filename=admin_estadisticas_alumnos.xlsx'
-    wb.save(response)
-    return response
+    # Libro write-only alimentado por una sola consulta leída por bloques
+    return respuesta_xlsx(hojas_estadisticas_alumnos(), "admin_estadisticas_alumnos.xlsx")
 
 
 # Vista para exportar resultados globales
-from django.http import HttpResponse
-import openpyxl
-from openpyxl.utils import get_column_letter
-from ..models import EvaluacionLecturaIndividual
-
-VAL_MAX = 3  # Si no está definido arriba, agrégalo
-
 def exportar_admin_resultados_excel(request):
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Resumen por tipo de texto"
-
-    headers = ["Tipo de texto", "Documentos leídos", "Puntaje total", "Porcentaje", "Nivel de comprensión"]
-    ws.append(headers)
-
-    tipos = ["Argumentativo", "Descriptivo", "Expositivo", "Narrativo"]
-
-    for tipo in tipos:
-        lecturas = EvaluacionLecturaIndividual.objects.filter(tipo_texto=tipo)
-        cantidad = lecturas.count()
-        suma = sum([e.puntaje for e in lecturas if e.puntaje is not None])
-        promedio = (suma / cantidad) if cantidad > 0 else 0
-        porcentaje = (promedio / VAL_MAX * 100) if cantidad > 0 else 0
-
-        if cantidad > 0:
-            if porcentaje >= 90:
-                nivel = f"Alto (Comprensión profunda) - {int(porcentaje)}%"
-            elif porcentaje >= 60:
-                nivel = f"Medio (Comprensión adecuada) - {int(porcentaje)}%"
-            elif porcentaje >= 30:
-                nivel = f"Bajo (Comprensión superficial) - {int(porcentaje)}%"
-            else:
-                nivel = f"Deficiente (No comprensión) - {int(porcentaje)}%"
-        else:
-            nivel = "Sin evaluar"
-
-        fila = [tipo, cantidad, suma, int(porcentaje), nivel]
-        ws.append(fila)
-
-    for col in range(1, len(headers) + 1):
-        ws.column_dimensions[get_column_letter(col)].auto_size = True
-
-    response = HttpResponse(
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    response["Content-Disposition"] = 'attachment; filename=admin_resultados_globales.xlsx'
-    wb.save(response)
-    return response
+    return respuesta_xlsx(hojas_resultados_globales(), "admin_resultados_globales.xlsx")
 
 
 
@@ -495,6 +372,8 @@ import os
 from django.conf import settings
 from django.contrib import messages
 from django.shortcuts import render, redirect
+from ..textos import procesar_archivo, aplicar_resultado
+from .. import catalogo
 
 def subir_pdf(request):
     if request.method == 'POST':
@@ -525,20 +404,18 @@ def subir_pdf(request):
                 # Django se encarga de guardar el archivo físico en la carpeta correcta.
                 nueva_lectura.save()
                 
-                # --- INICIA LA LÓGICA PARA CONTAR PALABRAS ---
-                texto_completo = ""
-                # Abrimos el PDF que Django acaba de guardar usando su ruta
-                with fitz.open(nueva_lectura.archivo_pdf.path) as doc:
-                    for pagina in doc:
-                        texto_completo += pagina.get_text("text")
-                
-                conteo = len(texto_completo.split())
-                nueva_lectura.conteo_palabras = conteo
-                # Actualizamos el registro en la BD con el número de palabras
-                nueva_lectura.save(update_fields=['conteo_palabras'])
+                # --- INICIA LA LÓGICA PARA CONTAR PALABRAS Y PRECALCULAR FRAGMENTOS ---
+                # Abrimos el PDF que Django acaba de guardar usando su ruta (una sola lectura)
+                resultado = procesar_archivo(nueva_lectura.archivo_pdf.path)
+                if resultado["estado"] == "error":
+                    raise Exception(resultado["error"])
+                # Actualizamos el registro en la BD con el número de palabras, los hashes
+                # y los fragmentos que usará mostrar_fragmento
+                aplicar_resultado(nueva_lectura, resultado)
                 # --- FIN DE LA LÓGICA ---
 
-                messages.success(request, f"✅ '{archivo_subido.name}' subido y procesado ({conteo} palabras).")
+                catalogo.invalidar()
+                messages.success(request, f"✅ '{archivo_subido.name}' subido y procesado ({nueva_lectura.conteo_palabras} palabras, {nueva_lectura.num_fragmentos} fragmentos).")
                 subidos_ok += 1
 
             except Exception as e:
@@ -549,3 +426,134 @@ def subir_pdf(request):
     # Para el método GET, simplemente mostramos la página de subida
     return render(request, 'evaluacionescl/subir_pdf.html')
 
+
+
+#---------------------------------------------------------------------------------
+# Métricas del clasificador por lotes
+
+from ..inferencia import servicio as servicio_inferencia
+from ..recursos import registro as registro_recursos
+
+def metricas_inferencia(request):
+    if 'admin_id' not in request.session:
+        return redirect('login_admin')
+    datos = servicio_inferencia.metricas()
+    datos["recursos"] = registro_recursos.reporte()
+    return JsonResponse(datos)
+
+
+#---------------------------------------------------------------------------------
+# Exportaciones en segundo plano (las arma manage.py procesar_exportaciones)
+
+from django.http import FileResponse, Http404
+from django.urls import reverse
+from ..models import TrabajoExportacion
+from .. import trabajos_exportacion
+from ..exportaciones import EXPORTACIONES, formatos_disponibles
+
+def _estado_trabajo(trabajo):
+    datos = {
+        "id": trabajo.id,
+        "tipo": trabajo.tipo,
+        "formato": trabajo.formato,
+        "estado": trabajo.estado,
+        "filas": trabajo.filas,
+        "error": trabajo.error,
+        "url_estado": reverse("estado_exportacion", args=[trabajo.id]),
+    }
+    if trabajo.estado == "terminado":
+        datos["url_descarga"] = reverse("descargar_exportacion", args=[trabajo.id])
+    return datos
+
+def exportaciones_admin(request):
+    if 'admin_id' not in request.session:
+        return redirect('login_admin')
+
+    if request.method == "POST":
+        tipo = request.POST.get("tipo")
+        formato = request.POST.get("formato")
+        if tipo not in EXPORTACIONES or formato not in formatos_disponibles():
+            messages.error(request, "Exportación o formato no válido.")
+            return redirect("exportaciones_admin")
+
+        trabajo, creado = trabajos_exportacion.solicitar(tipo, formato, request.session.get('admin_id'))
+        if request.headers.get("x-requested-with") == "XMLHttpRequest":
+            return JsonResponse(dict(_estado_trabajo(trabajo), creado=creado))
+        if creado:
+            messages.success(request, "⏳ Exportación en cola; el archivo estará listo en unos momentos.")
+        elif trabajo.estado == "terminado":
+            messages.info(request, "✅ Los datos no cambiaron: ya está disponible el archivo de esta exportación.")
+        else:
+            messages.info(request, "⏳ Ya hay una exportación igual en curso.")
+        return redirect("exportaciones_admin")
+
+    trabajos = TrabajoExportacion.objects.order_by("-id")[:20]
+    return render(request, "evaluacionescl/exportaciones_admin.html", {
+        "trabajos": trabajos,
+        "exportaciones": list(EXPORTACIONES),
+        "formatos": formatos_disponibles(),
+        "tipos_texto": TIPOS_TEXTO,
+        "hay_activos": any(t.estado in trabajos_exportacion.ACTIVOS for t in trabajos),
+    })
+
+def estado_exportacion(request, trabajo_id):
+    if 'admin_id' not in request.session:
+        return JsonResponse({"error": "No autorizado"}, status=403)
+    trabajo = get_object_or_404(TrabajoExportacion, id=trabajo_id)
+    return JsonResponse(_estado_trabajo(trabajo))
+
+def descargar_exportacion(request, trabajo_id):
+    if 'admin_id' not in request.session:
+        return redirect('login_admin')
+    trabajo = get_object_or_404(TrabajoExportacion, id=trabajo_id, estado="terminado")
+    ruta = trabajos_exportacion.ruta_archivo(trabajo)
+    if not os.path.exists(ruta):
+        raise Http404("El archivo de la exportación ya no existe.")
+    return FileResponse(open(ruta, "rb"), as_attachment=True, filename=trabajos_exportacion.nombre_descarga(trabajo))
+
+
+#---------------------------------------------------------------------------------
+# Exportación cruda: una fila por evaluación, enviada mientras se lee por páginas
+
+from django.http import HttpResponseBadRequest
+from ..exportaciones import filtros_evaluaciones, respuesta_evaluaciones
+
+def exportar_evaluaciones(request):
+    if 'admin_id' not in request.session:
+        return redirect('login_admin')
+
+    formato = request.GET.get("formato", "csv")
+    if formato not in ("csv", "parquet") or formato not in formatos_disponibles():
+        return HttpResponseBadRequest("Formato no válido.")
+    try:
+        filtros = filtros_evaluaciones(
+            request.GET.get("desde"), request.GET.get("hasta"), request.GET.get("tipo_texto")
+        )
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
+    return respuesta_evaluaciones(filtros, formato, "evaluaciones_individuales")
+
+
+#---------------------------------------------------------------------------------
+# Bitácora del reentrenamiento (lo más nuevo primero, leída desde el final del archivo)
+
+from ..bitacora import leer_recientes
+
+def bitacora_admin(request):
+    if 'admin_id' not in request.session:
+        return redirect('login_admin')
+
+    try:
+        limite = min(max(int(request.GET.get("n", 200)), 1), 2000)
+    except ValueError:
+        limite = 200
+    origen = request.GET.get("origen")
+    if origen not in ("entrenamiento", "orquestador"):
+        origen = None
+
+    return render(request, "evaluacionescl/bitacora_admin.html", {
+        "entradas": leer_recientes(settings.BITACORA_REENTRENAMIENTO, limite, origen),
+        "limite": limite,
+        "origen": origen or "",
+    })
@@ -1,114 +1,20 @@
-
 import os
 import random
-import fitz
-import spacy
-import torch
-import numpy as np
-from torch.nn.functional import softmax
-from transformers import BertTokenizer, BertForSequenceClassification
+from time import time
+
 from django.shortcuts import render, redirect
 from django.conf import settings
 from ..models import RegistroUsuarios, EvaluacionLecturaIndividual, EvaluacionLectura, LecturaEnCurso, Lectura
+# spaCy y BERT se cargan al primer uso (ver recursos.py e inferencia/servicio.py)
+from ..inferencia import servicio as servicio_inferencia
+from .. import catalogo, vista_admin
+from ..puntuacion import calcular_puntaje, calcular_porcentaje
+from ..resumenes import registrar_respuesta, resultados_usuario as resumen_resultados_usuario
+from ..textos import extraer_texto_limpio, fragmento_aleatorio, guardar_fragmentos, segmentar_fragmentos
 from django.contrib import messages
-
-# Cargar modelo NLP y BERT
-import os
-
-nlp = spacy.load("es_core_news_md")
-model_path = "trained_model"
-
-try:
-    model = BertForSequenceClassification.from_pretrained(model_path)
-    tokenizer = BertTokenizer.from_pretrained(model_path)
-    if torch.cuda.is_available():
-        model.to('cuda')
-except Exception as e:
-    model = None
-    tokenizer = None
-    print(f" No se pudo cargar el modelo o el tokenizer. Detalles: {e}")
-
-CLASS_NAMES = [
-    "asociativa", "elaborativa", "predictiva",
-    "no_inferencia_parafrasis", "no_inferencia_sinsentido"
-]
-
-
-import re
-import fitz
-
-def extraer_texto_limpio(pdf_path):
-    doc = fitz.open(pdf_path)
-    texto = "\n".join(pagina.get_text("text") for pagina in doc)
-
-    # Eliminar URLs
-    texto = re.sub(r'https?://\S+|www\.\S+', '', texto)
-
-    # Eliminar líneas con palabras como Referencias o Bibliografía
-    texto = re.sub(r'(?i)^.*\b(Referencias|Bibliografía)\b.*$', '', texto, flags=re.MULTILINE)
-
-    # Eliminar citas tipo (Apellido, Año)
-    texto = re.sub(r'\([A-Z][a-z]+,\s*\d{4}\)', '', texto)
-
-    # Eliminar referencias estilo científico tipo “2016;569-70:1545-52.”
-    texto = re.sub(r'\d{4};\d+-\d+:\d+-\d+\.?', '', texto)
-
-    # Eliminar nombres largos en mayúsculas (encabezados o instituciones)
-    texto = re.sub(r'^[A-Z\s]{5,}$', '', texto, flags=re.MULTILINE)
-
-    # Eliminar números de página sueltos
-    texto = re.sub(r'^\s*\d+\s*$', '', texto, flags=re.MULTILINE)
-
-    # Compactar texto, quitar saltos innecesarios
-    texto = re.sub(r'\n+', '\n', texto)
-    texto = re.sub(r'\s{2,}', ' ', texto).strip()
-
-    return texto
-
-
-
-import random
-import spacy
-nlp = spacy.load("es_core_news_md")
-
-def segmentar_texto(texto, min_palabras=50, max_palabras=80):
-    doc = nlp(texto)
-    oraciones = [sent.text.strip() for sent in doc.sents if sent.text.strip()]
-
-    fragmentos = []
-    bloque = []
-    total_palabras = 0
-
-    for oracion in oraciones:
-        palabras = len(oracion.split())
-        if total_palabras + palabras <= max_palabras:
-            bloque.append(oracion)
-            total_palabras += palabras
-        else:
-            if total_palabras >= min_palabras:
-                fragmentos.append(" ".join(bloque))
-            bloque = [oracion]
-            total_palabras = palabras
-
-    if bloque and total_palabras >= min_palabras:
-        fragmentos.append(" ".join(bloque))
-
-    return random.choice(fragmentos) if fragmentos else ""
-
-
-def calcular_puntaje(inf):
-    return {
-        "asociativa": 2,
-        "elaborativa": 3,
-        "predictiva": 3,
-        "no_inferencia_parafrasis": 1,
-        "no_inferencia_sinsentido": 0
-    }.get(inf, 0)
-
-def calcular_porcentaje(prom):
-    return (prom / 3) * 100 if prom is not None else 0
-
-from time import time
+from django.db import transaction
+from django.db.models import F
+from django.core.cache import cache
 
 # ✅ 1. mostrar_texto_pdf (FINAL)
 
@@ -155,17 +61,8 @@ def mostrar_texto_pdf(request):
                 es_pendiente = True
 
             else:
-                # 4️⃣ Elegir nuevo texto no leído
-                carpeta = os.path.join(settings.MEDIA_ROOT, "bancotext", tipo_texto)
-                archivos = [f for f in os.listdir(carpeta) if f.endswith(".pdf")]
-
-                leidos = EvaluacionLecturaIndividual.objects.filter(
-                    usuario=usuario,
-                    tipo_texto=tipo_texto,
-                    respuesta_usuario__isnull=False
-                ).values_list("titulo_lectura", flat=True)
-
-                no_leidos = [a for a in archivos if a not in leidos]
+                # 4️⃣ Elegir nuevo texto no leído (catálogo en memoria - lo ya leído)
+                no_leidos = sorted(catalogo.no_leidos(usuario, tipo_texto))
 
                 if not no_leidos:
                     return render(request, "evaluacionescl/no_textos_disponibles.html", {
@@ -235,25 +132,36 @@ def mostrar_fragmento(request):
 
     # Si no hay evaluación previa o el fragmento está vacío, generamos nuevo
     if not evaluacion:
-        evaluacion = EvaluacionLecturaIndividual.objects.create(
-            usuario=usuario,
-            tipo_texto=tipo_texto,
-            titulo_lectura=titulo,
-            fragmento="pendiente",
-            instruccion="pendiente"
-        )
-
-    # Confirmamos que exista el PDF
-    pdf_path = os.path.join(settings.MEDIA_ROOT, "bancotext", tipo_texto, titulo)
-
-    if not os.path.exists(pdf_path):
-        return render(request, "error.html", {"mensaje": "No se encontró el archivo del texto."})
-
-    # Extraer texto limpio del PDF
-    texto_limpio = extraer_texto_limpio(pdf_path)
-    fragmento = segmentar_texto(texto_limpio)
+        with transaction.atomic():
+            evaluacion = EvaluacionLecturaIndividual.objects.create(
+                usuario=usuario,
+                tipo_texto=tipo_texto,
+                titulo_lectura=titulo,
+                fragmento="pendiente",
+                instruccion="pendiente"
+            )
+            vista_admin.registrar_inicio(evaluacion)
+            invalidar_resultados(usuario.id)
+
+    # Fragmento precalculado al registrar la lectura (una sola consulta)
+    fragmento = fragmento_aleatorio(tipo_texto, titulo)
+
     if not fragmento:
-        return render(request, "error.html", {"mensaje": "No se pudo segmentar el texto correctamente."})
+        # Lectura sin fragmentos precalculados: se segmenta el PDF ahora y se guarda el pool
+        pdf_path = os.path.join(settings.MEDIA_ROOT, "bancotext", tipo_texto, titulo)
+
+        if not os.path.exists(pdf_path):
+            return render(request, "error.html", {"mensaje": "No se encontró el archivo del texto."})
+
+        fragmentos = segmentar_fragmentos(extraer_texto_limpio(pdf_path))
+        if not fragmentos:
+            return render(request, "error.html", {"mensaje": "No se pudo segmentar el texto correctamente."})
+
+        titulo_base = titulo.replace('.pdf', '').replace('_', ' ')
+        lectura_obj = Lectura.objects.filter(titulo=titulo_base, tipo_texto=tipo_texto).first()
+        if lectura_obj:
+            guardar_fragmentos(lectura_obj, fragmentos)
+        fragmento = random.choice(fragmentos)
 
     # Elegir una instrucción aleatoria
     instrucciones = [
@@ -277,14 +185,7 @@ def mostrar_fragmento(request):
     })
 
 def classify_inference(sentence, inference):
-    model.eval()
-    with torch.no_grad():
-        inputs = tokenizer.encode_plus(sentence, inference, return_tensors="pt", truncation=True, padding=True)
-        if torch.cuda.is_available():
-            inputs = {k: v.to('cuda') for k, v in inputs.items()}
-        logits = model(**inputs).logits
-        probs = softmax(logits, dim=1).cpu().numpy()[0]
-        return CLASS_NAMES[probs.argmax()], probs
+    return servicio_inferencia.clasificar(sentence, inference)
 
 from django.contrib import messages  # Asegúrate de tener esto importado
 
@@ -314,17 +215,14 @@ def guardar_respuesta(request):
             messages.warning(request, "Esta evaluación ya fue respondida.")
             return redirect("resultados_usuario")
 
-        # --- Guardado de los datos de la evaluación actual ---
-        evaluacion.respuesta_usuario = respuesta
+        # El clasificador corre fuera de la transacción (puede tardar)
         clase, _ = classify_inference(evaluacion.fragmento, respuesta)
         if not clase:
             clase = "no_inferencia_sinsentido"
-        evaluacion.puntaje = calcular_puntaje(clase)
-        evaluacion.tipo_inferencia = clase
-        
+
+        tiempo_lectura_segundos = ppm = None
         try:
             tiempo_lectura_segundos = float(request.POST.get('tiempo_lectura', 0))
-            evaluacion.tiempo_lectura_segundos = tiempo_lectura_segundos
 
             # Corrección clave: reemplazar guiones bajos para buscar el título correctamente
             titulo_base = evaluacion.titulo_lectura.replace('.pdf', '').replace('_', ' ')
@@ -333,56 +231,33 @@ def guardar_respuesta(request):
             ppm = 0
             if tiempo_lectura_segundos > 0 and lectura_obj.conteo_palabras > 0:
                 ppm = round((lectura_obj.conteo_palabras / tiempo_lectura_segundos) * 60)
-            evaluacion.palabras_por_minuto = ppm
         except (Lectura.DoesNotExist, Exception) as e:
             print(f"ADVERTENCIA al calcular PPM: {e}")
-        
-        evaluacion.save() # Guardamos la evaluación individual con todos sus datos
 
-        # --- LÓGICA FINAL PARA CALCULAR EL PROMEDIO PONDERADO ---
+        with transaction.atomic():
+            # Se vuelve a leer bloqueada: un doble envío no cuenta dos veces en el resumen
+            evaluacion = EvaluacionLecturaIndividual.objects.select_for_update().get(id=eval_id)
+            if evaluacion.respuesta_usuario:
+                messages.warning(request, "Esta evaluación ya fue respondida.")
+                return redirect("resultados_usuario")
+
+            # --- Guardado de los datos de la evaluación actual ---
+            evaluacion.respuesta_usuario = respuesta
+            evaluacion.puntaje = calcular_puntaje(clase)
+            evaluacion.tipo_inferencia = clase
+            if tiempo_lectura_segundos is not None:
+                evaluacion.tiempo_lectura_segundos = tiempo_lectura_segundos
+            if ppm is not None:
+                evaluacion.palabras_por_minuto = ppm
+            evaluacion.save() # Guardamos la evaluación individual con todos sus datos
+
+            # --- Promedio ponderado: se suma esta evaluación a los acumulados del resumen ---
+            registrar_respuesta(evaluacion)
+            invalidar_resultados(evaluacion.usuario_id)
+
         usuario = evaluacion.usuario
         tipo = evaluacion.tipo_texto
 
-        # 1. Obtenemos TODAS las evaluaciones completadas de este tipo para el usuario
-        todas_las_evaluaciones = EvaluacionLecturaIndividual.objects.filter(
-            usuario=usuario, tipo_texto=tipo, puntaje__isnull=False
-        )
-        
-        puntajes_ponderados = []
-        # 2. Calculamos el puntaje ponderado para CADA UNA de ellas
-        for eval_individual in todas_las_evaluaciones:
-            puntaje_inferencia = calcular_porcentaje(eval_individual.puntaje)
-            
-            ppm_eval = eval_individual.palabras_por_minuto or 0
-            puntaje_velocidad = 50 # Por defecto es 'Bajo'
-            if ppm_eval >= 230: puntaje_velocidad = 100
-            elif ppm_eval >= 150: puntaje_velocidad = 75
-            
-            puntaje_final_ponderado = (puntaje_inferencia * 0.80) + (puntaje_velocidad * 0.20)
-            puntajes_ponderados.append(puntaje_final_ponderado)
-
-        # 3. Calculamos el promedio de todos los puntajes
-        promedio_final = 0
-        if puntajes_ponderados:
-            promedio_final = sum(puntajes_ponderados) / len(puntajes_ponderados)
-
-        # 4. Determinamos el nivel basado en el PROMEDIO
-        if promedio_final >= 90: nivel = "Alto (Comprensión profunda)"
-        elif promedio_final >= 60: nivel = "Medio (Comprensión adecuada)"
-        elif promedio_final >= 30: nivel = "Bajo (Comprensión superficial)"
-        else: nivel = "Deficiente (No comprensión)"
-            
-        # 5. Guardamos o actualizamos el resumen con los datos promediados correctos
-        EvaluacionLectura.objects.update_or_create(
-            usuario=usuario,
-            tipo_texto=tipo,
-            defaults={
-                'textos_leidos': todas_las_evaluaciones.count(),
-                'porcentaje': promedio_final,
-                'nivel_comprension': nivel
-            }
-        )
-        
         # --- Limpieza de sesión ---
         request.session.pop(f"lectura_en_curso_{tipo}", None)
         LecturaEnCurso.objects.filter(usuario=usuario, tipo_texto=tipo).delete()
@@ -391,71 +266,32 @@ def guardar_respuesta(request):
 
     return redirect("dashboard_usuario")
 
+def _clave_resultados(usuario_id):
+    # La versión vive en la fila del alumno (no en la sesión): sobrevive al
+    # logout, es la misma en todos sus dispositivos y, al invalidar, ningún
+    # worker puede servir la entrada vieja aunque la caché no sea compartida
+    version = RegistroUsuarios.objects.filter(id=usuario_id).values_list("resultados_version", flat=True).first()
+    return f"resultados_usuario:{usuario_id}:{version or 0}"
+
+
+def invalidar_resultados(usuario_id):
+    """Llamar cuando el alumno inicia o responde una evaluación (dentro de la misma transacción)."""
+    RegistroUsuarios.objects.filter(id=usuario_id).update(resultados_version=F("resultados_version") + 1)
+
+
 def resultados_usuario(request):
     usuario_id = request.session.get("usuario_id")
     if not usuario_id:
         return redirect("login_usuario")
 
-    usuario = RegistroUsuarios.objects.get(id=usuario_id)
-    tipos = ["Argumentativo", "Descriptivo", "Expositivo", "Narrativo"]
-    resultados = []
-
-    for tipo in tipos:
-        resumen = EvaluacionLectura.objects.filter(usuario=usuario, tipo_texto=tipo).first()
-
-        if resumen:
-            total = resumen.textos_leidos
-            porcentaje = resumen.porcentaje or 0
-            if porcentaje >= 90:
-                nivel = f"Alto (Comprensión profunda) - {int(porcentaje)}%"
-            elif porcentaje >= 60:
-                nivel = f"Medio (Comprensión adecuada) - {int(porcentaje)}%"
-            elif porcentaje >= 30:
-                nivel = f"Bajo (Comprensión superficial) - {int(porcentaje)}%"
-
-            else:
-                nivel = f"Deficiente (No comprensión) - {int(porcentaje)}%"
-        else:
-            total = 0
-            nivel = "Sin evaluar"
+    # Resúmenes, pendientes y última inferencia en dos consultas, cacheados por alumno
+    clave = _clave_resultados(usuario_id)
+    contexto = cache.get(clave)
+    if contexto is None:
+        contexto = resumen_resultados_usuario(usuario_id)
+        cache.set(clave, contexto, getattr(settings, "RESULTADOS_USUARIO_TTL", 600))
 
-        resultados.append({"tipo": tipo, "cantidad": total, "nivel": nivel})
-
-    # Última inferencia del usuario
-    ultima_eval = EvaluacionLecturaIndividual.objects.filter(
-        usuario=usuario,
-        tipo_inferencia__isnull=False
-    ).order_by("-fecha_lectura").first()
-
-    inferencia_limpia = "Sin evaluar"
-    if ultima_eval and ultima_eval.tipo_inferencia:
-        tipo = ultima_eval.tipo_inferencia
-        if tipo == "no_inferencia_sinsentido":
-            inferencia_limpia = "No inferencia: sin sentido"
-        elif tipo == "no_inferencia_parafrasis":
-            inferencia_limpia = "No inferencia: paráfrasis"
-        else:
-            inferencia_limpia = tipo.capitalize()
-
-    # ✅ Evaluaciones pendientes (solo si NO hay ninguna finalizada del tipo)
-        # ✅ Evaluaciones pendientes
-    pendientes = []
-    for tipo_texto in tipos:
-        tiene_pendiente = EvaluacionLecturaIndividual.objects.filter(
-            usuario=usuario,
-            tipo_texto=tipo_texto,
-            respuesta_usuario__isnull=True
-        ).exists()
-
-        if tiene_pendiente:
-            pendientes.append(tipo_texto)
-
-    return render(request, "evaluacionescl/tabla_resultados.html", {
-        "resultados": resultados,
-        "ultima_inferencia": inferencia_limpia,
-        "pendientes": pendientes,
-        "ultima_eval": ultima_eval
-    })
+    return render(request, "evaluacionescl/tabla_resultados.html", contexto)
 
 # ✅ 5. ver_grafica_tipo (con título, fecha y hora en líneas separadas)
 # ✅ 5. ver_grafica_tipo (con multilínea real para Chart.js)
@@ -0,0 +1,173 @@
+"""
+Estadísticas globales materializadas en VistaAdmin.
+
+Hay una fila por (tipo_texto, cuatrimestre, sexo) y otra por (TODOS,
+cuatrimestre, sexo) que acumula todos los tipos; esta última es la que permite
+contar alumnos distintos entre tipos. Cada fila guarda:
+
+- textos_total: evaluaciones iniciadas (igual que contaban las vistas).
+- evaluadas_total: evaluaciones con puntaje.
+- puntaje_total: suma de puntos.
+- usuarios_total: alumnos con al menos una evaluación con puntaje.
+
+Se actualiza en O(1) al iniciar una evaluación (mostrar_fragmento), al
+responderla (guardar_respuesta, en la misma transacción) y al eliminar un
+alumno. `reconstruir` (manage.py reconstruir_vista_admin) la rehace desde
+EvaluacionLecturaIndividual. Las vistas de administración y los Excel leen de
+aquí: la tabla tiene a lo sumo unas decenas de filas, sin importar cuántas
+evaluaciones haya.
+
+Si se cambia el cuatrimestre o el sexo de un alumno, sus evaluaciones
+anteriores siguen contadas en el grupo viejo hasta la próxima reconstrucción.
+"""
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from .puntuacion import TIPOS_TEXTO, calcular_porcentaje, nivel_comprension
+
+TODOS = "Todos"
+
+
+def _porcentaje(puntaje_total, textos_total):
+    return calcular_porcentaje(puntaje_total / textos_total) if textos_total else 0
+
+
+def _actualizar(usuario, tipo_texto, textos=0, evaluadas=0, puntaje=0, usuario_nuevo_tipo=False,
+                usuario_nuevo_global=False):
+    from .models import VistaAdmin
+
+    with transaction.atomic():
+        # Siempre en el mismo orden (tipo y luego TODOS) para no provocar interbloqueos
+        for tipo, usuario_nuevo in ((tipo_texto, usuario_nuevo_tipo), (TODOS, usuario_nuevo_global)):
+            fila, _ = VistaAdmin.objects.select_for_update().get_or_create(
+                tipo_texto=tipo, cuatrimestre=usuario.cuatrimestre, sexo=usuario.sexo,
+            )
+            fila.textos_total += textos
+            fila.evaluadas_total += evaluadas
+            fila.puntaje_total += puntaje
+            fila.usuarios_total += usuario_nuevo
+            if fila.textos_total <= 0:
+                # Grupo sin evaluaciones (se eliminó su último alumno): reconstruir no la tendría
+                fila.delete()
+                continue
+            fila.nivel_comprension_global = nivel_comprension(_porcentaje(fila.puntaje_total, fila.textos_total))
+            fila.save()
+
+
+def registrar_inicio(evaluacion):
+    """Una evaluación nueva (aún sin respuesta)."""
+    _actualizar(evaluacion.usuario, evaluacion.tipo_texto, textos=1)
+
+
+def registrar_respuesta(evaluacion, primera_del_tipo, primera_global):
+    """Una evaluación recién puntuada; las banderas dicen si el alumno cuenta como activo por primera vez."""
+    _actualizar(evaluacion.usuario, evaluacion.tipo_texto, evaluadas=1, puntaje=evaluacion.puntaje or 0,
+                usuario_nuevo_tipo=primera_del_tipo, usuario_nuevo_global=primera_global)
+
+
+def descontar_usuario(usuario):
+    """Resta las evaluaciones de un alumno que se va a eliminar (llamar antes del delete)."""
+    from .models import EvaluacionLecturaIndividual
+
+    por_tipo = list(
+        EvaluacionLecturaIndividual.objects.filter(usuario=usuario)
+        .values("tipo_texto")
+        .annotate(textos=Count("id"), evaluadas=Count("puntaje"), puntaje=Sum("puntaje"))
+        .order_by("tipo_texto")
+    )
+    if not por_tipo:
+        return
+    activo = any(f["evaluadas"] for f in por_tipo)
+    with transaction.atomic():
+        for i, f in enumerate(por_tipo):
+            # El total de TODOS se descuenta tipo por tipo; el alumno, solo una vez
+            _actualizar(usuario, f["tipo_texto"], textos=-f["textos"], evaluadas=-f["evaluadas"],
+                        puntaje=-(f["puntaje"] or 0), usuario_nuevo_tipo=-(f["evaluadas"] > 0),
+                        usuario_nuevo_global=-(activo and i == 0))
+
+
+def reconstruir(modelo_vista=None, modelo_individual=None):
+    """
+    Rehace VistaAdmin desde cero con dos consultas agrupadas. Recibe los
+    modelos para poder usarse desde una migración. Devuelve las filas escritas.
+    """
+    if modelo_vista is None or modelo_individual is None:
+        from .models import VistaAdmin, EvaluacionLecturaIndividual
+        modelo_vista, modelo_individual = VistaAdmin, EvaluacionLecturaIndividual
+
+    agregados = dict(
+        textos=Count("id"),
+        evaluadas=Count("puntaje"),
+        suma=Sum("puntaje"),
+        usuarios=Count("usuario", distinct=True, filter=Q(puntaje__isnull=False)),
+    )
+    base = modelo_individual.objects.order_by()
+    filas = list(base.values("tipo_texto", "usuario__cuatrimestre", "usuario__sexo").annotate(**agregados))
+    filas += [
+        dict(f, tipo_texto=TODOS)
+        for f in base.values("usuario__cuatrimestre", "usuario__sexo").annotate(**agregados)
+    ]
+
+    nuevas = []
+    for f in filas:
+        suma = f["suma"] or 0
+        nuevas.append(modelo_vista(
+            tipo_texto=f["tipo_texto"],
+            cuatrimestre=f["usuario__cuatrimestre"],
+            sexo=f["usuario__sexo"],
+            textos_total=f["textos"],
+            evaluadas_total=f["evaluadas"],
+            puntaje_total=suma,
+            usuarios_total=f["usuarios"],
+            nivel_comprension_global=nivel_comprension(_porcentaje(suma, f["textos"])),
+        ))
+    with transaction.atomic():
+        modelo_vista.objects.all().delete()
+        modelo_vista.objects.bulk_create(nuevas, batch_size=1000)
+    return len(nuevas)
+
+
+def _resumir(filas, clave):
+    resumen = {}
+    for f in filas:
+        r = resumen.setdefault(clave(f), {"cantidad": 0, "suma": 0, "usuarios": 0})
+        r["cantidad"] += f["textos_total"]
+        r["suma"] += f["puntaje_total"]
+        r["usuarios"] += f["usuarios_total"]
+    for r in resumen.values():
+        r["porcentaje"] = _porcentaje(r["suma"], r["cantidad"])
+        r["evaluado"] = r["cantidad"] > 0
+    return resumen
+
+
+def _filas():
+    from .models import VistaAdmin
+    return VistaAdmin.objects.values(
+        "tipo_texto", "cuatrimestre", "sexo", "textos_total", "puntaje_total", "usuarios_total"
+    )
+
+
+def resumen_por_tipo():
+    """
+    Mismo formato que resumenes.resumen_por_tipo (tipo, cantidad, suma,
+    porcentaje, evaluado) más usuarios, leído de VistaAdmin.
+    """
+    resumen = _resumir(_filas().filter(tipo_texto__in=TIPOS_TEXTO), lambda f: f["tipo_texto"])
+    vacio = {"cantidad": 0, "suma": 0, "usuarios": 0, "porcentaje": 0, "evaluado": False}
+    return [dict(resumen.get(tipo, vacio), tipo=tipo) for tipo in TIPOS_TEXTO]
+
+
+def resumen_por_grupo():
+    """Un dict por (tipo, cuatrimestre, sexo), incluyendo TODOS, ordenado."""
+    resumen = _resumir(_filas(), lambda f: (f["tipo_texto"], f["cuatrimestre"], f["sexo"]))
+    return [
+        dict(r, tipo=tipo, cuatrimestre=cuatrimestre, sexo=sexo)
+        for (tipo, cuatrimestre, sexo), r in sorted(resumen.items())
+    ]
+
+
+def usuarios_activos():
+    """Alumnos con al menos una evaluación con puntaje."""
+    from .models import VistaAdmin
+    return VistaAdmin.objects.filter(tipo_texto=TODOS).aggregate(total=Sum("usuarios_total"))["total"] or 0
@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 
 """
-Orquestador de reentrenamiento (bitácora PREPEND: lo nuevo arriba, estilo claro):
+Orquestador de reentrenamiento:
 
 Flujo:
 1) Lee dataset_principal.csv (total actual).
@@ -12,20 +12,30 @@ Flujo:
 3) Si hay suficientes (>= MIN_NUEVAS) o si FORCE_TRAIN=1:
    - Respalda el modelo comprimido (.tar.gz, conserva solo 3).
    - Agrega NUEVAS al CSV (append) —NO borra lo previo—.
-   - Llama a entrenar_modelo.py.
-4) Todo se escribe en reentrenamiento_log.txt con fecha en [..] y secciones con ************.
+   - Llama a entrenar_modelo.py en modo INCREMENTAL (parte de trained_model/ con
+     las nuevas + repaso) o COMPLETO: si FULL_TRAIN=1, si no hay nuevas ni modelo,
+     si el último incremental perdió exactitud o si el último completo tiene más
+     de DIAS_REENTRENO_COMPLETO días.
+4) Todo se anexa a reentrenamiento_log.jsonl (evaluacionescl/bitacora.py), la misma
+   bitácora que entrenar_modelo.py; se lee con manage.py bitacora_reentrenamiento.
+
+La BD se lee con la configuración de Django (DJANGO_SETTINGS_MODULE, por
+defecto sistemagccl.settings_produccion): mismas credenciales (.env), mismo
+backend y mismas opciones de conexión que la aplicación web.
 """
 
-import os, csv, tarfile, subprocess, datetime, json
+import os, sys, csv, tarfile, subprocess, datetime, json
 from pathlib import Path
-import mysql.connector  # pip install mysql-connector-python
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from evaluacionescl import bitacora
 
 # --------------------------
 # Configuración
 # --------------------------
 BASE_DIR     = Path("/var/www/sistemagclectura")
 DATASET_CSV  = BASE_DIR / "dataset_principal.csv"       # columnas: sentence,inference,label
-LOG_FILE     = BASE_DIR / "reentrenamiento_log.txt"     # PREPEND
+LOG_FILE     = BASE_DIR / "reentrenamiento_log.jsonl"   # JSON lines, solo anexar
 STATE_JSON   = BASE_DIR / "estado_orq.json"             # interno {"last_id": int}
 
 TRAIN_SCRIPT = BASE_DIR / "entrenar_modelo.py"
@@ -35,19 +45,13 @@ MODEL_DIR    = BASE_DIR / "trained_model"
 BACKUP_DIR   = BASE_DIR / "backups_modelos"
 MAX_BACKUPS  = 3
 MIN_NUEVAS   = 100
+METRICAS_JSON = BASE_DIR / "metricas_entrenamiento.json"  # lo escribe entrenar_modelo.py
+DIAS_COMPLETO = int(os.getenv("DIAS_REENTRENO_COMPLETO", "30"))
+SALIDA_NO_PUBLICADO = 3  # entrenar_modelo.SALIDA_NO_PUBLICADO: el incremental se descartó
 
-# BD (usuario con permisos)
-DB_HOST = "localhost"
-DB_USER = "miros"
-DB_PASS = "Kmslectura2025!"
-DB_NAME = "kmslectura"
-DB_PORT = 3306
-
-TABLE   = "evaluacionescl_evaluacionlecturaindividual"
-COL_ID  = "id"
-COL_FRG = "fragmento"
-COL_RSP = "respuesta_usuario"
-COL_TAG = "tipo_inferencia"
+# BD: la de Django (ver _preparar_django)
+DJANGO_SETTINGS = "sistemagccl.settings_produccion"
+LOTE_BD         = 500  # filas por consulta (paginando por id)
 
 # Mapa de etiquetas a IDs
 ETIQUETAS = {
@@ -59,31 +63,13 @@ ETIQUETAS = {
 }
 
 # --------------------------
-# Bitácora PREPEND (lo nuevo arriba)
+# Bitácora (solo anexar; lo nuevo se lee primero con bitacora.leer_recientes)
 # --------------------------
-def _ts():
-    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
 def log(msg, seccion=False):
-    """Inserta UNA o varias líneas al INICIO del log (nuevo arriba)."""
-    if isinstance(msg, list):
-        lines = msg
-    else:
-        lines = [msg]
-
-    stamped = []
+    """Agrega UNA o varias líneas al final de la bitácora."""
+    lines = msg if isinstance(msg, list) else [msg]
     for ln in lines:
-        if seccion:
-            stamped.append(f"[{_ts()}] ************ {ln} ************")
-        else:
-            stamped.append(f"[{_ts()}] {ln}")
-    block = "\n".join(stamped) + "\n"
-
-    try:
-        old = LOG_FILE.read_text(encoding="utf-8", errors="ignore") if LOG_FILE.exists() else ""
-    except Exception:
-        old = ""
-    LOG_FILE.write_text(block + old, encoding="utf-8")
+        bitacora.registrar(str(LOG_FILE), ln, seccion=seccion, origen="orquestador")
 
 # --------------------------
 # Estado interno (no se loguea)
@@ -106,10 +92,25 @@ def _save_last_id(last_id):
 # --------------------------
 # IO / BD / backups
 # --------------------------
-def _conectar_bd():
-    return mysql.connector.connect(
-        host=DB_HOST, user=DB_USER, password=DB_PASS, database=DB_NAME, port=DB_PORT
-    )
+def _preparar_django():
+    """Inicializa Django una sola vez y devuelve el modelo de evaluaciones."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", DJANGO_SETTINGS)
+    import django
+    django.setup()
+    from evaluacionescl.models import EvaluacionLecturaIndividual
+    return EvaluacionLecturaIndividual
+
+def _leer_evaluaciones(modelo, last_id):
+    """Evaluaciones clasificadas con id > last_id, en orden, por páginas de id (sin OFFSET)."""
+    consulta = modelo.objects.filter(
+        tipo_inferencia__isnull=False, fragmento__isnull=False, respuesta_usuario__isnull=False
+    ).order_by("id").values_list("id", "fragmento", "respuesta_usuario", "tipo_inferencia")
+    while True:
+        pagina = list(consulta.filter(id__gt=last_id)[:LOTE_BD])
+        yield from pagina
+        if len(pagina) < LOTE_BD:
+            return
+        last_id = pagina[-1][0]
 
 def _leer_pares_existentes():
     """Lee el CSV 1 sola vez y arma set sentence||inference para detectar duplicados."""
@@ -153,13 +154,37 @@ def _backup_modelo():
     log(f"Se creó un respaldo del modelo: {tarpath.name}")
     return tarpath
 
-def _run_training():
+def _elegir_modo(nuevas_count):
+    """('completo' | 'incremental', motivo)."""
+    if os.getenv("FULL_TRAIN") == "1":
+        return "completo", "solicitado con FULL_TRAIN=1"
+    if nuevas_count == 0:
+        return "completo", "no hay filas nuevas"
+    if not (MODEL_DIR / "config.json").exists():
+        return "completo", "no hay un modelo entrenado del cual partir"
+    try:
+        metricas = json.loads(METRICAS_JSON.read_text(encoding="utf-8"))
+    except Exception:
+        metricas = {}
+    if metricas.get("forzar_completo"):
+        return "completo", "el último incremental perdió exactitud"
+    fecha = (metricas.get("ultimo_completo") or {}).get("fecha")
+    if not fecha:
+        return "completo", "no hay registro de un entrenamiento completo"
+    dias = (datetime.datetime.now() - datetime.datetime.strptime(fecha, "%Y-%m-%d %H:%M:%S")).days
+    if dias >= DIAS_COMPLETO:
+        return "completo", f"el último completo fue hace {dias} días"
+    return "incremental", f"{nuevas_count} filas nuevas; último completo hace {dias} días"
+
+def _run_training(modo="completo", filas_nuevas=0):
     """Lanza el script de entrenamiento; captura salida por si falla."""
+    env = dict(os.environ, MODO_ENTRENAMIENTO=modo, FILAS_NUEVAS=str(filas_nuevas))
     proc = subprocess.run(
         [str(VENV_PY), str(TRAIN_SCRIPT)],
         cwd=str(BASE_DIR),
         capture_output=True,
-        text=True
+        text=True,
+        env=env,
     )
     return proc.returncode, proc.stdout, proc.stderr
 
@@ -184,18 +209,11 @@ def main():
     visto_lote, max_id_visto = set(), last_id
 
     try:
-        cn = _conectar_bd()
-        cur = cn.cursor(dictionary=True)
-        q = (f"SELECT {COL_ID}, {COL_FRG}, {COL_RSP}, {COL_TAG} "
-             f"FROM {TABLE} "
-             f"WHERE {COL_ID} > %s AND {COL_TAG} IS NOT NULL AND {COL_FRG} IS NOT NULL AND {COL_RSP} IS NOT NULL "
-             f"ORDER BY {COL_ID} ASC")
-        cur.execute(q, (last_id,))
-        for row in cur:
-            rid  = int(row[COL_ID])
-            frag = (row[COL_FRG] or "").strip()
-            resp = (row[COL_RSP] or "").strip()
-            typ  = (row[COL_TAG] or "").strip().lower() or "no_inferencia_sinsentido"
+        modelo = _preparar_django()
+        for rid, frag, resp, typ in _leer_evaluaciones(modelo, last_id):
+            frag = (frag or "").strip()
+            resp = (resp or "").strip()
+            typ  = (typ or "").strip().lower() or "no_inferencia_sinsentido"
 
             if rid > max_id_visto:
                 max_id_visto = rid
@@ -216,7 +234,8 @@ def main():
             if len(nuevas) >= MIN_NUEVAS:
                 break
 
-        cur.close(); cn.close()
+        from django.db import connections
+        connections.close_all()
     except Exception as e:
         log([f"Error al leer la base de datos: {e}",
              "Fin del proceso (error en la BD)."], seccion=True)
@@ -266,14 +285,19 @@ def main():
         log(f"Error al crear el respaldo del modelo (se continúa): {e}")
 
     # 8) Entrenamiento
+    modo, motivo = _elegir_modo(nuevas_count)
     if nuevas_count > 0:
-        log(f"Inicia entrenamiento del modelo (con {nuevas_count} nuevas y {total_para_entrenar} en total).", seccion=True)
+        log(f"Inicia entrenamiento {modo} del modelo (con {nuevas_count} nuevas y {total_para_entrenar} en total).", seccion=True)
     else:
-        log(f"Inicia entrenamiento del modelo (sin nuevas; {total_para_entrenar} en total).", seccion=True)
+        log(f"Inicia entrenamiento {modo} del modelo (sin nuevas; {total_para_entrenar} en total).", seccion=True)
+    log(f"Modo {modo}: {motivo}.")
 
-    code, out, err = _run_training()
+    code, out, err = _run_training(modo, nuevas_count)
 
-    if code == 0:
+    if code == SALIDA_NO_PUBLICADO:
+        log("El entrenamiento incremental perdió exactitud: no se publicó el modelo; "
+            "el próximo reentrenamiento será completo.", seccion=True)
+    elif code == 0:
         log("Entrenamiento finalizado correctamente.", seccion=True)
         if nuevas_count > 0:
             log(f"El modelo se entrenó con {nuevas_count} nuevas inferencias; total usado: {total_para_entrenar}.")
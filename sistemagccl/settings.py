@@ -12,7 +12,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 import os
-from decouple import config
+from decouple import config, Csv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -87,12 +87,53 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Conexiones persistentes (ver settings_produccion.py)
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=0, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=False, cast=bool),
     }
  
 }
 
 X_FRAME_OPTIONS = 'ALLOWALL'
 
+# Inferencia por lotes (micro-batching del clasificador BERT)
+INFERENCIA_LOTE_MAX = config('INFERENCIA_LOTE_MAX', default=8, cast=int)
+INFERENCIA_LOTE_VENTANA_MS = config('INFERENCIA_LOTE_VENTANA_MS', default=10, cast=int)
+# Segundos que un pedido espera su lote antes de fallar (en el worker y en el servidor de inferencia)
+INFERENCIA_LOTE_TIMEOUT = config('INFERENCIA_LOTE_TIMEOUT', default=30, cast=float)
+INFERENCIA_MODELO_DIR = os.path.join(BASE_DIR, "trained_model")
+# Motor de inferencia: 'torch' (fp32), 'int8' (manage.py cuantizar_modelo) u 'onnx' (manage.py exportar_onnx)
+# 'onnx' es opcional: requiere pip install onnxruntime y EXPORTAR_ONNX=1 al reentrenar
+INFERENCIA_BACKEND = config('INFERENCIA_BACKEND', default='torch')
+# Cada cuántos segundos se revisa trained_model/VERSION para recargar en caliente. 0 = nunca
+INFERENCIA_RECARGA_INTERVALO = config('INFERENCIA_RECARGA_INTERVALO', default=5, cast=float)
+
+# Recursos pesados que los workers web cargan al arrancar (spacy_es, clasificador).
+# Vacío = todo se carga al primer uso
+PRECARGAR_RECURSOS = config('PRECARGAR_RECURSOS', default='', cast=Csv())
+
+# Servidor de inferencia (manage.py servidor_inferencia). Vacío = inferencia en el propio worker
+INFERENCIA_SOCKET = config('INFERENCIA_SOCKET', default='')
+# Nunca menor que INFERENCIA_LOTE_TIMEOUT + la ventana del lote (ver servicio.timeout_cliente)
+INFERENCIA_TIMEOUT = config('INFERENCIA_TIMEOUT', default=35, cast=float)
+
+# Caché de clasificaciones (fragmento + respuesta + versión del modelo). 0 = desactivada
+INFERENCIA_CACHE_MAX = config('INFERENCIA_CACHE_MAX', default=50000, cast=int)
+# Segundos mínimos entre renovaciones de ultimo_uso de una entrada (un acierto no escribe en la base)
+INFERENCIA_CACHE_REFRESCO = config('INFERENCIA_CACHE_REFRESCO', default=300, cast=int)
+
+# Catálogo en memoria de lecturas por tipo (evaluacionescl/catalogo.py): segundos antes de releerlo
+CATALOGO_TTL = config('CATALOGO_TTL', default=300, cast=int)
+
+# Página de resultados del alumno cacheada (se invalida al iniciar o responder una evaluación)
+RESULTADOS_USUARIO_TTL = config('RESULTADOS_USUARIO_TTL', default=600, cast=int)
+
+# Archivos de las exportaciones en segundo plano (fuera de MEDIA_ROOT: solo se descargan vía la vista de admin)
+EXPORTACIONES_DIR = config('EXPORTACIONES_DIR', default=os.path.join(BASE_DIR, 'exportaciones'))
+
+# Bitácora JSON lines del reentrenamiento (entrenar_modelo.py y orquestar_reentrenamiento.py)
+BITACORA_REENTRENAMIENTO = config('BITACORA_REENTRENAMIENTO', default=os.path.join(BASE_DIR, 'reentrenamiento_log.jsonl'))
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
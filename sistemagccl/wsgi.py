@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sistemagccl.settings')
 
 application = get_wsgi_application()
+
+# Precarga opcional de spaCy/BERT (PRECARGAR_RECURSOS) para que la primera
+# petición de cada worker no pague la carga; imprime tiempos y memoria.
+from evaluacionescl.recursos import precargar_configurados
+
+precargar_configurados()